@@ -0,0 +1,203 @@
+import argparse
+import json
+import shlex
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, cast
+
+from .generate import Shape, generate
+from .suite import Results, compare, run_benchmarks
+
+
+class Args(argparse.Namespace):
+    command: str
+
+    layers: int
+    depth: int
+    fan_out: int
+    fan_in: Optional[int]
+    diamonds: int
+    deps: int
+    seed: int
+
+    directory: str
+    repeat: int
+    jobs: int
+    e2e: bool
+    simulator_options: Optional[str]
+    output: Optional[str]
+    baseline: Optional[str]
+    results: str
+    threshold: float
+
+
+def add_shape_options(parser: argparse.ArgumentParser) -> None:
+    defaults = Shape()
+    group = parser.add_argument_group('input directory shape')
+    group.add_argument(
+        '--layers', type=int, metavar='N', default=defaults.layers,
+        help='number of layers (default: %(default)s)',
+    )
+    group.add_argument(
+        '--depth', type=int, metavar='N', default=defaults.depth,
+        help='number of levels of layers (default: %(default)s)',
+    )
+    group.add_argument(
+        '--fan-out', type=int, metavar='N', default=defaults.fan_out,
+        help='layers referenced by each layer (default: %(default)s)',
+    )
+    group.add_argument(
+        '--fan-in', type=int, metavar='N', default=defaults.fan_in,
+        help='max layers referencing the same layer (default: unlimited)',
+    )
+    group.add_argument(
+        '--diamonds', type=int, metavar='N', default=defaults.diamonds,
+        help='number of diamond references (default: %(default)s)',
+    )
+    group.add_argument(
+        '--deps', type=int, metavar='N', default=defaults.deps,
+        help='dependencies per layer (default: %(default)s)',
+    )
+    group.add_argument(
+        '--seed', type=int, metavar='N', default=defaults.seed,
+        help='random seed (default: %(default)s)',
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='measure the overhead of ptl itself',
+    )
+    subparsers = parser.add_subparsers(
+        title='commands', required=True, dest='command', metavar='COMMAND')
+
+    run_parser = subparsers.add_parser('run', help='run benchmarks')
+    add_shape_options(run_parser)
+    run_parser.add_argument(
+        '-r', '--repeat', type=int, metavar='N', default=5,
+        help='runs of each benchmark (default: %(default)s)',
+    )
+    run_parser.add_argument(
+        '-j', '--jobs', type=int, metavar='N', default=1,
+        help='jobs of the compile benchmark (default: %(default)s)',
+    )
+    run_parser.add_argument(
+        '--no-e2e', action='store_false', dest='e2e',
+        help="don't run compile and sync benchmarks",
+    )
+    run_parser.add_argument(
+        '--simulated', metavar='OPTIONS', dest='simulator_options',
+        help=(
+            'run compile and sync with the simulated provider instead of '
+            "the fake tool, e.g., --simulated='--latency 0.5'"
+        ),
+    )
+    run_parser.add_argument(
+        '-o', '--output', metavar='PATH',
+        help='write results to the file, e.g., to use them as a baseline',
+    )
+    run_parser.add_argument(
+        '--compare', metavar='PATH', dest='baseline',
+        help='compare results with the baseline',
+    )
+    add_threshold_option(run_parser)
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='compare results with the baseline')
+    compare_parser.add_argument('baseline', metavar='BASELINE')
+    compare_parser.add_argument('results', metavar='RESULTS')
+    add_threshold_option(compare_parser)
+
+    generate_parser = subparsers.add_parser(
+        'generate', help='generate input directory')
+    add_shape_options(generate_parser)
+    generate_parser.add_argument('directory', metavar='DIR')
+
+    return parser
+
+
+def add_threshold_option(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '-t', '--threshold', type=float, metavar='RATIO', default=0.1,
+        help='slowdown treated as a regression (default: %(default)s)',
+    )
+
+
+def get_shape(args: Args) -> Shape:
+    return Shape(
+        layers=args.layers, depth=args.depth, fan_out=args.fan_out,
+        fan_in=args.fan_in, diamonds=args.diamonds, deps=args.deps,
+        seed=args.seed,
+    )
+
+
+def load_results(path: str) -> Results:
+    with open(path) as fobj:
+        return cast(Results, json.load(fobj))
+
+
+def print_results(results: Results) -> None:
+    for name, timing in results['timings'].items():
+        print(
+            f'{name:<24} min {timing["min"] * 1000:10.3f} ms'
+            f'   median {timing["median"] * 1000:10.3f} ms'
+        )
+
+
+def print_comparison(
+    baseline: Results, results: Results, threshold: float,
+) -> bool:
+    # returns false if there are regressions
+    ok = True
+    for name, before, after, regressed in compare(
+        baseline, results, threshold=threshold,
+    ):
+        change = (after - before) / before * 100 if before else 0
+        mark = '  REGRESSION' if regressed else ''
+        print(
+            f'{name:<24} {before * 1000:10.3f} ms -> {after * 1000:10.3f} ms'
+            f'   {change:+7.1f}%{mark}'
+        )
+        ok = ok and not regressed
+    return ok
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = build_parser().parse_args(argv, namespace=Args())
+    try:
+        if args.command == 'generate':
+            stems: List[str] = generate(args.directory, get_shape(args))
+            print(f'{len(stems)} layers written to {args.directory}')
+            return
+        if args.command == 'compare':
+            assert args.baseline is not None
+            ok = print_comparison(
+                load_results(args.baseline), load_results(args.results),
+                args.threshold,
+            )
+        else:
+            simulator_options: Optional[List[str]] = None
+            if args.simulator_options is not None:
+                simulator_options = shlex.split(args.simulator_options)
+            results = run_benchmarks(
+                get_shape(args), repeat=args.repeat, e2e=args.e2e,
+                jobs=args.jobs, simulator_options=simulator_options,
+            )
+            if args.output:
+                Path(args.output).write_text(
+                    json.dumps(results, indent=2) + '\n')
+            if args.baseline:
+                ok = print_comparison(
+                    load_results(args.baseline), results, args.threshold)
+            else:
+                print_results(results)
+                ok = True
+    except ValueError as exc:
+        sys.exit(f'error: {exc}')
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import dataclasses
+import random
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+
+# the share of references of the requirements type (`-r`),
+# the rest are constraints (`-c`), as in a typical layered setup
+REQUIREMENTS_RATIO = 0.25
+
+
+@dataclasses.dataclass(frozen=True)
+class Shape:
+    # the number of layers
+    layers: int = 200
+    # the number of levels, layers of level 0 don't reference other layers,
+    # each layer of level N references at least one layer of level N - 1
+    depth: int = 6
+    # the number of layers referenced by each layer (except level 0)
+    fan_out: int = 3
+    # the maximum number of layers referencing the same layer
+    fan_in: Optional[int] = None
+    # the number of diamonds added on top of random references: A references
+    # B and C (different layers of the same branch), both referencing D
+    diamonds: int = 10
+    # the number of dependencies of each layer
+    deps: int = 10
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        if self.layers < 1:
+            raise ValueError('layers must be a positive integer')
+        if not 1 <= self.depth <= self.layers:
+            raise ValueError('depth must be between 1 and layers')
+        if self.fan_out < 1:
+            raise ValueError('fan_out must be a positive integer')
+        if self.fan_in is not None and self.fan_in < 1:
+            raise ValueError('fan_in must be a positive integer')
+
+
+def generate(directory: Union[Path, str], shape: Shape) -> List[str]:
+    # writes input files to the directory (created if doesn't exist),
+    # returns stems of layers sorted by level
+    rng = random.Random(shape.seed)
+    level_sizes = [1] * shape.depth
+    for _ in range(shape.layers - shape.depth):
+        level_sizes[rng.randrange(shape.depth)] += 1
+    levels: List[List[str]] = []
+    index = 0
+    for size in level_sizes:
+        levels.append([f'layer-{i:05d}' for i in range(index, index + size)])
+        index += size
+    level_of = {
+        stem: level for level, stems in enumerate(levels) for stem in stems}
+    references: Dict[str, Dict[str, str]] = {}
+    referrers: Dict[str, int] = dict.fromkeys(level_of, 0)
+
+    def add_reference(stem: str, target: str) -> None:
+        if target in references[stem]:
+            return
+        type_ = 'r' if rng.random() < REQUIREMENTS_RATIO else 'c'
+        references[stem][target] = type_
+        referrers[target] += 1
+
+    def pick(candidates: List[str]) -> str:
+        if shape.fan_in is not None:
+            available = [c for c in candidates if referrers[c] < shape.fan_in]
+            # the limit is exceeded rather than leaving a layer disconnected
+            if available:
+                candidates = available
+        return rng.choice(candidates)
+
+    for level, stems in enumerate(levels):
+        lower = [stem for stems in levels[:level] for stem in stems]
+        for stem in stems:
+            references[stem] = {}
+            if not level:
+                continue
+            add_reference(stem, pick(levels[level - 1]))
+            for _ in range(min(shape.fan_out, len(lower)) - 1):
+                candidates = [c for c in lower if c not in references[stem]]
+                add_reference(stem, pick(candidates))
+
+    tops = [stem for stem, level in level_of.items() if level >= 2]
+    for _ in range(shape.diamonds if tops else 0):
+        top = rng.choice(tops)
+        left = next(
+            target for target in references[top]
+            if level_of[target] == level_of[top] - 1
+        )
+        bottom = rng.choice(list(references[left]))
+        rights = [
+            stem for stem, level in level_of.items()
+            if level_of[bottom] < level < level_of[top] and stem != left
+        ]
+        if not rights:
+            continue
+        right = rng.choice(rights)
+        add_reference(top, right)
+        add_reference(right, bottom)
+
+    packages = [
+        f'package-{i:05d}' for i in range(max(shape.deps * 4, shape.deps))]
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for stem, targets in references.items():
+        lines = [
+            f'-r {target}.in' if type_ == 'r' else f'-c {target}.txt'
+            for target, type_ in sorted(targets.items())
+        ]
+        lines.extend(sorted(rng.sample(packages, shape.deps)))
+        (directory / f'{stem}.in').write_text(
+            ''.join(f'{line}\n' for line in lines))
+    return list(level_of)
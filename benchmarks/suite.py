@@ -0,0 +1,195 @@
+import dataclasses
+import os
+import platform
+import shlex
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import (
+    Callable, Dict, Iterator, List, Optional, Tuple, TypedDict, TypeVar, Union,
+)
+
+from ptl import __version__
+from ptl.commands import compile, sync
+from ptl.fs import snapshot_scope
+from ptl.infile import InFile, filter_infiles, read_infiles, sort_infiles
+from ptl.layer import Layer
+from ptl.providers import Provider, Tool, process_command_line
+
+from .generate import Shape, generate
+
+
+RESULTS_VERSION = 1
+
+# stands in for pip-compile/pip-sync, so that only ptl's own overhead (and
+# the cost of spawning a process) is measured: `compile` pins each
+# dependency of the input file to 1.0, `sync` does nothing
+FAKE_TOOL = """\
+#!/bin/sh
+test "$1" = compile || exit 0
+# [options ...] INPUT -o OUTPUT
+while [ $# -gt 3 ]; do shift; done
+grep -v -e '^-' -e '^#' -e '^$' "$1" | sed 's/$/==1.0/' > "$3"
+"""
+
+# the number of layers selected for filter_infiles()
+SELECTED_LAYERS = 5
+
+
+class Timing(TypedDict):
+    min: float
+    median: float
+    repeat: int
+
+
+class Results(TypedDict):
+    version: int
+    ptl_version: str
+    python: str
+    platform: str
+    shape: Dict[str, Optional[int]]
+    # the tool compile and sync benchmarks were run with
+    tool: str
+    timings: Dict[str, Timing]
+
+
+_T = TypeVar('_T')
+
+
+def measure(
+    func: Callable[[_T], object], setup: Callable[[], _T], repeat: int,
+) -> Timing:
+    # the setup is not timed, it prepares a fresh argument for each run,
+    # e.g., infiles without cached closures
+    times: List[float] = []
+    for _ in range(repeat):
+        arg = setup()
+        started = time.perf_counter()
+        with snapshot_scope():
+            func(arg)
+        times.append(time.perf_counter() - started)
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'repeat': repeat,
+    }
+
+
+def run_benchmarks(
+    shape: Shape, *, repeat: int = 5, e2e: bool = True, jobs: int = 1,
+    simulator_options: Optional[List[str]] = None,
+) -> Results:
+    # with `simulator_options` (possibly empty), compile and sync run the
+    # simulated provider instead of the fake tool, see ptl.simulator
+    timings: Dict[str, Timing] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / 'requirements'
+        stems = generate(input_dir, shape)
+        for name, timing in _iterate_timings(
+            input_dir, stems, repeat=repeat, e2e=e2e, jobs=jobs,
+            simulator_options=simulator_options,
+        ):
+            timings[name] = timing
+    return {
+        'version': RESULTS_VERSION,
+        'ptl_version': __version__,
+        'python': platform.python_version(),
+        'platform': sys.platform,
+        'shape': dataclasses.asdict(shape),
+        'tool': (
+            'fake' if simulator_options is None
+            else shlex.join(['simulated', *simulator_options])
+        ),
+        'timings': timings,
+    }
+
+
+def _iterate_timings(
+    input_dir: Path, stems: List[str], *, repeat: int, e2e: bool, jobs: int,
+    simulator_options: Optional[List[str]],
+) -> Iterator[Tuple[str, Timing]]:
+
+    def no_setup() -> None:
+        return None
+
+    def read() -> Tuple[InFile, ...]:
+        return read_infiles(input_dir)
+
+    yield 'read_infiles', measure(
+        lambda _: read_infiles(input_dir, use_index=False), no_setup, repeat)
+    # files modified within the last couple of seconds are never indexed,
+    # see graph._RACY_WINDOW
+    mtime = time.time() - 60
+    for path in input_dir.iterdir():
+        os.utime(path, (mtime, mtime))
+    # the first call creates the index
+    read_infiles(input_dir)
+    yield 'read_infiles_indexed', measure(
+        lambda _: read_infiles(input_dir), no_setup, repeat)
+    yield 'sort_infiles', measure(sort_infiles, read, repeat)
+    layers = [
+        Layer(input_dir / f'{stem}.in') for stem in stems[-SELECTED_LAYERS:]]
+    yield 'filter_infiles', measure(
+        lambda infiles: filter_infiles(infiles, layers), read, repeat)
+
+    def iterate_references(infiles: Tuple[InFile, ...]) -> None:
+        for infile in infiles:
+            for _ in infile.iterate_references(recursive=True):
+                pass
+
+    yield 'iterate_references', measure(iterate_references, read, repeat)
+
+    def render(infiles: Tuple[InFile, ...]) -> None:
+        for infile in infiles:
+            infile.render()
+
+    yield 'render', measure(render, read, repeat)
+    if not e2e:
+        return
+    compile_command_line: List[Union[Path, str]]
+    sync_command_line: List[Union[Path, str]]
+    if simulator_options is None:
+        fake_tool = input_dir.parent / 'fake-tool'
+        fake_tool.write_text(FAKE_TOOL)
+        fake_tool.chmod(0o755)
+        compile_command_line = [fake_tool, 'compile']
+        sync_command_line = [fake_tool, 'sync']
+    else:
+        tools = Provider.SIMULATED.tools
+        compile_command_line = [
+            *process_command_line(tools[Tool.COMPILE]), *simulator_options]
+        sync_command_line = [
+            *process_command_line(tools[Tool.SYNC]), *simulator_options]
+    yield 'compile', measure(
+        lambda _: compile(
+            compile_command_line, input_dir=input_dir, jobs=jobs,
+            force=True, use_stdin=simulator_options is not None,
+        ),
+        no_setup, repeat,
+    )
+    yield 'sync', measure(
+        lambda _: sync(sync_command_line, input_dir=input_dir),
+        no_setup, repeat,
+    )
+
+
+def compare(
+    baseline: Results, results: Results, *, threshold: float = 0.1,
+) -> List[Tuple[str, float, float, bool]]:
+    # (name, baseline time, current time, regressed) for benchmarks present
+    # in both results; minimum times are compared, since they are the least
+    # affected by noise, a slowdown over `threshold` is a regression
+    if baseline['shape'] != results['shape']:
+        raise ValueError('results of different shapes are not comparable')
+    if baseline['tool'] != results['tool']:
+        raise ValueError('results of different tools are not comparable')
+    comparison: List[Tuple[str, float, float, bool]] = []
+    for name, timing in results['timings'].items():
+        if (baseline_timing := baseline['timings'].get(name)) is None:
+            continue
+        before, after = baseline_timing['min'], timing['min']
+        comparison.append(
+            (name, before, after, after > before * (1 + threshold)))
+    return comparison
@@ -1,4 +1,3 @@
-import subprocess
 from pathlib import Path
 from typing import Optional
 
@@ -8,6 +7,9 @@ class Error(Exception):
     def get_error_message_from_cause(self) -> Optional[str]:
         if not (cause := self.__cause__):
             return None
+        # CalledProcessError can only be raised if subprocess is imported
+        import subprocess
+
         if isinstance(cause, subprocess.CalledProcessError):
             cmd = cause.cmd
             if not isinstance(cmd, (str, Path)):
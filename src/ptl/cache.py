@@ -0,0 +1,233 @@
+import gzip
+import logging
+import os
+import urllib.error
+import urllib.request
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from ._error import Error
+from .compat import StrEnum
+from .infile import InFile
+from .provenance import Digest, digest_inputs, read_lock
+from .utils import get_default_cache_dir, write_atomically
+
+
+log = logging.getLogger(__name__)
+
+
+class CacheError(Error):
+    pass
+
+
+class CacheBackendType(StrEnum):
+    FILESYSTEM = 'filesystem'
+    HTTP = 'http'
+
+
+# environment variables affecting resolution, e.g., PIP_INDEX_URL
+CACHE_KEY_ENV_PREFIXES = ('PIP_', 'UV_')
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+DEFAULT_HTTP_TIMEOUT = 10.0
+
+_ENTRY_SUFFIX = '.gz'
+
+
+def compute_cache_key(
+    infile: InFile, input_dir: Path, *,
+    command_line: Sequence[Union[Path, str]],
+    tool_version: Optional[str] = None,
+    environ: Optional[Mapping[str, str]] = None,
+) -> str:
+    # unlike the incremental state digest, the key must not depend on the
+    # location of the checkout, thus only the name of the executable is used
+    # and lock files are identified by their names and contents
+    digest = Digest()
+    executable, *args = command_line
+    digest.update('tool', Path(executable).name, *map(str, args))
+    digest.update('tool_version', tool_version or '')
+    if environ is None:
+        environ = os.environ
+    for key, value in sorted(environ.items()):
+        if key.startswith(CACHE_KEY_ENV_PREFIXES):
+            digest.update('env', key, value)
+    digest_inputs(digest, infile, input_dir)
+    # tools prefer pins from the existing output file, so it's an input too;
+    # provenance headers are left out, since they don't affect the result
+    output_name = infile.output_name
+    try:
+        output = read_lock(input_dir / output_name)
+    except FileNotFoundError:
+        digest.update('missing_output', output_name)
+    else:
+        digest.update('output', output_name, output)
+    return digest.hexdigest()
+
+
+class CacheBackend(ABC):
+    # stores opaque blobs by keys; errors are reported as CacheError
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        ...
+
+
+class FileSystemBackend(CacheBackend):
+    # suitable for shared mounts as well, since all writes are atomic and
+    # concurrent evictions are tolerated
+    directory: Path
+    max_size: int
+
+    def __init__(
+        self, directory: Optional[Union[Path, str]] = None, *,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ) -> None:
+        if directory is None:
+            directory = get_default_cache_dir()
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._get_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            raise CacheError(f'{path}: {exc}') from exc
+        try:
+            # mtime is used as the last access time for LRU eviction
+            os.utime(path)
+        except OSError:
+            # e.g., evicted by a concurrent run in the meantime
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._get_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomically(path, data)
+            self.evict()
+        except OSError as exc:
+            raise CacheError(f'{path}: {exc}') from exc
+
+    def evict(self) -> None:
+        entries = self._list_entries()
+        total_size = sum(size for _, _, size in entries)
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for _, path, size in entries:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            else:
+                log.debug('evicted %s', path)
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+
+    def _list_entries(self) -> List[Tuple[int, Path, int]]:
+        entries: List[Tuple[int, Path, int]] = []
+        for subdir in self._iterate_subdirs():
+            with os.scandir(subdir) as it:
+                for entry in it:
+                    if not entry.name.endswith(_ENTRY_SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append(
+                        (stat.st_mtime_ns, Path(entry.path), stat.st_size))
+        return entries
+
+    def _iterate_subdirs(self) -> Iterable[str]:
+        try:
+            with os.scandir(self.directory) as it:
+                return [entry.path for entry in it if entry.is_dir()]
+        except FileNotFoundError:
+            return []
+
+    def _get_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f'{key}{_ENTRY_SUFFIX}'
+
+
+class HTTPBackend(CacheBackend):
+    # entries are fetched with `GET <url>/<key>` and stored with
+    # `PUT <url>/<key>`, 404 on GET is a cache miss
+    url: str
+    timeout: float
+
+    def __init__(
+        self, url: str, *, timeout: float = DEFAULT_HTTP_TIMEOUT,
+    ) -> None:
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def get(self, key: str) -> Optional[bytes]:
+        request = urllib.request.Request(self._get_url(key), method='GET')
+        try:
+            with urllib.request.urlopen(
+                request, timeout=self.timeout,
+            ) as response:
+                data: bytes = response.read()
+        except urllib.error.HTTPError as exc:
+            if exc.code == 404:
+                return None
+            raise CacheError(f'GET {request.full_url}: {exc}') from exc
+        except OSError as exc:
+            raise CacheError(f'GET {request.full_url}: {exc}') from exc
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        request = urllib.request.Request(
+            self._get_url(key), data=data, method='PUT',
+            headers={'Content-Type': 'application/octet-stream'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except OSError as exc:
+            raise CacheError(f'PUT {request.full_url}: {exc}') from exc
+
+    def _get_url(self, key: str) -> str:
+        return f'{self.url}/{key}{_ENTRY_SUFFIX}'
+
+
+class CompileCache:
+    # the cache is an optimization, thus backend errors are only logged
+    backend: CacheBackend
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            data = self.backend.get(key)
+        except CacheError as exc:
+            log.warning('failed to read from cache: %s', exc)
+            return None
+        if data is None:
+            return None
+        try:
+            return gzip.decompress(data)
+        except (OSError, EOFError, zlib.error) as exc:
+            log.warning('corrupted cache entry %s, ignoring: %s', key, exc)
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        # mtime=0 makes compressed data reproducible
+        try:
+            self.backend.put(key, gzip.compress(data, mtime=0))
+        except CacheError as exc:
+            log.warning('failed to write to cache: %s', exc)
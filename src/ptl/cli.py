@@ -8,16 +8,24 @@ from typing import (
 )
 
 from . import __version__, commands
-from .config import Config
-from .exceptions import Error
+from ._error import Error
+from .config import Config, ConfigError
+from .fs import snapshot_scope
 from .providers import (
-    Provider, Tool, check_tool_version, find_tool, process_command_line,
+    TOOLS_CACHE_FILE, Provider, Tool, ToolVersionCache, check_tool_version,
+    find_tool, process_command_line,
 )
+from .utils import get_default_cache_dir
 
 
+# command modules (see commands/__init__.py) and the cache module are
+# imported on demand to keep the startup time low, e.g., for shell completion
+
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from .cache import CompileCache
+
     Parser = argparse.ArgumentParser
     # See: https://github.com/python/cpython/issues/101503
     SubParsers = argparse._SubParsersAction[Parser]   # pyright: ignore
@@ -42,6 +50,16 @@ class Args(argparse.Namespace):
     directory: Optional[str]
     layers: List[str]
     include_parent_layers: bool
+    include_dependent_layers: bool
+
+    jobs: Optional[int]
+    force: bool
+    watch: bool
+    keep_going: bool
+    merge_constraints: bool
+    use_cache: Optional[bool]
+
+    limit: Optional[int]
 
     extra_args: List[str]
 
@@ -49,10 +67,12 @@ class Args(argparse.Namespace):
 def add_command_parser(
     subparsers: 'SubParsers', command: str, *,
     add_tool_selection: bool = True, add_tool_options: bool = True,
+    add_compile_options: bool = False, add_layer_selection: bool = True,
+    add_stats_options: bool = False, help: Optional[str] = None,
 ) -> None:
     parser = subparsers.add_parser(
         command, add_help=False,
-        help=f'{command} requirements',
+        help=help or f'{command} requirements',
     )
 
     logging_options = parser.add_argument_group('logging options')
@@ -99,14 +119,69 @@ def add_command_parser(
         '-d', '--directory', metavar='DIR', dest='directory',
         help='input directory',
     )
-    command_options.add_argument(
-        'layers', nargs='*', metavar='LAYERS',
-        help=f'layers to {command}',
-    )
-    command_options.add_argument(
-        '--only', action='store_false', dest='include_parent_layers',
-        help=f"{command} only specified layers, not parent layers",
-    )
+    if add_layer_selection:
+        command_options.add_argument(
+            'layers', nargs='*', metavar='LAYERS',
+            help=f'layers to {command}',
+        )
+        layer_selection = (
+            command_options.add_mutually_exclusive_group()
+            if add_compile_options else command_options
+        )
+        layer_selection.add_argument(
+            '--only', action='store_false', dest='include_parent_layers',
+            help=f"{command} only specified layers, not parent layers",
+        )
+        if add_compile_options:
+            layer_selection.add_argument(
+                '--with-dependents', action='store_true',
+                dest='include_dependent_layers',
+                help=(
+                    'compile specified layers and layers depending on them, '
+                    'not parent layers'
+                ),
+            )
+    else:
+        parser.set_defaults(layers=[], include_parent_layers=True)
+    if add_stats_options:
+        command_options.add_argument(
+            '-n', '--limit', metavar='N', type=_positive_int, dest='limit',
+            help='show up to N slowest layers',
+        )
+    if add_compile_options:
+        command_options.add_argument(
+            '-j', '--jobs', metavar='N', type=_positive_int, dest='jobs',
+            help='compile up to N layers in parallel',
+        )
+        command_options.add_argument(
+            '-f', '--force', action='store_true', dest='force',
+            help='compile layers even if their inputs have not changed',
+        )
+        command_options.add_argument(
+            '-w', '--watch', action='store_true', dest='watch',
+            help='watch input files and recompile changed layers',
+        )
+        command_options.add_argument(
+            '-k', '--keep-going', action='store_true', dest='keep_going',
+            help=(
+                "don't stop on the first failure, compile all layers "
+                'not depending on failed ones'
+            ),
+        )
+        command_options.add_argument(
+            '--merge-constraints', action='store_true',
+            dest='merge_constraints',
+            help='pass referenced locks to the tool as one constraints file',
+        )
+        cache_selection = command_options.add_mutually_exclusive_group()
+        cache_selection.add_argument(
+            '--cache', action='store_true', dest='use_cache', default=None,
+            help='restore locks from the compile cache, store new ones',
+        )
+        cache_selection.add_argument(
+            '--no-cache', action='store_false', dest='use_cache',
+            help="don't use the compile cache",
+        )
 
     general_options = parser.add_argument_group('general options')
 
@@ -139,13 +214,30 @@ def build_parser() -> Parser:
     )
     subparsers = parser.add_subparsers(
         title='Commands', required=True, dest='command', metavar='COMMAND')
-    add_command_parser(subparsers, 'compile')
+    add_command_parser(subparsers, 'compile', add_compile_options=True)
     add_command_parser(subparsers, 'sync')
     add_command_parser(
         subparsers, 'show', add_tool_selection=False, add_tool_options=False)
+    add_command_parser(
+        subparsers, 'check', add_tool_selection=False, add_tool_options=False,
+        help='check that locks are up to date without compiling',
+    )
+    add_command_parser(
+        subparsers, 'stats', add_tool_selection=False, add_tool_options=False,
+        add_layer_selection=False, add_stats_options=True,
+        help='show compile and sync statistics',
+    )
     return parser
 
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f'positive integer expected, got {value}')
+    return number
+
+
 def _is_long_option(value: str) -> bool:
     return len(value) > 2 and value.startswith('--')
 
@@ -190,7 +282,10 @@ def main(__args: Optional[Sequence[str]] = None, /) -> None:
     if __args is None:
         __args = sys.argv[1:]
     try:
-        do_main(__args)
+        # each directory is scanned only once, the input directory is
+        # rescanned in the watch mode when changes are detected
+        with snapshot_scope():
+            do_main(__args)
     except Error as exc:
         log.error('%s: %s', exc.__class__.__name__, exc)
         sys.exit(1)
@@ -245,9 +340,14 @@ def do_main(__args: Sequence[str], /) -> None:
 
     if is_tool:
         assert tool is not None
-        tool_command_line = get_tool_command_line(config, args)
-        if verbosity_arg:
-            tool_command_line.append(verbosity_arg)
+        tool_command_line, tool_version, provider = get_tool_command_line(
+            config, args)
+        # the verbosity only affects the output of the tool, thus it's passed
+        # separately to compile, so that it's not part of the state digest
+        # and the cache key
+        verbosity_options = [verbosity_arg] if verbosity_arg else []
+        if tool == Tool.SYNC:
+            tool_command_line.extend(verbosity_options)
         tool_options: Optional[List[str]]
         if extra_args:
             tool_options = extra_args
@@ -256,11 +356,28 @@ def do_main(__args: Sequence[str], /) -> None:
         if tool_options:
             tool_command_line.extend(tool_options)
         if command == Tool.COMPILE:
+            include_dependent_layers = bool(
+                layers and args.include_dependent_layers)
+            if include_dependent_layers:
+                include_parent_layers = False
+            jobs: Optional[int] = args.jobs
+            if jobs is None:
+                jobs = config.jobs
             commands.compile(
                 command_line=tool_command_line,
+                verbosity_options=verbosity_options,
                 input_dir=input_dir,
                 layers=layers,
                 include_parent_layers=include_parent_layers,
+                include_dependent_layers=include_dependent_layers,
+                jobs=jobs,
+                tool_version=tool_version,
+                force=args.force,
+                watch=args.watch,
+                cache=get_cache(config, args),
+                keep_going=args.keep_going,
+                merge_constraints=args.merge_constraints,
+                use_stdin=provider is not None and provider.supports_stdin,
             )
         elif command == Tool.SYNC:
             commands.sync(
@@ -277,6 +394,14 @@ def do_main(__args: Sequence[str], /) -> None:
             layers=layers,
             include_parent_layers=include_parent_layers,
         )
+    elif command == 'check':
+        commands.check(
+            input_dir=input_dir,
+            layers=layers,
+            include_parent_layers=include_parent_layers,
+        )
+    elif command == 'stats':
+        commands.stats(input_dir=input_dir, limit=args.limit)
     else:
         assert False, 'should not reach here'
 
@@ -296,12 +421,41 @@ def configure_logging(verbosity: int) -> None:
         level=log_level, format=log_format, datefmt='%d-%m-%Y %H:%M:%S')
 
 
-def get_tool_command_line(config: Config, args: Args) -> List[str]:
+def get_cache(config: Config, args: Args) -> Optional[CompileCache]:
+    use_cache = args.use_cache
+    if use_cache is None:
+        use_cache = config.cache_enabled
+    if not use_cache:
+        return None
+    from .cache import (
+        CacheBackend, CacheBackendType, CompileCache, FileSystemBackend,
+        HTTPBackend,
+    )
+
+    backend: CacheBackend
+    if config.cache_backend == CacheBackendType.HTTP:
+        url = config.cache_url
+        if not url:
+            raise ConfigError('cache url is required for http cache backend')
+        backend = HTTPBackend(url)
+        log.debug('using cache %s', url)
+    else:
+        backend = FileSystemBackend(config.cache_directory)
+        if (max_size := config.cache_max_size) is not None:
+            backend.max_size = max_size * 1024 * 1024
+        log.debug('using cache %s', backend.directory)
+    return CompileCache(backend)
+
+
+def get_tool_command_line(
+    config: Config, args: Args,
+) -> Tuple[List[str], Optional[str], Optional[Provider]]:
+    # the provider is None for custom tools
     command_line: List[str]
     if command_line_str := args.custom_tool:
         command_line = process_command_line(command_line_str)
         log.debug('using %s', command_line)
-        return command_line
+        return command_line, None, None
     tool = Tool(args.command)
     provider: Optional[Provider] = None
     if args.use_uv:
@@ -314,15 +468,22 @@ def get_tool_command_line(config: Config, args: Args) -> List[str]:
             command_line = process_command_line(
                 provider_or_command_line_str_or_none)
             log.debug('using %s', command_line)
-            return command_line
+            return command_line, None, None
         if isinstance(provider_or_command_line_str_or_none, Provider):
             provider = provider_or_command_line_str_or_none
         else:
             assert provider_or_command_line_str_or_none is None
+    # versions of tools are cached next to compile cache entries, unless
+    # caching is turned off with --no-cache (sync has no such option)
+    cache: Optional[ToolVersionCache] = None
+    if getattr(args, 'use_cache', None) is not False:
+        cache_dir = config.cache_directory or get_default_cache_dir()
+        cache = ToolVersionCache(cache_dir / TOOLS_CACHE_FILE)
     if provider:
         command_line_str = provider.tools[tool]
-        command_line, version = check_tool_version(command_line_str)
+        command_line, version = check_tool_version(
+            command_line_str, cache=cache)
     else:
-        command_line, version = find_tool(tool)
+        command_line, version, provider = find_tool(tool, cache=cache)
     log.debug('using %s %s', command_line, version)
-    return command_line
+    return command_line, version, provider
@@ -1,10 +1,46 @@
-from .compile import compile
-from .show import show
-from .sync import sync
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from ._check import CheckError, check
+    from ._compile import CompileError, compile
+    from ._show import show
+    from ._stats import stats
+    from ._sync import SyncError, sync
+
+
+# command modules are imported on first access, so that only the module of
+# the command being run (and its dependencies) is imported
+_MODULES = {
+    'check': '_check',
+    'CheckError': '_check',
+    'compile': '_compile',
+    'CompileError': '_compile',
+    'show': '_show',
+    'stats': '_stats',
+    'sync': '_sync',
+    'SyncError': '_sync',
+}
+
+
+def __getattr__(name: str) -> object:
+    if (module_name := _MODULES.get(name)) is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    # module names differ from command names, since importing a submodule
+    # binds it to the package attribute of the same name
+    value = getattr(import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
 
 
 __all__ = [
+    'check',
     'compile',
     'show',
+    'stats',
     'sync',
+    'CheckError',
+    'CompileError',
+    'SyncError',
 ]
@@ -0,0 +1,61 @@
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from .. import fs
+from .._error import Error
+from ..infile import InFile, get_infiles, get_input_dir
+from ..layer import Layer, LayerType, validate_layers
+from ..provenance import check_provenance
+
+
+log = logging.getLogger(__name__)
+
+
+class CheckError(Error):
+    pass
+
+
+@fs.snapshot_scope()
+def check(
+    *,
+    input_dir: Optional[Union[Path, str]] = None,
+    layers: Optional[Iterable[Union[Path, str, Layer]]] = None,
+    include_parent_layers: bool = True,
+) -> None:
+    # locks are checked against their provenance headers, the compile tool
+    # is not called
+    input_dir = get_input_dir(input_dir)
+    log.debug('input dir: %s', input_dir)
+    if layers is not None:
+        layers = validate_layers(
+            layers, type_=LayerType.INFILE, input_dir=input_dir,
+            check_exists=True, check_type=False,
+        )
+    infiles = get_infiles(
+        input_dir, layers=layers, include_parent_layers=include_parent_layers)
+    # locks are not changed while checking, each one is hashed once
+    lock_digests: Dict[str, Optional[str]] = {}
+    stale: Set[InFile] = set()
+    for infile in infiles:
+        reasons = check_provenance(
+            infile, input_dir, lock_digests=lock_digests)
+        # infiles are sorted, referenced ones are already checked
+        stale_references = sorted({
+            ref.infile.output_name
+            for ref in infile.iterate_references(recursive=True)
+            if ref.infile in stale
+        })
+        if stale_references:
+            reasons.append(
+                f'referenced locks are stale: {", ".join(stale_references)}')
+        if reasons:
+            stale.add(infile)
+            print(f'{infile.output_name}: {"; ".join(reasons)}')
+        else:
+            log.debug('%s is up to date', infile.output_name)
+    if stale:
+        stale_names: List[str] = [
+            infile.output_name for infile in infiles if infile in stale]
+        raise CheckError(f'stale locks: {", ".join(stale_names)}')
+    log.info('all locks are up to date')
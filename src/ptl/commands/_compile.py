@@ -0,0 +1,428 @@
+import asyncio
+import logging
+import subprocess
+import time
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Set,
+    Union,
+)
+
+from .. import engine, fs
+from .._error import Error
+from ..constraints import write_merged_constraints
+from ..history import (
+    CacheStatus, History, Run, Usage, UsageTracker, get_tool_info,
+)
+from ..infile import (
+    InFile, ReferenceType, filter_infiles, get_dependents, get_infiles,
+    get_input_dir, get_redundant_references, has_relative_path,
+    iterate_dependents, parse_infile, read_infiles, sort_infiles,
+)
+from ..layer import Layer, LayerType, validate_layers
+from ..provenance import (
+    add_provenance, compute_provenance, hash_lock, read_lock, write_provenance,
+)
+from ..scheduler import get_priorities, schedule
+from ..state import State, compute_input_digest
+from ..utils import try_relative_to, write_atomically
+from ..watch import create_watcher
+
+
+if TYPE_CHECKING:
+    from ..cache import CompileCache
+
+
+log = logging.getLogger(__name__)
+
+
+class CompileError(Error):
+    pass
+
+
+@fs.snapshot_scope()
+def compile(
+    command_line: Iterable[Union[Path, str]], *,
+    input_dir: Optional[Union[Path, str]] = None,
+    layers: Optional[Iterable[Union[Path, str, Layer]]] = None,
+    include_parent_layers: bool = True,
+    include_dependent_layers: bool = False,
+    jobs: int = 1,
+    tool_version: Optional[str] = None,
+    verbosity_options: Iterable[str] = (),
+    force: bool = False,
+    watch: bool = False,
+    cache: Optional['CompileCache'] = None,
+    keep_going: bool = False,
+    use_stdin: bool = False,
+    merge_constraints: bool = False,
+) -> None:
+    if jobs < 1:
+        raise CompileError(f'jobs must be a positive integer, got {jobs}')
+    log.debug('using %s', command_line)
+    input_dir = get_input_dir(input_dir)
+    log.debug('input dir: %s', input_dir)
+    if layers is not None:
+        layers = validate_layers(
+            layers, type_=LayerType.INFILE, input_dir=input_dir,
+            check_exists=True, check_type=False,
+        )
+    compiler = _Compiler(
+        command_line, input_dir=input_dir, jobs=jobs,
+        tool_version=tool_version, verbosity_options=verbosity_options,
+        force=force, cache=cache,
+        keep_going=keep_going, use_stdin=use_stdin,
+        merge_constraints=merge_constraints,
+    )
+    if watch:
+        _watch(
+            compiler, input_dir=input_dir, layers=layers,
+            include_parent_layers=include_parent_layers,
+            include_dependent_layers=include_dependent_layers,
+        )
+        return
+    infiles = get_infiles(
+        input_dir, layers=layers, include_parent_layers=include_parent_layers,
+        include_dependent_layers=include_dependent_layers,
+    )
+    requested: Optional[Set[InFile]] = None
+    if layers is not None and include_dependent_layers:
+        stems = {layer.stem for layer in layers}
+        requested = {infile for infile in infiles if infile.stem in stems}
+    compiler.run(infiles, requested=requested)
+
+
+def _watch(
+    compiler: '_Compiler', *,
+    input_dir: Path, layers: Optional[List[Layer]],
+    include_parent_layers: bool, include_dependent_layers: bool,
+) -> None:
+
+    def select(infiles: Sequence[InFile]) -> List[InFile]:
+        if layers is not None:
+            infiles = filter_infiles(
+                infiles, layers, include_parent_layers=include_parent_layers,
+                include_dependent_layers=include_dependent_layers,
+            )
+        return sort_infiles(infiles)
+
+    with create_watcher(input_dir) as watcher:
+        all_infiles: Sequence[InFile] = read_infiles(input_dir)
+        try:
+            compiler.run(select(all_infiles))
+        except Error as exc:
+            log.error('%s: %s', exc.__class__.__name__, exc)
+        watcher.refresh()
+        log.info('watching %s for changes, press Ctrl+C to stop', input_dir)
+        try:
+            while True:
+                changed_names = watcher.wait()
+                log.debug('changed: %s', ', '.join(sorted(changed_names)))
+                try:
+                    all_infiles = _process_changes(
+                        compiler, select,
+                        input_dir=input_dir, infiles=all_infiles,
+                        changed_names=changed_names,
+                    )
+                except Error as exc:
+                    log.error('%s: %s', exc.__class__.__name__, exc)
+                watcher.refresh()
+        except KeyboardInterrupt:
+            log.info('stopped watching %s', input_dir)
+
+
+def _process_changes(
+    compiler: '_Compiler',
+    select: Callable[[Sequence[InFile]], List[InFile]], *,
+    input_dir: Path, infiles: Sequence[InFile], changed_names: Set[str],
+) -> Sequence[InFile]:
+    # the directory has changed since it was scanned
+    fs.invalidate_snapshot(input_dir)
+    names_to_infiles = {infile.original_name: infile for infile in infiles}
+    outputs_to_infiles = {infile.output_name: infile for infile in infiles}
+    changed_infiles: Set[InFile] = set()
+    changed_locks: Set[InFile] = set()
+    reload = False
+    for name in changed_names:
+        if name.endswith('.in'):
+            infile = names_to_infiles.get(name)
+            if infile is None or not fs.exists(input_dir / name):
+                # an infile is added or removed, the graph must be rebuilt
+                reload = True
+            else:
+                changed_infiles.add(infile)
+        elif infile := outputs_to_infiles.get(name):
+            changed_locks.add(infile)
+    if reload:
+        infiles = read_infiles(input_dir)
+        compiler.run(select(infiles))
+        return infiles
+    stems_to_infiles = {infile.stem: infile for infile in infiles}
+    for infile in changed_infiles:
+        log.info('%s changed', infile)
+        parse_infile(infile, input_dir, stems_to_infiles)
+    for infile in changed_locks:
+        log.info('%s changed', infile.output_name)
+    dependents = get_dependents(infiles)
+    affected = set(changed_infiles)
+    for infile in changed_infiles | changed_locks:
+        affected.update(iterate_dependents(infile, dependents))
+    to_compile = [infile for infile in select(infiles) if infile in affected]
+    if to_compile:
+        compiler.run(
+            to_compile, requested=changed_infiles, changed=changed_locks)
+    return infiles
+
+
+class _Compiler:
+    command_line: List[Union[Path, str]]
+    input_dir: Path
+    cwd: Path
+    state: State
+    jobs: int
+    tool_version: Optional[str]
+    # passed to the tool, but not taken into account by the state and the
+    # cache, e.g., `-v`
+    verbosity_options: List[str]
+    force: bool
+    cache: Optional['CompileCache']
+    keep_going: bool
+    use_stdin: bool
+    merge_constraints: bool
+    requested: Optional[Set[InFile]] = None
+
+    def __init__(
+        self, command_line: Iterable[Union[Path, str]], *,
+        input_dir: Path, jobs: int, tool_version: Optional[str], force: bool,
+        verbosity_options: Iterable[str] = (),
+        cache: Optional['CompileCache'] = None, keep_going: bool = False,
+        use_stdin: bool = False, merge_constraints: bool = False,
+    ) -> None:
+        self.command_line = list(command_line)
+        self.input_dir = input_dir
+        self.cwd = Path.cwd()
+        self.jobs = jobs
+        self.tool_version = tool_version
+        self.verbosity_options = list(verbosity_options)
+        self.force = force
+        self.cache = cache
+        self.keep_going = keep_going
+        self.use_stdin = use_stdin
+        self.merge_constraints = merge_constraints
+        self.tool, self.options_hash = get_tool_info(self.command_line)
+        self._changed: Set[InFile] = set()
+
+    def run(
+        self, infiles: Sequence[InFile], *,
+        requested: Optional[Set[InFile]] = None,
+        changed: Iterable[InFile] = (),
+    ) -> None:
+        # dependents that are not requested explicitly are only compiled if
+        # any referenced lock is changed in this run (or passed as changed)
+        self.requested = requested
+        self._changed = set(changed)
+        self.state = State(self.input_dir)
+        self.history = History(self.input_dir)
+        self.usage = UsageTracker()
+        self.check_missing_locks(infiles)
+        priorities: Optional[Dict[InFile, float]] = None
+        if self.jobs > 1:
+            # start layers heading the longest chains first
+            durations: Dict[InFile, float] = {}
+            for infile in infiles:
+                if (duration := self.state.get_duration(infile)) is not None:
+                    durations[infile] = duration
+            priorities = get_priorities(infiles, durations)
+        try:
+            failed = schedule(
+                infiles, self.compile, jobs=self.jobs,
+                keep_going=self.keep_going, priorities=priorities,
+            )
+        finally:
+            self.state.save()
+            self.history.close()
+        if failed:
+            dependents = get_dependents(infiles)
+            skipped = {
+                dependent for infile in failed
+                for dependent in iterate_dependents(infile, dependents)
+            }
+            failed_names = [str(i) for i in infiles if i in failed]
+            message = f'failed to compile: {", ".join(failed_names)}'
+            if skipped:
+                skipped_names = [str(i) for i in infiles if i in skipped]
+                message = f'{message}; skipped: {", ".join(skipped_names)}'
+            raise CompileError(message)
+
+    def check_missing_locks(self, infiles: Sequence[InFile]) -> None:
+        locks_to_compile = {infile.output_name for infile in infiles}
+        missing_locks: List[str] = []
+        for infile in infiles:
+            for ref in infile.iterate_references(recursive=True):
+                lock = ref.infile.output_name
+                if (
+                    lock not in locks_to_compile
+                    and not fs.exists(self.input_dir / lock)
+                ):
+                    missing_locks.append(lock)
+        if missing_locks:
+            raise CompileError(
+                'not all referenced layers are compiled, '
+                f'missing: {", ".join(missing_locks)}'
+            )
+
+    async def compile(self, infile: InFile) -> None:
+        if self.requested is not None and infile not in self.requested:
+            changed = any(
+                ref.infile in self._changed
+                for ref in infile.iterate_references(recursive=True)
+            )
+            if not changed:
+                log.info('%s: referenced locks not changed, skipping', infile)
+                return
+        input_digest = compute_input_digest(
+            infile, self.input_dir,
+            command_line=self.command_line, tool_version=self.tool_version,
+        )
+        provenance = compute_provenance(infile, self.input_dir)
+        output_path = self.input_dir / infile.output_name
+        if not self.force and self.state.is_up_to_date(infile, input_digest):
+            # e.g., the lock is compiled by an older version without headers
+            if write_provenance(output_path, provenance):
+                log.debug('%s: provenance header updated', infile)
+                self.state.update(infile, input_digest)
+            log.info('%s is up to date', infile)
+            return
+        output_digest = hash_lock(output_path)
+        cache_key: Optional[str] = None
+        cache_status: Optional[str] = None
+        # cache backends do blocking I/O (e.g., HTTP requests), which must
+        # not stall other layers compiled in parallel
+        loop = asyncio.get_running_loop()
+        if self.cache is not None:
+            started_at, started = time.time(), time.monotonic()
+            # the cache module is only imported when the cache is enabled
+            from ..cache import compute_cache_key
+
+            cache_key = compute_cache_key(
+                infile, self.input_dir,
+                command_line=self.command_line,
+                tool_version=self.tool_version,
+            )
+            output = await loop.run_in_executor(
+                None, self.cache.get, cache_key)
+            if output is not None:
+                log.info('%s: restoring from cache', infile)
+                write_atomically(
+                    output_path, add_provenance(output, provenance))
+                lock_changed = self._finish(
+                    infile, input_digest, output_digest)
+                self._record(
+                    infile, started_at, time.monotonic() - started,
+                    lock_changed=lock_changed, cache=CacheStatus.HIT,
+                )
+                return
+            cache_status = CacheStatus.MISS
+        log.info('compiling %s', infile)
+        started_at, started = time.time(), time.monotonic()
+        try:
+            await self._call_tool(infile, output_path)
+        except subprocess.CalledProcessError as exc:
+            self._record(
+                infile, started_at, time.monotonic() - started,
+                usage=self.usage.get_delta(), exit_code=exc.returncode,
+                cache=cache_status,
+            )
+            raise CompileError from exc
+        wall_time = time.monotonic() - started
+        usage = self.usage.get_delta()
+        self.state.set_duration(infile, wall_time)
+        if self.cache is not None and cache_key is not None:
+            await loop.run_in_executor(
+                None, self.cache.put, cache_key, read_lock(output_path))
+        write_provenance(output_path, provenance)
+        lock_changed = self._finish(infile, input_digest, output_digest)
+        self._record(
+            infile, started_at, wall_time, usage=usage,
+            lock_changed=lock_changed, cache=cache_status,
+        )
+
+    async def _call_tool(self, infile: InFile, output_path: Path) -> None:
+        output = try_relative_to(output_path, self.cwd)
+        # with parallel jobs, the output of each tool is prefixed
+        prefix = infile.stem if self.jobs > 1 else None
+        constraints: Optional[Path] = None
+        if self.merge_constraints and infile.references:
+            # all referenced locks are replaced with a single merged file
+            constraints = write_merged_constraints(infile, self.input_dir)
+            exclude = {
+                ref.infile for ref in infile.iterate_references(recursive=True)
+            }
+        else:
+            exclude = get_redundant_references(infile, self.input_dir)
+            if exclude:
+                log.debug(
+                    '%s: redundant references: %s',
+                    infile, ', '.join(sorted(map(str, exclude))),
+                )
+        references_dir = try_relative_to(self.input_dir, self.cwd)
+        # the intermediate input file is streamed to the tool instead of being
+        # written next to the original one; paths with whitespace would have
+        # to be quoted, and quoting rules differ between tools, thus such
+        # paths fall back to the temporary file
+        use_stdin = self.use_stdin and not any(
+            map(str.isspace, str(references_dir)))
+        # relative paths in dependency and option lines are resolved by the
+        # tool against the directory of the file it reads, i.e., against its
+        # cwd in the case of stdin
+        if use_stdin and any(map(has_relative_path, infile.dependencies)):
+            log.debug('%s: relative paths, not using stdin', infile)
+            use_stdin = False
+        lines = infile.iterate_lines(
+            references_as=ReferenceType.CONSTRAINTS,
+            references_dir=references_dir if use_stdin else None,
+            exclude=exclude, constraints=constraints,
+        )
+        if use_stdin:
+            cmd = [
+                *self.command_line, *self.verbosity_options, '-', '-o', output]
+            log.debug('calling %s', cmd)
+            await engine.check_call(
+                cmd, prefix=prefix, input=(line.encode() for line in lines))
+            return
+        with infile.temporarily_write_to(
+            self.input_dir, lines=lines,
+        ) as input_file:
+            cmd = [
+                *self.command_line, *self.verbosity_options,
+                try_relative_to(input_file, self.cwd), '-o', output,
+            ]
+            log.debug('calling %s', cmd)
+            await engine.check_call(cmd, prefix=prefix)
+
+    def _finish(
+        self, infile: InFile, input_digest: str,
+        output_digest: Optional[str],
+    ) -> bool:
+        self.state.update(infile, input_digest)
+        # provenance headers are ignored, the lock is only changed if the
+        # tool output is changed
+        output_path = self.input_dir / infile.output_name
+        if hash_lock(output_path) == output_digest:
+            return False
+        self._changed.add(infile)
+        return True
+
+    def _record(
+        self, infile: InFile, started_at: float, wall_time: float, *,
+        usage: Usage = (None, None, None), exit_code: int = 0,
+        lock_changed: Optional[bool] = None, cache: Optional[str] = None,
+    ) -> None:
+        user_time, system_time, max_rss = usage
+        self.history.record(Run(
+            command='compile', layer=infile.stem,
+            tool=self.tool, options_hash=self.options_hash,
+            wall_time=wall_time, user_time=user_time,
+            system_time=system_time, max_rss=max_rss, exit_code=exit_code,
+            lock_changed=lock_changed, cache=cache, started_at=started_at,
+        ))
@@ -2,6 +2,7 @@ import logging
 from pathlib import Path
 from typing import Iterable, Optional, Union
 
+from .. import fs
 from ..infile import get_infiles, get_input_dir
 from ..layer import Layer, LayerType, validate_layers
 
@@ -9,6 +10,7 @@ from ..layer import Layer, LayerType, validate_layers
 log = logging.getLogger(__name__)
 
 
+@fs.snapshot_scope()
 def show(
     *,
     input_dir: Optional[Union[Path, str]] = None,
@@ -0,0 +1,73 @@
+import logging
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+from .. import fs
+from ..history import History, LayerStats
+from ..infile import get_input_dir
+
+
+log = logging.getLogger(__name__)
+
+
+@fs.snapshot_scope()
+def stats(
+    *,
+    input_dir: Optional[Union[Path, str]] = None,
+    limit: Optional[int] = None,
+) -> None:
+    input_dir = get_input_dir(input_dir)
+    log.debug('input dir: %s', input_dir)
+    with History(input_dir) as history:
+        layer_stats = history.get_layer_stats('compile')
+        sync_stats = history.get_layer_stats('sync')
+        cache_hit_rate = history.get_cache_hit_rate()
+    if not layer_stats and not sync_stats:
+        print('no history yet')
+        return
+    if layer_stats:
+        print('slowest layers (compile):')
+        print(_format_table(layer_stats[:limit]))
+    if sync_stats:
+        if layer_stats:
+            print()
+        print('sync:')
+        print(_format_table(sync_stats[:limit]))
+    if cache_hit_rate is not None:
+        print()
+        print(f'cache hit rate: {cache_hit_rate:.0%}')
+
+
+def _format_table(rows: Sequence[LayerStats]) -> str:
+    table: List[List[str]] = [[
+        'LAYER', 'RUNS', 'FAILED', 'AVG', 'LAST', 'TREND', 'CPU', 'PEAK RSS',
+    ]]
+    for row in rows:
+        trend = '-'
+        if (prev := row['prev_avg_wall_time']) is not None and prev > 0:
+            trend = f'{(row["avg_wall_time"] - prev) / prev:+.0%}'
+        cpu = '-'
+        if (cpu_time := row['avg_cpu_time']) is not None:
+            cpu = _format_seconds(cpu_time)
+        rss = '-'
+        if (max_rss := row['max_rss']) is not None:
+            rss = f'{max_rss / 1024:.1f}M'
+        table.append([
+            row['layer'], str(row['runs']), str(row['failures']),
+            _format_seconds(row['avg_wall_time']),
+            _format_seconds(row['last_wall_time']),
+            trend, cpu, rss,
+        ])
+    widths = [max(map(len, column)) for column in zip(*table)]
+    return '\n'.join(
+        '  '.join(
+            # the layer name is left-aligned, numbers are right-aligned
+            cell.ljust(width) if index == 0 else cell.rjust(width)
+            for index, (cell, width) in enumerate(zip(line, widths))
+        ).rstrip()
+        for line in table
+    )
+
+
+def _format_seconds(seconds: float) -> str:
+    return f'{seconds:.1f}s'
@@ -1,9 +1,13 @@
+import asyncio
 import logging
 import subprocess
+import time
 from pathlib import Path
 from typing import Iterable, List, Literal, Optional, Union
 
+from .. import engine, fs
 from .._error import Error
+from ..history import History, Run, UsageTracker, get_tool_info
 from ..infile import ReferenceType, get_infiles, get_input_dir
 from ..layer import Layer, LayerType, validate_layers
 from ..utils import try_relative_to
@@ -16,6 +20,7 @@ class SyncError(Error):
     pass
 
 
+@fs.snapshot_scope()
 def sync(
     command_line: Iterable[Union[Path, str]], *,
     input_dir: Optional[Union[Path, str]] = None,
@@ -42,7 +47,7 @@ def sync(
     for infile in infiles:
         output_name = infile.output_name
         compiled_file = input_dir / output_name
-        if compiled_file.exists():
+        if fs.exists(compiled_file):
             compiled_files.append(try_relative_to(compiled_file, cwd))
         else:
             missing_files.append(output_name)
@@ -50,12 +55,31 @@ def sync(
         raise SyncError(
             f'not all files are compiled, missing: {", ".join(missing_files)}')
     log.debug('syncing %s', compiled_files)
+    command_line = list(command_line)
     cmd = [
         *command_line,
         *compiled_files,
     ]
     log.debug('calling %s', cmd)
+    usage = UsageTracker()
+    started_at, started = time.time(), time.monotonic()
+
+    def record(exit_code: int) -> None:
+        tool, options_hash = get_tool_info(command_line)
+        user_time, system_time, max_rss = usage.get_delta()
+        with History(input_dir) as history:
+            history.record(Run(
+                command='sync',
+                layer=','.join(infile.stem for infile in infiles),
+                tool=tool, options_hash=options_hash,
+                wall_time=time.monotonic() - started, user_time=user_time,
+                system_time=system_time, max_rss=max_rss,
+                exit_code=exit_code, started_at=started_at,
+            ))
+
     try:
-        subprocess.check_call(cmd)
+        asyncio.run(engine.check_call(cmd))
     except subprocess.CalledProcessError as exc:
+        record(exc.returncode)
         raise SyncError from exc
+    record(0)
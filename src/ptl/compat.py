@@ -3,7 +3,7 @@ from __future__ import annotations
 import enum
 import sys
 from importlib import import_module
-from typing import Any, BinaryIO, Callable, Dict, Optional
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, Optional
 
 
 if sys.version_info >= (3, 11):
@@ -13,16 +13,28 @@ else:
         pass
 
 
-toml_load: Optional[   # type: ignore[misc]
-    Callable[[BinaryIO], Dict[str, Any]]] = None
+TomlLoad = Callable[[BinaryIO], Dict[str, Any]]   # type: ignore[misc]
 
-if sys.version_info >= (3, 11):
-    from tomllib import load as toml_load
-else:
-    try:
-        toml_load = import_module('tomli').load
-    except ImportError:
-        pass
+
+if TYPE_CHECKING:
+    toml_load: Optional[TomlLoad]
+
+
+def __getattr__(name: str) -> Optional[TomlLoad]:
+    # the toml parser is imported on first access, most commands don't need
+    # it at all (or don't need it before the config file is actually read)
+    if name != 'toml_load':
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    load: Optional[TomlLoad] = None
+    if sys.version_info >= (3, 11):
+        from tomllib import load
+    else:
+        try:
+            load = import_module('tomli').load
+        except ImportError:
+            pass
+    globals()['toml_load'] = load
+    return load
 
 
 __all__ = [
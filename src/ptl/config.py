@@ -3,13 +3,19 @@ import os
 import shlex
 from functools import cached_property
 from pathlib import Path
-from typing import Any, List, Optional, Type, TypedDict, TypeVar, Union, cast
+from typing import (
+    TYPE_CHECKING, Any, List, Optional, Type, TypedDict, TypeVar, Union, cast,
+)
 
+from . import compat, fs
 from ._error import Error
-from .compat import toml_load
 from .providers import Provider, Tool
 
 
+if TYPE_CHECKING:
+    from .cache import CacheBackendType
+
+
 log = logging.getLogger(__name__)
 
 
@@ -20,16 +26,28 @@ class ConfigError(Error):
     pass
 
 
-CompileConfigDict = TypedDict(
-    'CompileConfigDict', {'tool': str, 'tool-options': str}, total=False)
+CompileConfigDict = TypedDict('CompileConfigDict', {
+    'tool': str,
+    'tool-options': str,
+    'jobs': int,
+}, total=False)
 SyncConfigDict = TypedDict(
     'SyncConfigDict', {'tool': str, 'tool-options': str}, total=False)
+CacheConfigDict = TypedDict('CacheConfigDict', {
+    'enabled': bool,
+    'backend': str,
+    'url': str,
+    'directory': str,
+    'max-size': int,
+}, total=False)
 ConfigDict = TypedDict('ConfigDict', {
     'compile': CompileConfigDict,
     'sync': SyncConfigDict,
+    'cache': CacheConfigDict,
     'directory': str,
     'tool': str,
     'tool-options': str,
+    'jobs': int,
 }, total=False)
 
 
@@ -42,7 +60,6 @@ class Config:
     _environ = os.environ
 
     _config_path: Optional[Path]
-    _config_dict: ConfigDict
 
     def __init__(
         self, path: Optional[Union[Path, str]] = None, *,
@@ -52,19 +69,23 @@ class Config:
             ignore_config_file = self._get_env_value(bool, 'NO_CONFIG_FILE')
         if ignore_config_file:
             self._config_path = None
-            self._config_dict = {}
             return
         if path is None:
             path = self._get_env_value(str, 'CONFIG_FILE')
             if path is None:
                 path = find_config()
         if path is not None:
-            path = Path(path).resolve()
-            self._config_path = path
-            self._config_dict = load_config(path) or {}
+            self._config_path = fs.resolve(path)
         else:
             self._config_path = None
-            self._config_dict = {}
+
+    @cached_property
+    def _config_dict(self) -> ConfigDict:
+        # the config file is only parsed when a value is not set by
+        # an environment variable or a command line option
+        if self._config_path is None:
+            return {}
+        return load_config(self._config_path) or {}
 
     @cached_property
     def directory(self) -> Optional[Path]:
@@ -80,6 +101,61 @@ class Config:
             return 0
         return value
 
+    @cached_property
+    def jobs(self) -> int:
+        value = self._get_value(int, 'COMPILE_JOBS', 'compile.jobs')
+        if value is None:
+            value = self._get_value(int, 'JOBS', 'jobs')
+        if value is None:
+            return 1
+        if value < 1:
+            raise ConfigError(f'jobs must be a positive integer, got {value}')
+        return value
+
+    @cached_property
+    def cache_enabled(self) -> bool:
+        value = self._get_value(bool, 'CACHE', 'cache.enabled')
+        if value is None:
+            return False
+        return value
+
+    @cached_property
+    def cache_backend(self) -> 'CacheBackendType':
+        from .cache import CacheBackendType
+
+        value = self._get_value(str, 'CACHE_BACKEND', 'cache.backend')
+        if value is None:
+            return CacheBackendType.FILESYSTEM
+        try:
+            return CacheBackendType(value)
+        except ValueError:
+            choices = ', '.join(t.value for t in CacheBackendType)
+            raise ConfigError(
+                f'unknown cache backend {value!r}, expected one of: {choices}',
+            ) from None
+
+    @cached_property
+    def cache_url(self) -> Optional[str]:
+        return self._get_value(str, 'CACHE_URL', 'cache.url')
+
+    @cached_property
+    def cache_directory(self) -> Optional[Path]:
+        value = self._get_value(str, 'CACHE_DIRECTORY', 'cache.directory')
+        if value is None:
+            return None
+        return Path(value).expanduser().resolve()
+
+    @cached_property
+    def cache_max_size(self) -> Optional[int]:
+        # in mebibytes
+        value = self._get_value(int, 'CACHE_MAX_SIZE', 'cache.max-size')
+        if value is None:
+            return None
+        if value < 1:
+            raise ConfigError(
+                f'cache max size must be a positive integer, got {value}')
+        return value
+
     def get_tool(self, tool: Tool) -> Union[Provider, str, None]:
         if tool == Tool.COMPILE:
             return self._compile_tool
@@ -135,6 +211,8 @@ class Config:
             return Provider.PIP_TOOLS
         if tool == ':uv:':
             return Provider.UV
+        if tool == ':simulated:':
+            return Provider.SIMULATED
         return tool
 
     def _get_value(
@@ -187,13 +265,13 @@ class Config:
 
 
 def load_config(path: Union[Path, str]) -> Optional[ConfigDict]:
-    if toml_load is None:
+    if (toml_load := compat.toml_load) is None:
         log.debug('no toml parser found')
         raise ConfigError('no toml parser found')
     path = Path(path)
-    if not path.exists():
+    if not fs.exists(path):
         raise ConfigError(f'{path} does not exist')
-    if not path.is_file():
+    if not fs.is_file(path):
         raise ConfigError(f'{path} is not a file')
     log.debug('loading config: %s', path)
     with open(path, 'rb') as fo:
@@ -222,8 +300,8 @@ def load_config(path: Union[Path, str]) -> Optional[ConfigDict]:
 
 
 def find_config() -> Optional[Path]:
+    snapshot = fs.get_snapshot('.')
     for config_file in CONFIG_FILES:
-        path = Path(config_file)
-        if path.exists() and path.is_file():
-            return path.resolve()
+        if snapshot.is_file(config_file):
+            return fs.resolve(config_file)
     return None
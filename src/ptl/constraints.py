@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from ._error import Error
+from .infile import InFile
+from .utils import ensure_state_dir, iterate_lock_lines, write_atomically
+
+
+log = logging.getLogger(__name__)
+
+
+CONSTRAINTS_DIR = 'constraints'
+
+_HEADER_PREFIX = '# merged constraints '
+
+_PIN_REGEX = re.compile(
+    r'(?P<name>[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)'
+    r'(?:\s*\[[^\]]*\])?'
+    r'\s*==\s*(?P<version>[^\s;]+)'
+    r'(?:\s*;\s*(?P<marker>.+))?'
+)
+
+
+class ConstraintsError(Error):
+    pass
+
+
+def normalize_name(name: str) -> str:
+    # PEP 503
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def merge_constraints(lock_paths: Iterable[Path]) -> str:
+    # only `name==version` pins (with environment markers, if any) are kept,
+    # extras, hashes, comments and options are dropped; the same package
+    # pinned to different versions under the same marker is an error
+    pins: Dict[Tuple[str, str], Tuple[str, Path]] = {}
+    for lock_path in lock_paths:
+        try:
+            lines = list(iterate_lock_lines(lock_path))
+        except FileNotFoundError:
+            raise ConstraintsError(f'{lock_path.name} not found') from None
+        for line in lines:
+            if not (match := _PIN_REGEX.fullmatch(line)):
+                log.debug('%s: not a pin, skipping: %s', lock_path.name, line)
+                continue
+            name = normalize_name(match['name'])
+            marker = match['marker'] or ''
+            pin = f'{name}=={match["version"]}'
+            if marker:
+                pin = f'{pin} ; {marker}'
+            if (seen := pins.get((name, marker))) is None:
+                pins[(name, marker)] = (pin, lock_path)
+            elif seen[0] != pin:
+                raise ConstraintsError(
+                    f'conflicting pins: {seen[0]} ({seen[1].name}), '
+                    f'{pin} ({lock_path.name})'
+                )
+    return ''.join(f'{pin}\n' for pin, _ in sorted(pins.values()))
+
+
+def write_merged_constraints(infile: InFile, input_dir: Path) -> Path:
+    # merges locks of all infiles referenced by the infile into
+    # .ptl/constraints/<stem>.txt, which is rewritten only if any of them
+    # changed; the returned path is relative to the input directory
+    lock_paths = [
+        input_dir / ref.infile.output_name
+        for ref in infile.iterate_references(recursive=True)
+    ]
+    digest = hashlib.sha256()
+    for lock_path in lock_paths:
+        try:
+            lock = lock_path.read_bytes()
+        except FileNotFoundError:
+            raise ConstraintsError(f'{lock_path.name} not found') from None
+        for chunk in [lock_path.name.encode(), lock]:
+            digest.update(len(chunk).to_bytes(8, 'big'))
+            digest.update(chunk)
+    header = f'{_HEADER_PREFIX}{digest.hexdigest()}\n'
+    path = ensure_state_dir(input_dir) / CONSTRAINTS_DIR / infile.output_name
+    try:
+        with open(path) as fobj:
+            if fobj.readline() == header:
+                log.debug('%s: merged constraints are up to date', infile)
+                return path.relative_to(input_dir)
+    except FileNotFoundError:
+        pass
+    content = merge_constraints(lock_paths)
+    path.parent.mkdir(exist_ok=True)
+    write_atomically(path, f'{header}{content}'.encode())
+    return path.relative_to(input_dir)
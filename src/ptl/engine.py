@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from typing import Awaitable, Iterable, List, Optional, Sequence, TextIO, Union
+
+
+log = logging.getLogger(__name__)
+
+
+# the size of the stream reader buffer; when it's full, the reader stops
+# reading from the pipe, and the child blocks on write (backpressure)
+STREAM_LIMIT = 64 * 1024
+
+TERMINATE_TIMEOUT = 5.0
+
+
+async def check_call(
+    cmd: Sequence[Union[Path, str]], *, prefix: Optional[str] = None,
+    input: Optional[Iterable[bytes]] = None,
+) -> None:
+    # an asyncio counterpart of subprocess.check_call(); if `prefix` is None,
+    # the child inherits stdout and stderr, otherwise its output is streamed
+    # line by line with the `[prefix] ` prefix, so that the output of
+    # concurrently running tools is not interleaved mid-line; if `input` is
+    # not None, its chunks are written to the child's stdin as they are
+    # produced, otherwise the child inherits stdin
+    pipe: Optional[int] = None
+    if prefix is not None:
+        pipe = asyncio.subprocess.PIPE
+    stdin: Optional[int] = None
+    if input is not None:
+        stdin = asyncio.subprocess.PIPE
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdin=stdin, stdout=pipe, stderr=pipe, limit=STREAM_LIMIT)
+    try:
+        streams: List[Awaitable[None]] = []
+        if input is not None:
+            assert process.stdin is not None
+            streams.append(_feed(process.stdin, input))
+        if prefix is not None:
+            assert process.stdout is not None
+            assert process.stderr is not None
+            line_prefix = f'[{prefix}] '
+            streams.append(_forward(process.stdout, 'stdout', line_prefix))
+            streams.append(_forward(process.stderr, 'stderr', line_prefix))
+        if streams:
+            await asyncio.gather(*streams)
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        await _terminate(process)
+        raise
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, list(cmd))
+
+
+async def _feed(writer: asyncio.StreamWriter, input: Iterable[bytes]) -> None:
+    try:
+        for chunk in input:
+            writer.write(chunk)
+            await writer.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # the child exited without reading all the input, its exit code
+        # tells what happened
+        log.debug('stdin closed by the child')
+    finally:
+        writer.close()
+
+
+async def _forward(
+    reader: asyncio.StreamReader, stream_name: str, line_prefix: str,
+) -> None:
+    while True:
+        try:
+            line = await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as exc:
+            # EOF, the last line without a trailing newline, if any
+            line = exc.partial
+            if not line:
+                return
+        except asyncio.LimitOverrunError as exc:
+            # the line is too long, emit it in chunks
+            line = await reader.readexactly(exc.consumed)
+        text = line.decode(errors='replace')
+        if not text.endswith('\n'):
+            text = f'{text}\n'
+        # looked up on each write, since streams can be replaced
+        stream: TextIO = getattr(sys, stream_name)
+        stream.write(f'{line_prefix}{text}')
+        stream.flush()
+
+
+async def _terminate(process: 'asyncio.subprocess.Process') -> None:
+    if process.returncode is not None:
+        return
+    log.debug('terminating %s', process.pid)
+    try:
+        process.terminate()
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(process.wait(), TERMINATE_TIMEOUT)
+    except asyncio.TimeoutError:
+        log.debug('killing %s', process.pid)
+        try:
+            process.kill()
+        except ProcessLookupError:
+            return
+        await process.wait()
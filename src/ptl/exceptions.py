@@ -1,7 +1,9 @@
 from ._error import Error
-from .commands.compile import CompileError
-from .commands.sync import SyncError
+from .cache import CacheError
+from .commands import CheckError, CompileError, SyncError
 from .config import ConfigError
+from .constraints import ConstraintsError
+from .history import HistoryError
 from .infile import (
     CircularReference, InFileError, InFileNameError, InputDirectoryError,
     ReferenceError, UnknownReference,
@@ -28,4 +30,8 @@ __all__ = [
     'ToolVersionCheckFailed',
     'CompileError',
     'SyncError',
+    'CheckError',
+    'CacheError',
+    'ConstraintsError',
+    'HistoryError',
 ]
@@ -0,0 +1,119 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Union
+
+
+class DirectorySnapshot:
+    # names of directory entries taken with a single os.scandir() call; entry
+    # types come from the directory listing itself on most file systems, so
+    # lookups don't need stat() calls
+    path: Path
+    exists: bool
+    _files: Set[str]
+    _dirs: Set[str]
+
+    def __init__(self, path: Union[Path, str]) -> None:
+        self.path = Path(path)
+        self._files = set()
+        self._dirs = set()
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            self._files.add(entry.name)
+                        elif entry.is_dir():
+                            self._dirs.add(entry.name)
+                    except OSError:
+                        # e.g., a broken symlink
+                        continue
+        except (FileNotFoundError, NotADirectoryError):
+            self.exists = False
+        else:
+            self.exists = True
+
+    def is_file(self, name: str) -> bool:
+        return name in self._files
+
+    def is_dir(self, name: str) -> bool:
+        return name in self._dirs
+
+    def has(self, name: str) -> bool:
+        return name in self._files or name in self._dirs
+
+    def get_file_names(self, suffix: str = '') -> List[str]:
+        return sorted(name for name in self._files if name.endswith(suffix))
+
+
+# names that are never listed by os.scandir(), e.g., Path('.').name == ''
+_SPECIAL_NAMES = ('', '.', '..')
+
+
+_snapshots: ContextVar[Optional[Dict[str, DirectorySnapshot]]] = ContextVar(
+    '_snapshots', default=None)
+_resolved: ContextVar[Optional[Dict[str, Path]]] = ContextVar(
+    '_resolved', default=None)
+
+
+@contextmanager
+def snapshot_scope() -> Iterator[None]:
+    # within the scope, each directory is scanned (and each path is
+    # resolved) only once; outside of any scope, nothing is cached and
+    # single paths are checked with stat() instead of scanning directories;
+    # commands open their own scopes
+    snapshots_token = _snapshots.set({})
+    resolved_token = _resolved.set({})
+    try:
+        yield
+    finally:
+        _snapshots.reset(snapshots_token)
+        _resolved.reset(resolved_token)
+
+
+def get_snapshot(directory: Union[Path, str]) -> DirectorySnapshot:
+    snapshots = _snapshots.get()
+    if snapshots is None:
+        return DirectorySnapshot(directory)
+    key = os.path.abspath(directory)
+    if (snapshot := snapshots.get(key)) is None:
+        snapshot = snapshots[key] = DirectorySnapshot(directory)
+    return snapshot
+
+
+def invalidate_snapshot(directory: Union[Path, str]) -> None:
+    # must be called after the directory content is changed within the scope
+    if (snapshots := _snapshots.get()) is not None:
+        snapshots.pop(os.path.abspath(directory), None)
+
+
+def is_file(path: Union[Path, str]) -> bool:
+    path = Path(path)
+    if _snapshots.get() is None:
+        return path.is_file()
+    return get_snapshot(path.parent).is_file(path.name)
+
+
+def is_dir(path: Union[Path, str]) -> bool:
+    path = Path(path)
+    if _snapshots.get() is None or path.name in _SPECIAL_NAMES:
+        return path.is_dir()
+    return get_snapshot(path.parent).is_dir(path.name)
+
+
+def exists(path: Union[Path, str]) -> bool:
+    path = Path(path)
+    if _snapshots.get() is None or path.name in _SPECIAL_NAMES:
+        return path.exists()
+    return get_snapshot(path.parent).has(path.name)
+
+
+def resolve(path: Union[Path, str]) -> Path:
+    resolved = _resolved.get()
+    if resolved is None:
+        return Path(path).resolve()
+    key = os.path.abspath(path)
+    if (result := resolved.get(key)) is None:
+        result = resolved[key] = Path(path).resolve()
+    return result
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, TypedDict, Union, cast
+
+from . import __version__
+from .utils import ensure_state_dir, get_state_dir, write_atomically
+
+
+log = logging.getLogger(__name__)
+
+
+GRAPH_FILE = 'graph.json'
+GRAPH_VERSION = 2
+
+# files modified less than this many nanoseconds before they are parsed
+# are not indexed: a change made within the same mtime tick would go
+# unnoticed otherwise (the same as "racily clean" entries of git index)
+_RACY_WINDOW = 2_000_000_000
+
+
+# (token type, value) pairs, see tokenize_infile()
+Tokens = List[Tuple[str, str]]
+
+
+class IndexEntry(TypedDict):
+    mtime: int
+    size: int
+    inode: int
+    tokens: Tokens
+
+
+class GraphDict(TypedDict):
+    version: int
+    ptl_version: str
+    infiles: Dict[str, IndexEntry]
+
+
+class GraphIndex:
+    # tokens of infiles keyed by their names,
+    # an entry is valid as long as mtime, size and inode of the file match
+    input_dir: Path
+    path: Path
+    _entries: Dict[str, IndexEntry]
+    _seen: Set[str]
+
+    def __init__(self, input_dir: Union[Path, str]) -> None:
+        self.input_dir = Path(input_dir)
+        self.path = get_state_dir(input_dir) / GRAPH_FILE
+        self._entries = self._load()
+        self._seen = set()
+        self._changed = False
+
+    def _load(self) -> Dict[str, IndexEntry]:
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return {}
+        except OSError as exc:
+            log.debug('%s: failed to read index: %s', self.path, exc)
+            return {}
+        try:
+            graph = cast(GraphDict, json.loads(data))
+            if (
+                graph['version'] != GRAPH_VERSION
+                or graph['ptl_version'] != __version__
+            ):
+                log.debug('%s: outdated index, ignoring', self.path)
+                return {}
+            return dict(graph['infiles'])
+        except (ValueError, TypeError, KeyError) as exc:
+            log.debug('%s: malformed index, ignoring: %s', self.path, exc)
+            return {}
+
+    def get(
+        self, name: str, stat: os.stat_result,
+    ) -> Optional[Tokens]:
+        self._seen.add(name)
+        entry = self._entries.get(name)
+        if entry is None or (
+            entry['mtime'] != stat.st_mtime_ns
+            or entry['size'] != stat.st_size
+            or entry['inode'] != stat.st_ino
+        ):
+            return None
+        return [(type_, value) for type_, value in entry['tokens']]
+
+    def set(
+        self, name: str, stat: os.stat_result, tokens: Tokens,
+    ) -> None:
+        self._seen.add(name)
+        self._changed = True
+        if time.time_ns() - stat.st_mtime_ns < _RACY_WINDOW:
+            self._entries.pop(name, None)
+            return
+        self._entries[name] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'inode': stat.st_ino,
+            'tokens': list(tokens),
+        }
+
+    def save(self, *, prune: bool = True) -> None:
+        # with `prune`, entries of files not seen since loading (i.e.,
+        # removed) are dropped, it's only correct if all infiles were seen;
+        # the index is a cache, failing to write it is not an error
+        if prune and (stale := self._entries.keys() - self._seen):
+            self._changed = True
+            for name in stale:
+                del self._entries[name]
+        if not self._changed:
+            return
+        self._changed = False
+        graph: GraphDict = {
+            'version': GRAPH_VERSION,
+            'ptl_version': __version__,
+            'infiles': dict(sorted(self._entries.items())),
+        }
+        try:
+            ensure_state_dir(self.input_dir)
+            write_atomically(self.path, json.dumps(graph).encode())
+        except OSError as exc:
+            log.debug('%s: failed to write index: %s', self.path, exc)
@@ -0,0 +1,276 @@
+import dataclasses
+import hashlib
+import logging
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, TypedDict,
+    Union,
+)
+
+from ._error import Error
+from .utils import ensure_state_dir, get_state_dir
+
+
+try:
+    import resource
+except ImportError:   # pragma: no cover
+    # not available on Windows
+    HAS_RESOURCE = False
+else:
+    HAS_RESOURCE = True
+
+
+log = logging.getLogger(__name__)
+
+
+HISTORY_FILE = 'history.db'
+# the oldest rows are deleted when the history grows over this limit
+HISTORY_MAX_ROWS = 10_000
+
+
+class HistoryError(Error):
+    pass
+
+
+class CacheStatus:
+    HIT = 'hit'
+    MISS = 'miss'
+
+
+@dataclasses.dataclass(frozen=True)
+class Run:
+    command: str
+    layer: str
+    tool: str
+    options_hash: str
+    wall_time: float
+    user_time: Optional[float] = None
+    system_time: Optional[float] = None
+    max_rss: Optional[int] = None
+    exit_code: int = 0
+    lock_changed: Optional[bool] = None
+    cache: Optional[str] = None
+    started_at: float = dataclasses.field(default_factory=time.time)
+
+
+def get_tool_info(
+    command_line: Sequence[Union[Path, str]],
+) -> Tuple[str, str]:
+    # the tool name and the short hash of its options
+    executable, *options = map(str, command_line)
+    options_hash = hashlib.sha256('\0'.join(options).encode()).hexdigest()
+    return Path(executable).name, options_hash[:12]
+
+
+Usage = Tuple[Optional[float], Optional[float], Optional[int]]
+
+
+class UsageTracker:
+    # getrusage(RUSAGE_CHILDREN) only reports the totals over all waited-for
+    # children, so the usage of a process is the difference between the
+    # totals taken right before it is started (or the previous process
+    # finished) and right after it finished; when several processes run
+    # concurrently, the usage of processes finished at about the same time
+    # may be attributed to one of them; peak RSS is only known if the process
+    # raised the high-water mark of all children, otherwise it's None
+    _last: Optional['resource.struct_rusage']
+
+    def __init__(self) -> None:
+        self._last = self._get_usage()
+
+    def get_delta(self) -> Usage:
+        last, current = self._last, self._get_usage()
+        self._last = current
+        if last is None or current is None:
+            return None, None, None
+        max_rss: Optional[int] = None
+        if current.ru_maxrss > last.ru_maxrss:
+            max_rss = current.ru_maxrss
+            if sys.platform == 'darwin':
+                # bytes on macOS, kilobytes elsewhere
+                max_rss //= 1024
+        return (
+            current.ru_utime - last.ru_utime,
+            current.ru_stime - last.ru_stime,
+            max_rss,
+        )
+
+    def _get_usage(self) -> Optional['resource.struct_rusage']:
+        if not HAS_RESOURCE:   # pragma: no cover
+            return None
+        return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    command TEXT NOT NULL,
+    layer TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    options_hash TEXT NOT NULL,
+    wall_time REAL NOT NULL,
+    user_time REAL,
+    system_time REAL,
+    max_rss INTEGER,
+    exit_code INTEGER NOT NULL,
+    lock_changed INTEGER,
+    cache TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_layer ON runs (layer, started_at);
+"""
+
+_FIELDS = [field.name for field in dataclasses.fields(Run)]
+
+
+class LayerStats(TypedDict):
+    layer: str
+    runs: int
+    failures: int
+    avg_wall_time: float
+    last_wall_time: float
+    prev_avg_wall_time: Optional[float]
+    avg_cpu_time: Optional[float]
+    max_rss: Optional[int]
+
+
+class History:
+    path: Path
+    _connection: Optional[sqlite3.Connection]
+
+    def __init__(self, input_dir: Union[Path, str]) -> None:
+        self.input_dir = Path(input_dir)
+        self.path = get_state_dir(input_dir) / HISTORY_FILE
+        self._connection = None
+
+    def __enter__(self) -> 'History':
+        return self
+
+    def __exit__(
+        self, exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def record(self, run: Run) -> None:
+        # the history is informational, it must never fail the command
+        try:
+            connection = self._connect(create=True)
+            assert connection is not None
+            with connection:
+                connection.execute(
+                    f'INSERT INTO runs ({", ".join(_FIELDS)}) '
+                    f'VALUES ({", ".join("?" * len(_FIELDS))})',
+                    dataclasses.astuple(run),
+                )
+                connection.execute(
+                    'DELETE FROM runs WHERE id <= '
+                    '(SELECT max(id) FROM runs) - ?',
+                    (HISTORY_MAX_ROWS,),
+                )
+        except (OSError, sqlite3.Error) as exc:
+            log.warning('%s: failed to record history: %s', self.path, exc)
+
+    def iterate_runs(self, command: Optional[str] = None) -> Iterator[Run]:
+        query = f'SELECT {", ".join(_FIELDS)} FROM runs'
+        params: Tuple[str, ...] = ()
+        if command is not None:
+            query = f'{query} WHERE command = ?'
+            params = (command,)
+        try:
+            connection = self._connect(create=False)
+            if connection is None:
+                return
+            rows = connection.execute(f'{query} ORDER BY id', params)
+            for row in rows:
+                run = Run(*row)
+                if run.lock_changed is not None:
+                    run = dataclasses.replace(
+                        run, lock_changed=bool(run.lock_changed))
+                yield run
+        except (OSError, sqlite3.Error) as exc:
+            raise HistoryError(
+                f'{self.path}: failed to read history: {exc}') from exc
+
+    def get_layer_stats(
+        self, command: str = 'compile', *, trend_window: int = 5,
+    ) -> List[LayerStats]:
+        # layers sorted by the average wall time of successful tool runs
+        # (cache hits excluded), slowest first; the trend compares the last
+        # `trend_window` runs against the preceding ones
+        runs_by_layer: Dict[str, List[Run]] = {}
+        for run in self.iterate_runs(command):
+            runs_by_layer.setdefault(run.layer, []).append(run)
+        stats: List[LayerStats] = []
+        for layer, runs in runs_by_layer.items():
+            tool_runs = [
+                run for run in runs
+                if run.exit_code == 0 and run.cache != CacheStatus.HIT
+            ]
+            if not tool_runs:
+                continue
+            recent = tool_runs[-trend_window:]
+            previous = tool_runs[:-trend_window][-trend_window:]
+            cpu_times = [
+                run.user_time + run.system_time for run in tool_runs
+                if run.user_time is not None and run.system_time is not None
+            ]
+            rss_values = [
+                run.max_rss for run in tool_runs if run.max_rss is not None]
+            stats.append({
+                'layer': layer,
+                'runs': len(runs),
+                'failures': sum(1 for run in runs if run.exit_code != 0),
+                'avg_wall_time': _mean(run.wall_time for run in recent),
+                'last_wall_time': tool_runs[-1].wall_time,
+                'prev_avg_wall_time': (
+                    _mean(run.wall_time for run in previous)
+                    if previous else None
+                ),
+                'avg_cpu_time': _mean(cpu_times) if cpu_times else None,
+                'max_rss': max(rss_values) if rss_values else None,
+            })
+        stats.sort(key=lambda item: item['avg_wall_time'], reverse=True)
+        return stats
+
+    def get_cache_hit_rate(self) -> Optional[float]:
+        hits = misses = 0
+        for run in self.iterate_runs('compile'):
+            if run.cache == CacheStatus.HIT:
+                hits += 1
+            elif run.cache == CacheStatus.MISS:
+                misses += 1
+        if not hits + misses:
+            return None
+        return hits / (hits + misses)
+
+    def _connect(self, *, create: bool) -> Optional[sqlite3.Connection]:
+        if self._connection is None:
+            if not create and not self.path.exists():
+                return None
+            if create:
+                ensure_state_dir(self.input_dir)
+            connection = sqlite3.connect(self.path, timeout=5)
+            try:
+                # fails if the file is not an sqlite database
+                connection.executescript(_SCHEMA)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._connection = connection
+        return self._connection
+
+
+def _mean(values: Iterable[float]) -> float:
+    items = list(values)
+    return sum(items) / len(items)
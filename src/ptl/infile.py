@@ -1,16 +1,21 @@
 import logging
-import operator
+import os
 import re
+from array import array
+from collections import deque
 from contextlib import contextmanager
 from pathlib import Path
 from typing import (
-    Any, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Set,
-    Tuple, Union, cast,
+    Any, ClassVar, Collection, Dict, FrozenSet, Iterable, Iterator, List,
+    Literal, Optional, Sequence, Set, Tuple, Union, cast,
 )
 
+from . import fs
 from ._error import Error
 from .compat import StrEnum
+from .graph import GraphIndex, Tokens
 from .layer import LAYER_NAME_REGEX, Layer
+from .utils import is_path, iterate_lock_lines
 
 
 log = logging.getLogger(__name__)
@@ -38,11 +43,18 @@ class UnknownReference(ReferenceError):
 
 class CircularReference(ReferenceError):
 
-    def __init__(self, infiles: Iterable['InFile']) -> None:
-        self.infiles = tuple(infiles)
+    def __init__(self, *cycles: Iterable['InFile']) -> None:
+        # each cycle is a path: every infile references the next one, the
+        # last one references the first one
+        self.cycles = tuple(tuple(cycle) for cycle in cycles)
+        self.infiles = tuple(
+            infile for cycle in self.cycles for infile in cycle)
 
     def __str__(self) -> str:
-        return ', '.join(map(str, self.infiles))
+        return '; '.join(
+            ' -> '.join(map(str, (*cycle, cycle[0])))
+            for cycle in self.cycles
+        )
 
 
 ReferenceTypeOrLiteral = Union['ReferenceType', Literal['r', 'c']]
@@ -59,17 +71,40 @@ class ReferenceType(StrEnum):
         return cls(value)
 
 
+class TokenType(StrEnum):
+    # reference types are the same as ReferenceType values
+    REQUIREMENTS = 'r'
+    CONSTRAINTS = 'c'
+    OPTION = 'o'
+    DEPENDENCY = 'd'
+
+
+_REFERENCE_TOKEN_TYPES = (TokenType.REQUIREMENTS, TokenType.CONSTRAINTS)
+
+
 class Reference:
+    # references are interned per (type, infile) pair, so that copy_as() and
+    # iterating over references with another type don't allocate anything;
+    # thus, references must never be mutated
+    __slots__ = ('type', 'infile', '_hash')
+
     type: ReferenceType
     infile: 'InFile'
+    _hash: int
 
-    def __init__(
-        self, type: ReferenceTypeOrLiteral, infile: 'InFile',
-    ) -> None:
+    def __new__(
+        cls, type: ReferenceTypeOrLiteral, infile: 'InFile',
+    ) -> 'Reference':
         type = ReferenceType.cast(type)
-        self.type = type
-        self.infile = infile
-        self._tuple = (type, infile)
+        interned = infile._interned_references
+        reference = interned.get(type)
+        if reference is None or reference.__class__ is not cls:
+            reference = super().__new__(cls)
+            reference.type = type
+            reference.infile = infile
+            reference._hash = hash((type, infile))
+            interned[type] = reference
+        return reference
 
     def __str__(self) -> str:
         return f'-{self.type} {self.infile.output_name}'
@@ -80,10 +115,12 @@ class Reference:
     def __eq__(self, other: Any) -> bool:   # type: ignore[misc]
         if not isinstance(other, self.__class__):
             return NotImplemented
-        return self._tuple == other._tuple
+        if self is other:
+            return True
+        return self.type == other.type and self.infile == other.infile
 
     def __hash__(self) -> int:
-        return hash(self._tuple)
+        return self._hash
 
     def copy_as(self, type: ReferenceTypeOrLiteral) -> 'Reference':
         type = ReferenceType.cast(type)
@@ -91,6 +128,12 @@ class Reference:
 
 
 class InFile:
+    __slots__ = (
+        'original_name', 'generated_name', 'output_name', 'stem',
+        'references', 'dependencies', '_closure', '_closure_version',
+        '_interned_references',
+    )
+
     original_name: str
     generated_name: str
     output_name: str
@@ -98,6 +141,13 @@ class InFile:
     references: List[Reference]
     dependencies: List[str]
 
+    # bumped on any change of references of any infile, since the closure of
+    # an infile depends on references of all infiles it references
+    _references_version: ClassVar[int] = 0
+    _closure: Optional[Tuple[Reference, ...]]
+    _closure_version: int
+    _interned_references: Dict[ReferenceType, Reference]
+
     def __init__(self, name_or_path: Union[Path, str]) -> None:
         name = Path(name_or_path).name
         self.original_name = name
@@ -112,6 +162,9 @@ class InFile:
         self.output_name = f'{stem}{suffix}.txt'
         self.references = []
         self.dependencies = []
+        self._closure = None
+        self._closure_version = -1
+        self._interned_references = {}
 
     def __str__(self) -> str:
         return self.original_name
@@ -127,30 +180,90 @@ class InFile:
     def __hash__(self) -> int:
         return hash(self.original_name)
 
+    def clear(self) -> None:
+        self.references = []
+        self.dependencies = []
+        InFile._references_version += 1
+
     def add_reference(self, reference: Reference) -> None:
         self.references.append(reference)
+        InFile._references_version += 1
 
     def iterate_references(
         self, *, recursive: bool,
         as_: Optional[ReferenceTypeOrLiteral] = None,
     ) -> Iterator[Reference]:
+        # with `recursive`, each infile referenced directly or transitively is
+        # yielded once, see get_closure()
         if as_:
             as_ = ReferenceType.cast(as_)
-        for ref in self.references:
+        references = self.get_closure() if recursive else self.references
+        for ref in references:
             if as_:
                 yield ref.copy_as(as_)
             else:
                 yield ref
-            if recursive:
-                recursive_as: Optional[ReferenceType]
-                if as_:
-                    recursive_as = as_
-                elif ref.type == ReferenceType.CONSTRAINTS:
-                    recursive_as = ReferenceType.CONSTRAINTS
-                else:
-                    recursive_as = None
-                yield from ref.infile.iterate_references(
-                    recursive=True, as_=recursive_as)
+
+    def get_closure(self) -> Tuple[Reference, ...]:
+        # all infiles referenced directly or transitively, in the order of
+        # the first occurrence in the depth-first traversal; the effective
+        # type is requirements if an infile is reachable via requirements
+        # references only, constraints otherwise; closures are memoized and
+        # computed bottom-up without recursion, so that deep graphs are fine
+        version = InFile._references_version
+        if self._closure_version == version:
+            assert self._closure is not None
+            return self._closure
+        visiting: Set[InFile] = {self}
+        stack: List[Tuple[InFile, Iterator[Reference]]] = [
+            (self, iter(self.references))]
+        while stack:
+            infile, refs = stack[-1]
+            for ref in refs:
+                ref_infile = ref.infile
+                if ref_infile._closure_version == version:
+                    continue
+                if ref_infile in visiting:
+                    stack_infiles = [item[0] for item in stack]
+                    position = stack_infiles.index(ref_infile)
+                    raise CircularReference(stack_infiles[position:])
+                visiting.add(ref_infile)
+                stack.append((ref_infile, iter(ref_infile.references)))
+                break
+            else:
+                stack.pop()
+                visiting.discard(infile)
+                infile._closure = infile._build_closure()
+                infile._closure_version = version
+        assert self._closure is not None
+        return self._closure
+
+    def _build_closure(self) -> Tuple[Reference, ...]:
+        # closures of referenced infiles are already computed; references
+        # are keyed by names rather than infiles, since str hashes are cached
+        # and infiles are equal if their names are equal
+        refs: Dict[str, Reference] = {}
+        requirements = ReferenceType.REQUIREMENTS
+        constraints = ReferenceType.CONSTRAINTS
+        for ref in self.references:
+            assert ref.infile._closure is not None
+            as_constraints = ref.type is constraints
+            for nested_ref in (ref, *ref.infile._closure):
+                name = nested_ref.infile.original_name
+                # the position of the first occurrence is kept, the type is
+                # only upgraded from constraints to requirements
+                existing = refs.get(name)
+                if as_constraints:
+                    if existing is None:
+                        if nested_ref.type is not constraints:
+                            nested_ref = nested_ref.copy_as(constraints)
+                        refs[name] = nested_ref
+                elif existing is None or (
+                    existing.type is constraints
+                    and nested_ref.type is requirements
+                ):
+                    refs[name] = nested_ref
+        return tuple(refs.values())
 
     def add_dependency(self, dependency: str) -> None:
         self.dependencies.append(dependency.strip())
@@ -158,102 +271,478 @@ class InFile:
     def render(
         self, *, references_as: Optional[ReferenceTypeOrLiteral] = None,
     ) -> str:
-        return ''.join(self._line_iter(references_as=references_as))
+        return ''.join(self.iterate_lines(references_as=references_as))
 
     def write_to(
         self, directory: Union[Path, str],
         *, references_as: Optional[ReferenceTypeOrLiteral] = None,
+        lines: Optional[Iterable[str]] = None,
     ) -> Path:
+        # `lines` are written instead of rendered ones, if passed
+        if lines is None:
+            lines = self.iterate_lines(references_as=references_as)
         path = Path(directory) / self.generated_name
         with open(path, 'wt') as fobj:
-            fobj.writelines(self._line_iter(references_as=references_as))
+            fobj.writelines(lines)
         return path
 
     @contextmanager
     def temporarily_write_to(
         self, directory: Union[Path, str],
         *, references_as: Optional[ReferenceTypeOrLiteral] = None,
+        lines: Optional[Iterable[str]] = None,
     ) -> Iterator[Path]:
         path: Optional[Path] = None
         try:
             yield (path := self.write_to(
-                directory, references_as=references_as))
+                directory, references_as=references_as, lines=lines))
         finally:
             if path is not None:
                 path.unlink()
 
-    def _line_iter(
+    def iterate_lines(
         self, *, references_as: Optional[ReferenceTypeOrLiteral] = None,
+        references_dir: Optional[Union[Path, str]] = None,
+        exclude: Collection['InFile'] = (),
+        constraints: Optional[Union[Path, str]] = None,
     ) -> Iterator[str]:
+        # referenced locks are relative to the directory of the file the
+        # lines are written to, unless `references_dir` is passed, e.g., the
+        # tool reading the lines from stdin resolves them against its cwd;
+        # referenced infiles in `exclude` are left out; `constraints` is
+        # a path of an extra constraints file relative to the same directory
+        if references_dir is not None:
+            references_dir = Path(references_dir)
+        if constraints is not None:
+            if references_dir is not None:
+                constraints = references_dir / constraints
+            yield f'-{ReferenceType.CONSTRAINTS} {constraints}\n'
         references = self.iterate_references(recursive=True)
         if references_as:
             references = (ref.copy_as(references_as) for ref in references)
         for reference in references:
-            yield f'{reference}\n'
+            if reference.infile in exclude:
+                continue
+            if references_dir is None:
+                yield f'{reference}\n'
+            else:
+                lock_path = references_dir / reference.infile.output_name
+                yield f'-{reference.type} {lock_path}\n'
         for dependency in self.dependencies:
             yield f'{dependency}\n'
 
 
 _INLINE_COMMENT_REGEX = re.compile(r'\s+#')
-_REFERENCE_REGEX = re.compile(
-    fr'^-(?P<type>[rc])\s*{LAYER_NAME_REGEX.pattern}$')
+_GENERATED_NAME_REGEX = re.compile(r'.+\.ptl(?:\.requirements)?\.in')
+_REFERENCE_OPTION_REGEX = re.compile(
+    r'(?:-(?P<short>[rc])\s*'
+    r'|--(?P<long>requirement|constraint)(?:\s*=\s*|\s+))'
+    r'(?P<target>\S+)'
+)
+_PATH_OPTION_REGEX = re.compile(
+    r'(?:-[rcef]\s*'
+    r'|--(?:requirement|constraint|editable|find-links)(?:\s*=\s*|\s+))'
+    r'(?P<path>\S+)'
+)
+_ARCHIVE_SUFFIXES = ('.whl', '.zip', '.tar.gz', '.tgz', '.tar.bz2')
 
 
-def read_infiles(input_dir: Union[Path, str]) -> Tuple[InFile, ...]:
+def read_infiles(
+    input_dir: Union[Path, str], *, use_index: bool = True,
+) -> Tuple[InFile, ...]:
+    # unless `use_index` is false, only files changed since the last call
+    # are parsed, the rest is taken from the graph index
     input_dir = Path(input_dir)
     stems_to_infiles: Dict[str, InFile] = {}
-    for input_path in tuple(input_dir.glob('*.in')):
-        infile = InFile(input_path)
+    for name in fs.get_snapshot(input_dir).get_file_names('.in'):
+        infile = InFile(name)
         stem = infile.stem
         if another_infile := stems_to_infiles.get(stem):
             raise InputDirectoryError(
                 f'conflicting names: {infile}, {another_infile}')
         stems_to_infiles[stem] = infile
+    index = GraphIndex(input_dir) if use_index else None
     for infile in stems_to_infiles.values():
-        with open(input_dir / infile.original_name) as fobj:
-            for line in fobj:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if comment_match := _INLINE_COMMENT_REGEX.search(line):
-                    line = line[:comment_match.start()]
-                ref_match = _REFERENCE_REGEX.fullmatch(line)
-                if not ref_match:
-                    infile.add_dependency(line)
-                    continue
-                ref_type = cast(Literal['r', 'c'], ref_match.group('type'))
-                ref_stem: str = ref_match.group('stem')
-                try:
-                    ref_infile = stems_to_infiles[ref_stem]
-                except KeyError:
-                    raise UnknownReference(f'{infile}: {ref_stem}')
-                ref = Reference(ref_type, ref_infile)
-                infile.add_reference(ref)
+        tokens = _read_infile(infile, input_dir, index)
+        _populate_infile(infile, tokens, stems_to_infiles)
+    if index is not None:
+        index.save()
     return tuple(stems_to_infiles.values())
 
 
+def load_infiles(
+    input_dir: Union[Path, str], layers: Iterable[Layer], *,
+    use_index: bool = True,
+) -> Tuple[InFile, ...]:
+    # unlike read_infiles(), reads only input files of the layers and input
+    # files they reference (directly or transitively), the directory is not
+    # scanned, so name conflicts are only detected for these files
+    input_dir = Path(input_dir)
+    index = GraphIndex(input_dir) if use_index else None
+    stems_to_infiles: Dict[str, InFile] = {}
+    tokenized_infiles: Dict[InFile, Tokens] = {}
+    stack: List[Tuple[str, Optional[InFile]]] = [
+        (layer.stem, None) for layer in reversed(list(layers))]
+    while stack:
+        stem, referrer = stack.pop()
+        if stem in stems_to_infiles:
+            continue
+        infile = _find_infile(input_dir, stem, referrer)
+        stems_to_infiles[stem] = infile
+        tokens = tokenized_infiles[infile] = _read_infile(
+            infile, input_dir, index)
+        stack.extend(
+            (value, infile) for type_, value in reversed(tokens)
+            if type_ in _REFERENCE_TOKEN_TYPES
+        )
+    for infile, tokens in tokenized_infiles.items():
+        _populate_infile(infile, tokens, stems_to_infiles)
+    if index is not None:
+        index.save(prune=False)
+    return tuple(stems_to_infiles.values())
+
+
+def _find_infile(
+    input_dir: Path, stem: str, referrer: Optional[InFile],
+) -> InFile:
+    snapshot = fs.get_snapshot(input_dir)
+    names = [
+        name for name in [f'{stem}.in', f'{stem}.requirements.in']
+        if snapshot.is_file(name)
+    ]
+    if len(names) > 1:
+        raise InputDirectoryError(f'conflicting names: {", ".join(names)}')
+    if not names:
+        if referrer is not None:
+            raise UnknownReference(f'{referrer}: {stem}')
+        raise InputDirectoryError(f'{stem}: input file not found')
+    return InFile(names[0])
+
+
+def _read_infile(
+    infile: InFile, input_dir: Path, index: Optional[GraphIndex],
+) -> Tokens:
+    input_path = input_dir / infile.original_name
+    if index is None:
+        return _parse_file(input_path)
+    stat = input_path.stat()
+    if (tokens := index.get(infile.original_name, stat)) is None:
+        log.debug('%s: parsing', infile)
+        tokens = _parse_file(input_path)
+        index.set(infile.original_name, stat, tokens)
+    return tokens
+
+
+def parse_infile(
+    infile: InFile, input_dir: Union[Path, str],
+    stems_to_infiles: Dict[str, InFile],
+) -> None:
+    # (re)populates references and dependencies of the infile in place, so
+    # that the rest of the graph is reused when a single file is changed
+    tokens = _parse_file(Path(input_dir) / infile.original_name)
+    _populate_infile(infile, tokens, stems_to_infiles)
+
+
+def _parse_file(path: Path) -> Tokens:
+    with open(path) as fobj:
+        return tokenize_infile(fobj.read())
+
+
+def tokenize_infile(text: str) -> Tokens:
+    # a single pass over the lines of the text: lines ending with
+    # a backslash are joined with the next one (unless it's a comment line,
+    # the same as pip does), comments are stripped, references to other
+    # infiles become (r|c, stem) tokens, other option lines and requirement
+    # lines are kept as is
+    tokens: Tokens = []
+    continued = ''
+    # the empty line flushes a continuation at the end of the text
+    for line in [*text.splitlines(), '']:
+        line = line.strip()
+        if line.endswith('\\') and not line.startswith('#'):
+            continued = f'{continued}{line[:-1]}'
+            continue
+        if continued:
+            line, continued = f'{continued}{line}'.rstrip(), ''
+        if not line or line[0] == '#':
+            continue
+        if '#' in line and (
+            comment_match := _INLINE_COMMENT_REGEX.search(line)
+        ):
+            line = line[:comment_match.start()]
+        if line[0] != '-':
+            tokens.append((TokenType.DEPENDENCY, line))
+        elif reference := _parse_reference_option(line):
+            tokens.append(reference)
+        else:
+            tokens.append((TokenType.OPTION, line))
+    return tokens
+
+
+def _parse_reference_option(line: str) -> Optional[Tuple[str, str]]:
+    if not (option_match := _REFERENCE_OPTION_REGEX.fullmatch(line)):
+        return None
+    ref_type = option_match['short'] or option_match['long'][0]
+    target = option_match['target']
+    if is_path(target):
+        # only files in the same directory are infiles, e.g., ./base.in,
+        # references to other files are passed to the tool as is
+        path = Path(target)
+        if path.parent != Path('.'):
+            return None
+        target = path.name
+    if not (name_match := LAYER_NAME_REGEX.fullmatch(target)):
+        return None
+    return ref_type, name_match['stem']
+
+
+def _populate_infile(
+    infile: InFile, tokens: Tokens, stems_to_infiles: Dict[str, InFile],
+) -> None:
+    infile.clear()
+    for type_, value in tokens:
+        if type_ not in _REFERENCE_TOKEN_TYPES:
+            continue
+        try:
+            ref_infile = stems_to_infiles[value]
+        except KeyError:
+            raise UnknownReference(f'{infile}: {value}')
+        ref = Reference(cast(Literal['r', 'c'], type_), ref_infile)
+        infile.add_reference(ref)
+    # option lines are passed to the tool along with requirements; token
+    # values are stripped already, thus add_dependency() is not needed
+    infile.dependencies.extend(
+        value for type_, value in tokens
+        if type_ not in _REFERENCE_TOKEN_TYPES
+    )
+
+
 def sort_infiles(infiles: Iterable[InFile]) -> List[InFile]:
-    sorted_infiles: List[InFile] = []
-    _infiles = set(infiles)
-    _infiles_with_refs: Dict[InFile, List[Reference]] = {
-        infile: [ref for ref in infile.references if ref.infile in _infiles]
-        for infile in _infiles
-    }
-    while True:
-        _processed = {
-            infile for infile, refs in _infiles_with_refs.items() if not refs}
-        if not _processed:
-            break
-        sorted_infiles.extend(
-            sorted(_processed, key=operator.attrgetter('stem')))
-        _infiles_with_refs = {
-            infile: [ref for ref in refs if ref.infile not in _processed]
-            for infile, refs in _infiles_with_refs.items()
-            if infile not in _processed
-        }
-    if _infiles_with_refs:
-        raise CircularReference(_infiles_with_refs)
-    return sorted_infiles
+    return [infile for level in iterate_levels(infiles) for infile in level]
+
+
+def iterate_levels(infiles: Iterable[InFile]) -> Iterator[List[InFile]]:
+    # Kahn's algorithm: each level consists of infiles referencing (directly)
+    # only infiles of previous levels, that is, infiles of the same level
+    # can be processed in parallel; infiles within a level are sorted by stem
+    nodes, adjacency = _index_infiles(infiles)
+    in_degrees = array('l', map(len, adjacency))
+    dependents: List[List[int]] = [[] for _ in nodes]
+    for node, referenced in enumerate(adjacency):
+        for ref_node in referenced:
+            dependents[ref_node].append(node)
+    stems = [infile.stem for infile in nodes]
+    remaining = len(nodes)
+    level = [node for node, degree in enumerate(in_degrees) if not degree]
+    while level:
+        level.sort(key=stems.__getitem__)
+        next_level: List[int] = []
+        for node in level:
+            for dependent in dependents[node]:
+                in_degrees[dependent] -= 1
+                if not in_degrees[dependent]:
+                    next_level.append(dependent)
+        remaining -= len(level)
+        yield [nodes[node] for node in level]
+        level = next_level
+    if remaining:
+        # the rest are infiles on cycles and infiles referencing them
+        raise CircularReference(*find_cycles(
+            nodes[node] for node, degree in enumerate(in_degrees) if degree))
+
+
+def _index_infiles(
+    infiles: Iterable[InFile],
+) -> Tuple[List[InFile], List[List[int]]]:
+    # integer ids of infiles (positions in the returned list) and adjacency
+    # lists of direct references between them, so that graph algorithms
+    # work on ints and lists instead of hashing infiles over and over again
+    nodes = list(dict.fromkeys(infiles))
+    ids = {infile: node for node, infile in enumerate(nodes)}
+    adjacency = [
+        [
+            ref_node for ref in infile.references
+            if (ref_node := ids.get(ref.infile)) is not None
+        ]
+        for infile in nodes
+    ]
+    return nodes, adjacency
+
+
+def find_cycles(infiles: Iterable[InFile]) -> List[List[InFile]]:
+    # Tarjan's strongly connected components algorithm, iterative, O(V+E);
+    # a cycle is reported for each component with more than one infile (or
+    # an infile referencing itself) as the shortest path from the infile with
+    # the smallest stem back to it, components are ordered by that stem
+    nodes, adjacency = _index_infiles(infiles)
+    stems = [infile.stem for infile in nodes]
+    unvisited = -1
+    index = array('l', [unvisited]) * len(nodes)
+    lowlink = array('l', [0]) * len(nodes)
+    on_stack = bytearray(len(nodes))
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+    for root in sorted(range(len(nodes)), key=stems.__getitem__):
+        if index[root] != unvisited:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work: List[Tuple[int, Iterator[int]]] = [(root, iter(adjacency[root]))]
+        while work:
+            node, referenced = work[-1]
+            for ref_node in referenced:
+                if index[ref_node] == unvisited:
+                    index[ref_node] = lowlink[ref_node] = counter
+                    counter += 1
+                    stack.append(ref_node)
+                    on_stack[ref_node] = 1
+                    work.append((ref_node, iter(adjacency[ref_node])))
+                    break
+                if on_stack[ref_node]:
+                    lowlink[node] = min(lowlink[node], index[ref_node])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component: List[int] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    cycles: List[List[InFile]] = []
+    for component in components:
+        start = min(component, key=stems.__getitem__)
+        if len(component) == 1 and start not in adjacency[start]:
+            continue
+        cycle = _find_shortest_cycle(start, set(component), adjacency)
+        cycles.append([nodes[node] for node in cycle])
+    cycles.sort(key=lambda cycle: cycle[0].stem)
+    return cycles
+
+
+def _find_shortest_cycle(
+    start: int, component: Set[int], adjacency: List[List[int]],
+) -> List[int]:
+    # breadth-first search within the component, which is strongly
+    # connected, thus the path back to the start always exists
+    previous: Dict[int, int] = {}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for ref_node in adjacency[node]:
+            if ref_node == start:
+                path = [node]
+                while path[-1] != start:
+                    path.append(previous[path[-1]])
+                return path[::-1]
+            if ref_node in component and ref_node not in previous:
+                previous[ref_node] = node
+                queue.append(ref_node)
+    assert False, 'should not reach here'
+
+
+def get_dependents(infiles: Iterable[InFile]) -> Dict[InFile, List[InFile]]:
+    # the reverse reference index: infile -> infiles referencing it directly
+    dependents: Dict[InFile, List[InFile]] = {}
+    for infile in infiles:
+        dependents.setdefault(infile, [])
+        for ref in infile.references:
+            dependents.setdefault(ref.infile, []).append(infile)
+    return dependents
+
+
+def iterate_dependents(
+    infile: InFile, dependents: Dict[InFile, List[InFile]],
+) -> Iterator[InFile]:
+    seen: Set[InFile] = {infile}
+    stack = [infile]
+    while stack:
+        for dependent in dependents.get(stack.pop(), ()):
+            if dependent not in seen:
+                seen.add(dependent)
+                stack.append(dependent)
+                yield dependent
+
+
+def get_redundant_references(
+    infile: InFile, input_dir: Union[Path, str],
+) -> Set[InFile]:
+    # referenced locks are passed to the compile tool as constraints; a lock
+    # all pins of which are pinned identically by another referenced lock
+    # (e.g., a parent layer whose packages are all required by a child layer
+    # compiled under its constraints) adds nothing, thus can be left out, so
+    # that the resolver has fewer files to parse and check against each
+    # other; of locks with equal pins, the first referenced one is kept
+    pins: List[Tuple[InFile, FrozenSet[str]]] = []
+    for ref in infile.iterate_references(recursive=True):
+        lock_path = Path(input_dir) / ref.infile.output_name
+        if (lock_pins := _read_pins(lock_path)) is not None:
+            pins.append((ref.infile, lock_pins))
+    redundant: Set[InFile] = set()
+    for pos, (ref_infile, ref_pins) in enumerate(pins):
+        for other_pos, (_, other_pins) in enumerate(pins):
+            if other_pos == pos or not ref_pins <= other_pins:
+                continue
+            if ref_pins != other_pins or other_pos < pos:
+                redundant.add(ref_infile)
+                break
+    return redundant
+
+
+def _read_pins(lock_path: Path) -> Optional[FrozenSet[str]]:
+    # None if the lock is missing or contains anything but requirements and
+    # their hashes (e.g., index options), since such locks can't be compared
+    pins: Set[str] = set()
+    try:
+        for line in iterate_lock_lines(lock_path):
+            if line.startswith('-'):
+                return None
+            pins.add(line)
+    except FileNotFoundError:
+        return None
+    return frozenset(pins)
+
+
+def is_generated_name(name: str) -> bool:
+    return _GENERATED_NAME_REGEX.fullmatch(name) is not None
+
+
+def has_relative_path(line: str) -> bool:
+    # whether a dependency or option line refers to a local path relative to
+    # the directory of the infile, e.g., `-r ../extra.txt`, `-e ./pkg`,
+    # `dist/pkg.whl`, `pkg @ file:../pkg`; the tool resolves such paths
+    # against the directory of the file it reads
+    if line[0] == '-':
+        if not (match := _PATH_OPTION_REGEX.match(line)):
+            return False
+        path = match['path']
+        return not _is_url(path) and not os.path.isabs(path)
+    for token in line.split(';', 1)[0].split():
+        if _is_url(token):
+            continue
+        token = token.split('@', 1)[-1]
+        if token.startswith('file:'):
+            token = token[5:]
+        if not token or os.path.isabs(token):
+            continue
+        if (
+            token[0] == '.' or is_path(token)
+            or token.endswith(_ARCHIVE_SUFFIXES)
+        ):
+            return True
+    return False
+
+
+def _is_url(value: str) -> bool:
+    return '://' in value
 
 
 def get_infiles(
@@ -261,16 +750,33 @@ def get_infiles(
     layers: Optional[Iterable[Layer]] = None,
     include_parent_layers: Union[
         bool, Literal[ReferenceType.REQUIREMENTS]] = True,
+    include_dependent_layers: bool = False,
 ) -> List[InFile]:
-    infiles: Sequence[InFile] = read_infiles(input_dir)
+    infiles: Sequence[InFile]
+    if layers is not None and not include_dependent_layers:
+        # dependents can only be found by reading all input files
+        infiles = load_infiles(input_dir, layers)
+    else:
+        infiles = read_infiles(input_dir)
     if not infiles:
         raise InputDirectoryError('no *.in files')
     if layers is not None:
         infiles = filter_infiles(
-            infiles, layers, include_parent_layers=include_parent_layers)
-    elif isinstance(include_parent_layers, bool) and not include_parent_layers:
-        log.warning(
-            'include_parent_layers = False ignored when no layers passed')
+            infiles, layers, include_parent_layers=include_parent_layers,
+            include_dependent_layers=include_dependent_layers,
+        )
+    else:
+        if (
+            isinstance(include_parent_layers, bool)
+            and not include_parent_layers
+        ):
+            log.warning(
+                'include_parent_layers = False ignored when no layers passed')
+        if include_dependent_layers:
+            log.warning(
+                'include_dependent_layers = True ignored '
+                'when no layers passed'
+            )
     return sort_infiles(infiles)
 
 
@@ -278,6 +784,7 @@ def filter_infiles(
     infiles: Iterable[InFile], layers: Iterable[Layer], *,
     include_parent_layers: Union[
         bool, Literal[ReferenceType.REQUIREMENTS]] = True,
+    include_dependent_layers: bool = False,
 ) -> List[InFile]:
     _include_parents: bool
     _parent_ref_type: Optional[ReferenceType]
@@ -290,6 +797,7 @@ def filter_infiles(
     filtered: Set[InFile] = set()
     stems_to_infiles: Dict[str, InFile] = {
         infile.stem: infile for infile in infiles}
+    dependents: Optional[Dict[InFile, List[InFile]]] = None
     for layer in layers:
         infile = stems_to_infiles[layer.stem]
         filtered.add(infile)
@@ -297,6 +805,10 @@ def filter_infiles(
             for ref in infile.iterate_references(recursive=True):
                 if _parent_ref_type is None or _parent_ref_type == ref.type:
                     filtered.add(ref.infile)
+        if include_dependent_layers:
+            if dependents is None:
+                dependents = get_dependents(stems_to_infiles.values())
+            filtered.update(iterate_dependents(infile, dependents))
     return [
         infile for infile in stems_to_infiles.values() if infile in filtered]
 
@@ -304,14 +816,14 @@ def filter_infiles(
 def get_input_dir(input_dir: Optional[Union[Path, str]] = None) -> Path:
     if input_dir:
         input_dir = Path(input_dir)
-        if not input_dir.exists():
+        if not fs.exists(input_dir):
             raise InputDirectoryError(f'{input_dir} does not exist')
-        if not input_dir.is_dir():
+        if not fs.is_dir(input_dir):
             raise InputDirectoryError(f'{input_dir} is not a directory')
     else:
         input_dir = Path('requirements')
-        if not input_dir.is_dir():
+        if not fs.is_dir(input_dir):
             input_dir = Path('.')
-            if not next(input_dir.glob('*.in'), None):
+            if not fs.get_snapshot(input_dir).get_file_names('.in'):
                 raise InputDirectoryError('input directory not found')
-    return input_dir.resolve()
+    return fs.resolve(input_dir)
@@ -4,6 +4,7 @@ from typing import (
     Any, Dict, Iterable, List, Literal, Optional, Tuple, Union, cast, overload,
 )
 
+from . import fs
 from ._error import Error
 from .compat import StrEnum
 from .utils import is_path
@@ -47,6 +48,9 @@ LAYER_NAME_REGEX = re.compile(
 
 
 class Layer:
+    __slots__ = (
+        'type', 'name', 'path', 'stem', 'has_requirements_suffix', 'extension')
+
     type: LayerType
     name: str
     path: Path
@@ -104,7 +108,7 @@ class Layer:
             raise LayerNameError(f'cannot infer type: {name}')
 
         if path:
-            path = path.resolve()
+            path = fs.resolve(path)
             if check_exists:
                 self._check_exists(path, stem)
             self.path = path
@@ -113,7 +117,7 @@ class Layer:
         if not input_dir:
             raise LayerFileError(
                 f'cannot locate layer file without input directory: {name}')
-        input_dir = Path(input_dir).resolve()
+        input_dir = fs.resolve(input_dir)
 
         if is_bare_stem:
             candidates: List[Tuple[str, bool]] = [
@@ -159,11 +163,11 @@ class Layer:
         self, path: Path, stem: Optional[str] = None, *,
         raise_exception: bool = True,
     ) -> bool:
-        if not path.exists():
+        if not fs.exists(path):
             if raise_exception:
                 raise LayerFileError(f'{stem or path} does not exist')
             return False
-        if not path.is_file():
+        if not fs.is_file(path):
             if raise_exception:
                 raise LayerFileError(f'{stem or path} is not a file')
             return False
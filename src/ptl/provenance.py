@@ -0,0 +1,172 @@
+import dataclasses
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .infile import InFile, ReferenceType
+from .utils import write_atomically
+
+
+# compile writes the provenance header as the first line of each lock: the
+# digests of the rendered input file and of the referenced locks the lock is
+# compiled from; `ptl check` recomputes them to find stale locks without
+# calling the compile tool; headers are not part of lock contents, i.e., they
+# are ignored when locks are compared, hashed or used as constraints
+
+PROVENANCE_VERSION = 1
+
+_HEADER_PREFIX = b'# ptl provenance '
+_HEADER_REGEX = re.compile(
+    rb'# ptl provenance v(?P<version>\d+) '
+    rb'input=(?P<input>[0-9a-f]{64}) references=(?P<references>[0-9a-f]{64})'
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Provenance:
+    input: str
+    references: str
+
+
+def split_lock(data: bytes) -> Tuple[Optional[bytes], bytes]:
+    # (header line without the line break or None, content)
+    if not data.startswith(_HEADER_PREFIX):
+        return None, data
+    header, _, content = data.partition(b'\n')
+    return header.rstrip(b'\r'), content
+
+
+def read_lock(path: Path) -> bytes:
+    # the lock content without the provenance header
+    _, content = split_lock(path.read_bytes())
+    return content
+
+
+class Digest:
+    # sha256 of length-prefixed chunks, the prefix makes the concatenation
+    # unambiguous
+
+    def __init__(self) -> None:
+        self._hash = hashlib.sha256()
+
+    def update(self, *chunks: Union[bytes, str]) -> None:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            self._hash.update(len(chunk).to_bytes(8, 'big'))
+            self._hash.update(chunk)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def digest_inputs(digest: Digest, infile: InFile, input_dir: Path) -> None:
+    # everything the lock of the infile is compiled from apart from the tool
+    # and its settings: the rendered infile and the referenced locks; both
+    # the incremental state digest and the compile cache key are built on it
+    digest.update(
+        'infile', infile.render(references_as=ReferenceType.CONSTRAINTS))
+    for ref in infile.iterate_references(recursive=True):
+        lock_name = ref.infile.output_name
+        try:
+            lock = read_lock(input_dir / lock_name)
+        except FileNotFoundError:
+            digest.update('missing_lock', lock_name)
+        else:
+            digest.update('lock', lock_name, lock)
+
+
+def hash_lock(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(read_lock(path)).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def compute_provenance(
+    infile: InFile, input_dir: Path, *,
+    lock_digests: Optional[Dict[str, Optional[str]]] = None,
+) -> Provenance:
+    # `lock_digests` caches digests of referenced locks by their names, it
+    # may be shared between calls as long as the locks are not changed
+    if lock_digests is None:
+        lock_digests = {}
+    rendered = infile.render(references_as=ReferenceType.CONSTRAINTS)
+    references = Digest()
+    for ref in infile.iterate_references(recursive=True):
+        lock_name = ref.infile.output_name
+        try:
+            lock_digest = lock_digests[lock_name]
+        except KeyError:
+            lock_digest = lock_digests[lock_name] = hash_lock(
+                input_dir / lock_name)
+        if lock_digest is None:
+            references.update('missing_lock', lock_name)
+        else:
+            references.update('lock', lock_name, lock_digest)
+    return Provenance(
+        input=hashlib.sha256(rendered.encode()).hexdigest(),
+        references=references.hexdigest(),
+    )
+
+
+def format_header(provenance: Provenance) -> bytes:
+    return (
+        f'# ptl provenance v{PROVENANCE_VERSION} '
+        f'input={provenance.input} references={provenance.references}\n'
+    ).encode()
+
+
+def parse_header(header: bytes) -> Optional[Provenance]:
+    # None if the header is malformed or of another version
+    match = _HEADER_REGEX.fullmatch(header)
+    if match is None or int(match['version']) != PROVENANCE_VERSION:
+        return None
+    return Provenance(
+        input=match['input'].decode(),
+        references=match['references'].decode(),
+    )
+
+
+def add_provenance(data: bytes, provenance: Provenance) -> bytes:
+    # replaces the existing header, if any
+    _, content = split_lock(data)
+    return format_header(provenance) + content
+
+
+def write_provenance(path: Path, provenance: Provenance) -> bool:
+    # returns true if the lock is rewritten, missing locks are skipped
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return False
+    new_data = add_provenance(data, provenance)
+    if new_data == data:
+        return False
+    write_atomically(path, new_data)
+    return True
+
+
+def check_provenance(
+    infile: InFile, input_dir: Path, *,
+    lock_digests: Optional[Dict[str, Optional[str]]] = None,
+) -> List[str]:
+    # reasons the lock of the infile is stale, empty if it is up to date
+    try:
+        with open(input_dir / infile.output_name, 'rb') as fobj:
+            header, _ = split_lock(fobj.readline())
+    except FileNotFoundError:
+        return ['lock not found']
+    if header is None:
+        return ['no provenance header']
+    if (recorded := parse_header(header)) is None:
+        return ['unsupported provenance header']
+    provenance = compute_provenance(
+        infile, input_dir, lock_digests=lock_digests)
+    reasons: List[str] = []
+    if recorded.input != provenance.input:
+        reasons.append('input changed')
+    if recorded.references != provenance.references:
+        reasons.append('referenced locks changed')
+    return reasons
@@ -1,13 +1,29 @@
 import dataclasses
+import json
+import logging
+import os
 import shlex
 import shutil
-import subprocess
+import sys
 from pathlib import Path
-from typing import ClassVar, Dict, Iterable, List, Tuple, Union
+from typing import (
+    TYPE_CHECKING, ClassVar, Dict, Iterable, List, Optional, Sequence, Tuple,
+    TypedDict, Union, cast,
+)
 
 from ._error import Error
 from .compat import StrEnum
-from .utils import is_path
+from .utils import is_path, write_atomically
+
+
+if TYPE_CHECKING:
+    import subprocess
+
+
+log = logging.getLogger(__name__)
+
+
+TOOLS_CACHE_FILE = 'tools.json'
 
 
 class ExecutableNotFound(Error):
@@ -49,15 +65,31 @@ class Tool(StrEnum):
 class Provider:
     PIP_TOOLS: ClassVar['Provider']
     UV: ClassVar['Provider']
+    SIMULATED: ClassVar['Provider']
 
     tools: Dict[Tool, str]
+    # whether the compile tool reads the input file from stdin if it's `-`
+    # and resolves references in it against its working directory; pip-tools
+    # doesn't: stdin is saved to a temporary file, and references are
+    # resolved against the temporary directory
+    supports_stdin: bool = False
 
     _registry: ClassVar[Dict[str, 'Provider']] = {}
 
     @classmethod
-    def register(cls, attr_name: str, provider: 'Provider') -> None:
+    def register(
+        cls, attr_name: str, provider: 'Provider', *,
+        discoverable: bool = True,
+    ) -> None:
+        # only discoverable providers are tried by find_tool(), others
+        # have to be selected explicitly
         setattr(cls, attr_name, provider)
-        cls._registry[attr_name] = provider
+        if discoverable:
+            cls._registry[attr_name] = provider
+
+    @classmethod
+    def get_providers(cls) -> Tuple['Provider', ...]:
+        return tuple(cls._registry.values())
 
     @classmethod
     def get_tool_candidates(cls, tool: Union[Tool, str]) -> Tuple[str, ...]:
@@ -79,9 +111,22 @@ Provider.register('UV', Provider(
         Tool.COMPILE: 'uv pip compile',
         Tool.SYNC: 'uv pip sync',
     },
+    supports_stdin=True,
 ))
 
 
+# see simulator.py
+_SIMULATOR = f'{shlex.quote(sys.executable)} -m ptl.simulator'
+
+Provider.register('SIMULATED', Provider(
+    tools={
+        Tool.COMPILE: f'{_SIMULATOR} compile',
+        Tool.SYNC: f'{_SIMULATOR} sync',
+    },
+    supports_stdin=True,
+), discoverable=False)
+
+
 def find_executable(name_or_path: Union[Path, str]) -> Path:
     if isinstance(name_or_path, str):
         if not is_path(name_or_path):
@@ -107,26 +152,163 @@ def process_command_line(command_line: Union[Iterable[str], str]) -> List[str]:
     return command_line
 
 
+class _ToolCacheEntry(TypedDict):
+    mtime: int
+    size: int
+    version: str
+
+
+class ToolVersionCache:
+    # `--version` outputs keyed by command lines with resolved executables,
+    # an entry is valid as long as mtime and size of the executable match;
+    # the cache is an optimization, errors are never fatal
+    path: Path
+    _entries: Dict[str, _ToolCacheEntry]
+
+    def __init__(self, path: Union[Path, str]) -> None:
+        self.path = Path(path)
+        self._entries = self._load()
+
+    def _load(self) -> Dict[str, _ToolCacheEntry]:
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return {}
+        except OSError as exc:
+            log.debug('%s: failed to read tools cache: %s', self.path, exc)
+            return {}
+        try:
+            entries = json.loads(data)
+            if not isinstance(entries, dict):
+                raise TypeError(f'object expected, got {type(entries)}')
+            return cast(Dict[str, _ToolCacheEntry], entries)
+        except (ValueError, TypeError) as exc:
+            log.debug('%s: malformed tools cache: %s', self.path, exc)
+            return {}
+
+    def _get_key(
+        self, command_line: Sequence[str],
+    ) -> Optional[Tuple[str, os.stat_result]]:
+        exec_path = os.path.realpath(command_line[0])
+        try:
+            stat = os.stat(exec_path)
+        except OSError:
+            return None
+        return '\0'.join([exec_path, *command_line[1:]]), stat
+
+    def get(self, command_line: Sequence[str]) -> Optional[str]:
+        if (key_and_stat := self._get_key(command_line)) is None:
+            return None
+        key, stat = key_and_stat
+        entry = self._entries.get(key)
+        if not isinstance(entry, dict) or (
+            entry.get('mtime') != stat.st_mtime_ns
+            or entry.get('size') != stat.st_size
+        ):
+            return None
+        version = entry.get('version')
+        return version if isinstance(version, str) else None
+
+    def set(self, command_line: Sequence[str], version: str) -> None:
+        if (key_and_stat := self._get_key(command_line)) is None:
+            return
+        key, stat = key_and_stat
+        self._entries[key] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'version': version,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomically(self.path, json.dumps(self._entries).encode())
+        except OSError as exc:
+            log.debug('%s: failed to write tools cache: %s', self.path, exc)
+
+
 def check_tool_version(
-    command_line: Union[Iterable[str], str],
+    command_line: Union[Iterable[str], str], *,
+    cache: Optional[ToolVersionCache] = None,
 ) -> Tuple[List[str], str]:
     try:
         command_line = process_command_line(command_line)
     except ExecutableNotFound as exc:
         raise ToolVersionCheckFailed from exc
+    if cache is not None and (version := cache.get(command_line)):
+        log.debug('%s: cached version: %s', command_line[0], version)
+        return command_line, version
+    import subprocess
+
     try:
         output = subprocess.check_output(
             [*command_line, '--version'], stderr=subprocess.STDOUT, text=True)
     except subprocess.CalledProcessError as exc:
         raise ToolVersionCheckFailed from exc
-    return command_line, output.strip()
+    version = output.strip()
+    if cache is not None:
+        cache.set(command_line, version)
+    return command_line, version
+
+
+_Probe = Tuple[List[str], Provider, Optional['subprocess.Popen[str]']]
 
 
-def find_tool(tool: Union[Tool, str]) -> Tuple[List[str], str]:
-    candidates = Provider.get_tool_candidates(tool)
-    for command_line in candidates:
+def find_tool(
+    tool: Union[Tool, str], *, cache: Optional[ToolVersionCache] = None,
+) -> Tuple[List[str], str, Provider]:
+    # the first provider (in the registration order) with a working tool
+    # wins; uncached candidates are probed concurrently, but only those
+    # preceding the first cached one, since it wins over the rest anyway
+    tool = Tool(tool)
+    candidates: List[Tuple[List[str], Provider]] = []
+    cached: Optional[Tuple[List[str], str, Provider]] = None
+    for provider in Provider.get_providers():
         try:
-            return check_tool_version(command_line)
-        except ToolVersionCheckFailed:
-            pass
-    raise ToolNotFound(tool, candidates)
+            command_line = process_command_line(provider.tools[tool])
+        except ExecutableNotFound:
+            continue
+        if cache is not None and (version := cache.get(command_line)):
+            cached = (command_line, version, provider)
+            break
+        candidates.append((command_line, provider))
+    probes: List[_Probe] = [
+        (command_line, provider, _start_probe(command_line))
+        for command_line, provider in candidates
+    ]
+    try:
+        for command_line, provider, process in probes:
+            if process is None:
+                continue
+            output, _ = process.communicate()
+            if process.returncode:
+                log.debug(
+                    '%s --version: exit status %d', command_line,
+                    process.returncode,
+                )
+                continue
+            version = output.strip()
+            if cache is not None:
+                cache.set(command_line, version)
+            return command_line, version, provider
+    finally:
+        # probes not waited for are no longer needed
+        for _, _, process in probes:
+            if process is not None and process.returncode is None:
+                process.kill()
+                process.communicate()
+    if cached is not None:
+        log.debug('%s: cached version: %s', cached[0][0], cached[1])
+        return cached
+    raise ToolNotFound(tool, Provider.get_tool_candidates(tool))
+
+
+def _start_probe(command_line: List[str]) -> Optional['subprocess.Popen[str]']:
+    import subprocess
+
+    try:
+        return subprocess.Popen(
+            [*command_line, '--version'], stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True,
+        )
+    except OSError as exc:
+        log.debug('%s --version: %s', command_line, exc)
+        return None
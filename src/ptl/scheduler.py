@@ -0,0 +1,140 @@
+import asyncio
+import heapq
+import logging
+from typing import (
+    Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple,
+)
+
+from ._error import Error
+from .infile import InFile, sort_infiles
+
+
+log = logging.getLogger(__name__)
+
+
+def get_dependencies(infiles: Sequence[InFile]) -> Dict[InFile, Set[InFile]]:
+    _infiles = set(infiles)
+    return {
+        infile: {
+            ref.infile for ref in infile.iterate_references(recursive=True)
+            if ref.infile in _infiles and ref.infile != infile
+        }
+        for infile in infiles
+    }
+
+
+def estimate_durations(
+    infiles: Sequence[InFile], durations: Mapping[InFile, float],
+) -> Dict[InFile, float]:
+    # infiles without a known duration are estimated by the number of their
+    # dependencies, scaled to seconds using infiles with known durations
+    def get_size(infile: InFile) -> int:
+        return 1 + len(infile.dependencies)
+
+    known = {
+        infile: duration for infile in infiles
+        if (duration := durations.get(infile)) is not None
+    }
+    scale = 1.0
+    if known:
+        scale = sum(known.values()) / sum(map(get_size, known))
+    return {
+        infile: known.get(infile, get_size(infile) * scale)
+        for infile in infiles
+    }
+
+
+def get_priorities(
+    infiles: Sequence[InFile], durations: Mapping[InFile, float],
+) -> Dict[InFile, float]:
+    # the priority of an infile is the estimated duration of the longest
+    # chain of infiles starting with it, i.e., the critical path
+    estimated = estimate_durations(infiles, durations)
+    dependents: Dict[InFile, List[InFile]] = {
+        infile: [] for infile in infiles}
+    for infile, dependencies in get_dependencies(infiles).items():
+        for dependency in dependencies:
+            dependents[dependency].append(infile)
+    priorities: Dict[InFile, float] = {}
+    for infile in reversed(sort_infiles(infiles)):
+        priorities[infile] = estimated[infile] + max(
+            (priorities[dependent] for dependent in dependents[infile]),
+            default=0.0,
+        )
+    return priorities
+
+
+def schedule(
+    infiles: Sequence[InFile], func: Callable[[InFile], Awaitable[None]], *,
+    jobs: int = 1, keep_going: bool = False,
+    priorities: Optional[Mapping[InFile, float]] = None,
+) -> Dict[InFile, Error]:
+    # an infile is started as soon as all infiles it references (directly or
+    # transitively) are processed; among ready infiles, the one with the
+    # highest priority wins, ties are broken by the position in `infiles`,
+    # that is, without priorities and with jobs=1 the order is preserved;
+    # on the first error, running calls are cancelled and the error is
+    # re-raised, unless `keep_going` is true, in which case errors are
+    # collected and returned, and only dependents of failed infiles are
+    # not started
+    if jobs < 1:
+        raise ValueError(f'jobs must be a positive integer, got {jobs}')
+    return asyncio.run(
+        _schedule(infiles, func, jobs, keep_going, priorities or {}))
+
+
+async def _schedule(
+    infiles: Sequence[InFile], func: Callable[[InFile], Awaitable[None]],
+    jobs: int, keep_going: bool, priorities: Mapping[InFile, float],
+) -> Dict[InFile, Error]:
+    keys = {
+        infile: (-priorities.get(infile, 0.0), pos)
+        for pos, infile in enumerate(infiles)
+    }
+    waiting = get_dependencies(infiles)
+    dependents: Dict[InFile, List[InFile]] = {
+        infile: [] for infile in infiles}
+    for infile, dependencies in waiting.items():
+        for dependency in dependencies:
+            dependents[dependency].append(infile)
+    ready: List[Tuple[Tuple[float, int], InFile]] = [
+        (keys[infile], infile)
+        for infile, dependencies in waiting.items() if not dependencies
+    ]
+    heapq.heapify(ready)
+    running: Dict['asyncio.Task[None]', InFile] = {}
+    errors: Dict[InFile, Error] = {}
+
+    async def run(infile: InFile) -> None:
+        await func(infile)
+
+    try:
+        while ready or running:
+            while ready and len(running) < jobs:
+                _, infile = heapq.heappop(ready)
+                log.debug('scheduling %s', infile)
+                running[asyncio.create_task(run(infile))] = infile
+            done, _ = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                infile = running.pop(task)
+                exc = task.exception()
+                if exc is not None:
+                    if not keep_going or not isinstance(exc, Error):
+                        raise exc
+                    log.error('%s: %s', exc.__class__.__name__, exc)
+                    errors[infile] = exc
+                    continue
+                for dependent in dependents[infile]:
+                    dependencies = waiting[dependent]
+                    dependencies.discard(infile)
+                    if not dependencies:
+                        heapq.heappush(
+                            ready, (keys[dependent], dependent))
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            # wait for cancelled calls to clean up, e.g., stop processes
+            await asyncio.wait(running)
+    return errors
@@ -0,0 +1,278 @@
+import argparse
+import hashlib
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from . import __version__
+from ._error import Error
+
+
+# a stand-in for pip-compile/pip-sync (see Provider.SIMULATED) for load
+# testing and benchmarking without network access: locks are derived from
+# the input only (the same input gives the same lock), pins of constraint
+# files are honored; latency, CPU time, memory use and failures are simulated
+
+_COMMENT_REGEX = re.compile(r'(?:^|\s+)#.*')
+_OPTION_REGEX = re.compile(
+    r'(?P<option>-[rc]|--requirement|--constraint)'
+    r'(?:\s*=\s*|\s*)(?P<path>.+)'
+)
+_REQUIREMENT_REGEX = re.compile(
+    r'(?P<name>[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)'
+    r'(?:\s*(?P<extras>\[[^\]]*\]))?'
+    r'(?P<specifier>[^;]*)'
+)
+_PIN_REGEX = re.compile(r'==\s*(?P<version>[^\s,;]+)')
+
+
+class SimulatorError(Error):
+    pass
+
+
+class Args(argparse.Namespace):
+    command: str
+    sources: List[str]
+    output: Optional[str]
+    constraints: List[str]
+    latency: float
+    cpu: float
+    memory: int
+    failure_rate: float
+    seed: int
+
+
+def normalize_name(name: str) -> str:
+    # PEP 503, the same as constraints.normalize_name(), which is not imported
+    # to keep the startup time (paid for each simulated run) low
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def get_version(name: str, seed: int = 0) -> str:
+    key = f'{seed}:{normalize_name(name)}'
+    digest = hashlib.sha256(key.encode()).digest()
+    return f'{digest[0] % 5}.{digest[1] % 20}.{digest[2] % 10}'
+
+
+def iterate_lines(text: str) -> Iterator[str]:
+    for line in text.splitlines():
+        if line := _COMMENT_REGEX.sub('', line).strip():
+            yield line
+
+
+def read_requirements(
+    path: str, constraints: Dict[str, str], *,
+    seen: Optional[Set[Path]] = None,
+) -> List[Tuple[str, str, Optional[str]]]:
+    # (name, extras, pinned version) triples; `-r` files are included,
+    # pins of `-c` files are added to `constraints`; paths are relative to
+    # the file they are referenced from (to the current directory for stdin)
+    if seen is None:
+        seen = set()
+    if path == '-':
+        text, base_dir = sys.stdin.read(), Path()
+    else:
+        file_path = Path(path)
+        if file_path.resolve() in seen:
+            return []
+        seen.add(file_path.resolve())
+        text, base_dir = _read_file(file_path), file_path.parent
+    requirements: List[Tuple[str, str, Optional[str]]] = []
+    for line in iterate_lines(text):
+        if line.startswith('-'):
+            if not (match := _OPTION_REGEX.fullmatch(line)):
+                # other options don't affect the result
+                continue
+            nested_path = str(base_dir / match['path'])
+            if match['option'] in ('-r', '--requirement'):
+                requirements.extend(
+                    read_requirements(nested_path, constraints, seen=seen))
+            else:
+                read_constraints(nested_path, constraints)
+            continue
+        if not (match := _REQUIREMENT_REGEX.match(line)):
+            raise SimulatorError(f'{path}: invalid requirement: {line}')
+        pin = _PIN_REGEX.search(match['specifier'])
+        requirements.append((
+            match['name'], match['extras'] or '',
+            pin['version'] if pin else None,
+        ))
+    return requirements
+
+
+def read_constraints(path: str, constraints: Dict[str, str]) -> None:
+    # only `name==version` lines are taken into account
+    for line in iterate_lines(_read_file(Path(path))):
+        if line.startswith('-'):
+            continue
+        if not (match := _REQUIREMENT_REGEX.match(line)):
+            continue
+        if not (pin := _PIN_REGEX.search(match['specifier'])):
+            continue
+        name, version = normalize_name(match['name']), pin['version']
+        if constraints.setdefault(name, version) != version:
+            raise SimulatorError(
+                f'conflicting constraints: {name}=={constraints[name]}, '
+                f'{name}=={version} ({path})'
+            )
+
+
+def resolve(
+    requirements: Sequence[Tuple[str, str, Optional[str]]],
+    constraints: Dict[str, str], *, seed: int = 0,
+) -> Dict[str, str]:
+    # normalized names (with extras, if any) mapped to versions
+    pins: Dict[str, str] = {}
+    versions: Dict[str, str] = {}
+    for name, extras, version in requirements:
+        normalized = normalize_name(name)
+        constraint = constraints.get(normalized)
+        if version is not None and constraint not in (None, version):
+            raise SimulatorError(
+                f'cannot install {name}=={version}: '
+                f'constrained to {name}=={constraint}'
+            )
+        version = version or constraint or get_version(normalized, seed)
+        if versions.setdefault(normalized, version) != version:
+            raise SimulatorError(
+                f'cannot install {name}=={version} and '
+                f'{name}=={versions[normalized]}'
+            )
+        pins[f'{normalized}{extras}'] = version
+    return pins
+
+
+def simulate_load(args: Args, key: str) -> None:
+    # `key` makes failures deterministic: the same input always fails
+    # (or doesn't) with the same seed and failure rate
+    ballast = bytearray(args.memory * 1024 * 1024)
+    # pages must be touched to be actually allocated
+    ballast[::4096] = b'\1' * len(range(0, len(ballast), 4096))
+    started = time.process_time()
+    counter = 0
+    while time.process_time() - started < args.cpu:
+        counter += 1
+        hashlib.sha256(counter.to_bytes(8, 'big')).digest()
+    time.sleep(args.latency)
+    rng = random.Random(f'{args.seed}:{key}')
+    if rng.random() < args.failure_rate:
+        raise SimulatorError('simulated failure')
+
+
+def compile(args: Args) -> None:
+    if args.output is None:
+        raise SimulatorError('-o/--output-file is required')
+    constraints: Dict[str, str] = {}
+    for path in args.constraints:
+        read_constraints(path, constraints)
+    requirements: List[Tuple[str, str, Optional[str]]] = []
+    seen: Set[Path] = set()
+    for source in args.sources or ['-']:
+        requirements.extend(
+            read_requirements(source, constraints, seen=seen))
+    pins = resolve(requirements, constraints, seed=args.seed)
+    lock = ''.join(
+        f'{name}=={version}\n' for name, version in sorted(pins.items()))
+    simulate_load(args, lock)
+    content = f'# generated by ptl simulator\n{lock}'
+    if args.output == '-':
+        sys.stdout.write(content)
+    else:
+        Path(args.output).write_text(content)
+
+
+def sync(args: Args) -> None:
+    for source in args.sources:
+        if not Path(source).is_file():
+            raise SimulatorError(f'{source}: file not found')
+    simulate_load(args, '\0'.join(args.sources))
+
+
+def _read_file(path: Path) -> str:
+    try:
+        return path.read_text()
+    except OSError as exc:
+        raise SimulatorError(f'{path}: {exc.strerror}') from exc
+
+
+def _non_negative_float(value: str) -> float:
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            f'non-negative number expected, got {value}')
+    return number
+
+
+def _ratio(value: str) -> float:
+    number = float(value)
+    if not 0 <= number <= 1:
+        raise argparse.ArgumentTypeError(
+            f'number between 0 and 1 expected, got {value}')
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        '--version', action='version', version=f'ptl-simulator {__version__}')
+    # accepted for compatibility, the output is the same
+    common.add_argument('-v', '--verbose', action='count', default=0)
+    common.add_argument('-q', '--quiet', action='count', default=0)
+    simulation = common.add_argument_group('simulation options')
+    simulation.add_argument(
+        '--latency', type=_non_negative_float, default=0, metavar='SECONDS',
+        help='time spent waiting, e.g., for the network',
+    )
+    simulation.add_argument(
+        '--cpu', type=_non_negative_float, default=0, metavar='SECONDS',
+        help='CPU time spent',
+    )
+    simulation.add_argument(
+        '--memory', type=int, default=0, metavar='MB',
+        help='memory allocated',
+    )
+    simulation.add_argument(
+        '--failure-rate', type=_ratio, default=0, metavar='RATIO',
+        help='share of inputs failing',
+    )
+    simulation.add_argument(
+        '--seed', type=int, default=0, metavar='N',
+        help='seed of versions and failures',
+    )
+
+    parser = argparse.ArgumentParser(prog='python -m ptl.simulator')
+    subparsers = parser.add_subparsers(
+        required=True, dest='command', metavar='COMMAND')
+    compile_parser = subparsers.add_parser(
+        'compile', parents=[common], help='simulate pip-compile')
+    compile_parser.add_argument('sources', nargs='*', metavar='SRC_FILE')
+    compile_parser.add_argument(
+        '-o', '--output-file', dest='output', metavar='FILE')
+    compile_parser.add_argument(
+        '-c', '--constraint', dest='constraints', action='append',
+        default=[], metavar='FILE',
+    )
+    sync_parser = subparsers.add_parser(
+        'sync', parents=[common], help='simulate pip-sync')
+    sync_parser.add_argument('sources', nargs='*', metavar='SRC_FILE')
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    # unknown options (e.g., --generate-hashes) are ignored, options with
+    # values must be passed in the `--option=value` form then
+    args, _ = build_parser().parse_known_args(argv, namespace=Args())
+    try:
+        if args.command == 'compile':
+            compile(args)
+        else:
+            sync(args)
+    except SimulatorError as exc:
+        sys.exit(f'error: {exc}')
+
+
+if __name__ == '__main__':
+    main()
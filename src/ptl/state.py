@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, TypedDict, Union, cast
+
+from .infile import InFile
+from .provenance import Digest, digest_inputs
+from .utils import ensure_state_dir, get_state_dir, write_atomically
+
+
+log = logging.getLogger(__name__)
+
+
+STATE_FILE = 'state.json'
+STATE_VERSION = 1
+
+
+class LayerState(TypedDict):
+    input: str
+    output: str
+
+
+_StateDictBase = TypedDict('_StateDictBase', {
+    'version': int,
+    'layers': Dict[str, LayerState],
+})
+
+
+class StateDict(_StateDictBase, total=False):
+    # compile durations in seconds, kept even if the layer state is reset
+    durations: Dict[str, float]
+
+
+def hash_file(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def compute_input_digest(
+    infile: InFile, input_dir: Path, *,
+    command_line: Iterable[Union[Path, str]],
+    tool_version: Optional[str] = None,
+) -> str:
+    digest = Digest()
+    digest.update('command_line', *map(str, command_line))
+    digest.update('tool_version', tool_version or '')
+    digest_inputs(digest, infile, input_dir)
+    return digest.hexdigest()
+
+
+class State:
+    input_dir: Path
+    path: Path
+    _layers: Dict[str, LayerState]
+    _durations: Dict[str, float]
+
+    def __init__(self, input_dir: Union[Path, str]) -> None:
+        self.input_dir = Path(input_dir)
+        self.path = get_state_dir(input_dir) / STATE_FILE
+        self._layers, self._durations = self._load()
+        self._lock = threading.Lock()
+        self._changed = False
+
+    def _load(self) -> Tuple[Dict[str, LayerState], Dict[str, float]]:
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return {}, {}
+        try:
+            state = cast(StateDict, json.loads(data))
+            if state['version'] != STATE_VERSION:
+                log.debug('%s: unsupported version, ignoring', self.path)
+                return {}, {}
+            return dict(state['layers']), dict(state.get('durations', {}))
+        except (ValueError, TypeError, KeyError) as exc:
+            log.warning(
+                '%s: malformed state file, ignoring: %s', self.path, exc)
+            return {}, {}
+
+    def is_up_to_date(self, infile: InFile, input_digest: str) -> bool:
+        with self._lock:
+            layer_state = self._layers.get(infile.original_name)
+        if layer_state is None or layer_state['input'] != input_digest:
+            return False
+        output_digest = hash_file(self.input_dir / infile.output_name)
+        return output_digest is not None and (
+            output_digest == layer_state['output'])
+
+    def update(self, infile: InFile, input_digest: str) -> None:
+        output_digest = hash_file(self.input_dir / infile.output_name)
+        with self._lock:
+            self._changed = True
+            if output_digest is None:
+                self._layers.pop(infile.original_name, None)
+            else:
+                self._layers[infile.original_name] = {
+                    'input': input_digest,
+                    'output': output_digest,
+                }
+
+    def get_duration(self, infile: InFile) -> Optional[float]:
+        with self._lock:
+            return self._durations.get(infile.original_name)
+
+    def set_duration(self, infile: InFile, duration: float) -> None:
+        with self._lock:
+            self._changed = True
+            self._durations[infile.original_name] = round(duration, 3)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._changed:
+                return
+            self._changed = False
+            state: StateDict = {
+                'version': STATE_VERSION,
+                'layers': dict(sorted(self._layers.items())),
+                'durations': dict(sorted(self._durations.items())),
+            }
+        ensure_state_dir(self.input_dir)
+        data = json.dumps(state, indent=2).encode()
+        write_atomically(self.path, data)
@@ -1,4 +1,11 @@
+import os
+import re
+import tempfile
 from pathlib import Path
+from typing import Iterator, Union
+
+
+STATE_DIR = '.ptl'
 
 
 def try_relative_to(path: Path, relative_to: Path) -> Path:
@@ -14,3 +21,71 @@ def is_path(name_or_path: str) -> bool:
     # name => False
     # /foo/bar/name, bar/name, ./name => True
     return Path(name_or_path).name != name_or_path
+
+
+_INLINE_COMMENT_REGEX = re.compile(r'\s+#')
+
+
+def iterate_lock_lines(path: Path) -> Iterator[str]:
+    # requirement and option lines of a lock file, without comments, line
+    # continuations and hashes
+    with open(path) as fobj:
+        for line in fobj:
+            line = line.strip()
+            if comment_match := _INLINE_COMMENT_REGEX.search(line):
+                line = line[:comment_match.start()]
+            if line.endswith('\\'):
+                line = line[:-1].rstrip()
+            if not line or line.startswith(('#', '--hash')):
+                continue
+            yield line
+
+
+def _get_umask() -> int:
+    # the umask can only be read by setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# read once on import, since setting the umask is not thread-safe
+_UMASK = _get_umask()
+
+
+def write_atomically(path: Path, data: bytes) -> None:
+    # concurrent readers see either the old or the new content, never
+    # a partially written file; temporary files are created with 0600, thus
+    # the mode of the existing file (or the default one) is restored
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fobj:
+            fobj.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def get_default_cache_dir() -> Path:
+    if cache_home := os.environ.get('XDG_CACHE_HOME'):
+        return Path(cache_home) / 'ptl'
+    return Path.home() / '.cache' / 'ptl'
+
+
+def get_state_dir(input_dir: Union[Path, str]) -> Path:
+    return Path(input_dir) / STATE_DIR
+
+
+def ensure_state_dir(input_dir: Union[Path, str]) -> Path:
+    state_dir = get_state_dir(input_dir)
+    if not state_dir.is_dir():
+        state_dir.mkdir(parents=True, exist_ok=True)
+        # the same trick as pytest and ruff use for their caches
+        (state_dir / '.gitignore').write_text('*\n')
+    return state_dir
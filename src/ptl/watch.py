@@ -0,0 +1,245 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from types import TracebackType
+from typing import Dict, Optional, Set, Tuple, Type, Union
+
+from ._error import Error
+from .infile import is_generated_name
+
+
+log = logging.getLogger(__name__)
+
+
+class WatcherError(Error):
+    pass
+
+
+Signature = Tuple[int, int]
+
+
+def is_watched_name(name: str) -> bool:
+    if name.endswith('.txt'):
+        return True
+    return name.endswith('.in') and not is_generated_name(name)
+
+
+class Watcher(ABC):
+    directory: Path
+    debounce: float
+
+    def __init__(
+        self, directory: Union[Path, str], *, debounce: float = 0.2,
+    ) -> None:
+        self.directory = Path(directory)
+        self.debounce = debounce
+        self._snapshot = self._scan()
+        # input files changed before refresh() are to be reported without
+        # waiting for further events
+        self._pending = False
+
+    def __enter__(self) -> 'Watcher':
+        return self
+
+    def __exit__(
+        self, exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def wait(self) -> Set[str]:
+        # blocks until at least one watched file is changed, created or
+        # deleted; events are collected until there is a quiet period of
+        # `debounce` seconds, so a burst of edits is returned as a single set
+        while True:
+            if self._pending:
+                self._pending = False
+            else:
+                self._wait_for_events(None)
+            while self._wait_for_events(self.debounce):
+                pass
+            if changed := self._diff():
+                return changed
+
+    def refresh(self) -> None:
+        # forgets changes of lock files made so far, i.e., our own lock
+        # writes; input files changed since the last wait() (e.g., saved
+        # while compiling) are still reported by the next wait()
+        self._drain()
+        scan = self._scan()
+        snapshot = {
+            name: signature for name, signature in scan.items()
+            if not name.endswith('.in')
+        }
+        snapshot.update(
+            (name, signature) for name, signature in self._snapshot.items()
+            if name.endswith('.in')
+        )
+        self._snapshot = snapshot
+        self._pending = snapshot != scan
+        self._refreshed(scan)
+
+    def _refreshed(self, scan: Dict[str, Signature]) -> None:
+        pass
+
+    @abstractmethod
+    def _wait_for_events(self, timeout: Optional[float]) -> bool:
+        # returns false if no events were received before the timeout
+        ...
+
+    def _drain(self) -> None:
+        pass
+
+    def _scan(self) -> Dict[str, Signature]:
+        snapshot: Dict[str, Signature] = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not is_watched_name(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _diff(self) -> Set[str]:
+        old, new = self._snapshot, self._scan()
+        self._snapshot = new
+        return {
+            name for name in old.keys() | new.keys()
+            if old.get(name) != new.get(name)
+        }
+
+
+class PollingWatcher(Watcher):
+    interval: float
+
+    def __init__(
+        self, directory: Union[Path, str], *, debounce: float = 0.2,
+        interval: float = 0.5,
+    ) -> None:
+        super().__init__(directory, debounce=debounce)
+        self.interval = interval
+        self._last_scan = self._snapshot
+
+    def _refreshed(self, scan: Dict[str, Signature]) -> None:
+        self._last_scan = scan
+
+    def _wait_for_events(self, timeout: Optional[float]) -> bool:
+        deadline: Optional[float] = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        while True:
+            scan = self._scan()
+            if scan != self._last_scan:
+                self._last_scan = scan
+                return True
+            delay = self.interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+
+
+# see inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_IN_MASK = (
+    _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE
+)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher(Watcher):
+    _fd: Optional[int]
+
+    def __init__(
+        self, directory: Union[Path, str], *, debounce: float = 0.2,
+    ) -> None:
+        self._fd = None
+        if not sys.platform.startswith('linux'):
+            raise WatcherError('inotify is only available on Linux')
+        libc_name = ctypes.util.find_library('c')
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError) as exc:
+            raise WatcherError(f'inotify is not available: {exc}') from exc
+        fd: int = inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise WatcherError(
+                f'inotify_init1: {os.strerror(ctypes.get_errno())}')
+        self._fd = fd
+        path = os.fsencode(Path(directory).resolve())
+        if inotify_add_watch(fd, path, _IN_MASK) < 0:
+            errno = ctypes.get_errno()
+            self.close()
+            raise WatcherError(f'inotify_add_watch: {os.strerror(errno)}')
+        super().__init__(directory, debounce=debounce)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _wait_for_events(self, timeout: Optional[float]) -> bool:
+        assert self._fd is not None
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        # we don't need event details since we rescan the directory anyway,
+        # we only check that there is at least one relevant event
+        return any(is_watched_name(name) for name in self._read_events())
+
+    def _drain(self) -> None:
+        self._read_events()
+
+    def _read_events(self) -> Set[str]:
+        assert self._fd is not None
+        names: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                names.add(os.fsdecode(name))
+
+
+def create_watcher(
+    directory: Union[Path, str], *, debounce: float = 0.2,
+) -> Watcher:
+    try:
+        return InotifyWatcher(directory, debounce=debounce)
+    except WatcherError as exc:
+        log.debug('%s, falling back to polling', exc)
+    return PollingWatcher(directory, debounce=debounce)
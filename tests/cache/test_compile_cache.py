@@ -0,0 +1,100 @@
+import gzip
+import logging
+from typing import Dict, Optional
+
+import pytest
+
+from ptl.cache import CacheBackend, CacheError, CompileCache
+
+
+KEY = 'a' * 64
+
+
+class MemoryBackend(CacheBackend):
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, bytes] = {}
+        self.error: Optional[CacheError] = None
+
+    def get(self, key: str) -> Optional[bytes]:
+        if self.error:
+            raise self.error
+        return self.entries.get(key)
+
+    def put(self, key: str, data: bytes) -> None:
+        if self.error:
+            raise self.error
+        self.entries[key] = data
+
+
+@pytest.fixture
+def backend() -> MemoryBackend:
+    return MemoryBackend()
+
+
+@pytest.fixture
+def cache(backend: MemoryBackend) -> CompileCache:
+    return CompileCache(backend)
+
+
+def test_miss(cache: CompileCache) -> None:
+    assert cache.get(KEY) is None
+
+
+def test_compressed(cache: CompileCache, backend: MemoryBackend) -> None:
+    data = b'foo==1.0\n' * 1000
+
+    cache.put(KEY, data)
+
+    assert len(backend.entries[KEY]) < len(data)
+    assert gzip.decompress(backend.entries[KEY]) == data
+    assert cache.get(KEY) == data
+
+
+def test_corrupted_entry_ignored(
+    cache: CompileCache, backend: MemoryBackend,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    backend.entries[KEY] = b'garbage'
+
+    assert cache.get(KEY) is None
+    assert 'corrupted cache entry' in caplog.text
+
+
+def test_corrupted_deflate_stream_ignored(
+    cache: CompileCache, backend: MemoryBackend,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    # a valid gzip header followed by an invalid deflate block
+    header = gzip.compress(b'', mtime=0)[:10]
+    backend.entries[KEY] = header + b'\xff' * 32
+
+    assert cache.get(KEY) is None
+    assert 'corrupted cache entry' in caplog.text
+
+
+def test_backend_error_ignored(
+    cache: CompileCache, backend: MemoryBackend,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level(logging.WARNING)
+    backend.error = CacheError('unavailable')
+
+    cache.put(KEY, b'data')
+
+    assert cache.get(KEY) is None
+    assert caplog.messages == [
+        'failed to write to cache: unavailable',
+        'failed to read from cache: unavailable',
+    ]
+
+
+def test_incomplete_backend() -> None:
+
+    class GetOnlyBackend(CacheBackend):
+
+        def get(self, key: str) -> Optional[bytes]:
+            return None
+
+    with pytest.raises(TypeError, match='abstract'):
+        GetOnlyBackend()   # type: ignore[abstract]
@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional
+
+from ptl.cache import compute_cache_key
+from ptl.infile import InFile, Reference
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+    command_line = ['/usr/bin/dummy', 'compile']
+
+    def key(
+        self, infile: InFile, command_line: List[str] = command_line,
+        tool_version: str = '1.0', environ: Optional[Dict[str, str]] = None,
+    ) -> str:
+        return compute_cache_key(
+            infile, self.input_dir,
+            command_line=command_line, tool_version=tool_version,
+            environ=environ or {},
+        )
+
+    def test_stable(self) -> None:
+        infile = InFile('base.in')
+        infile.add_dependency('foo')
+
+        assert self.key(infile) == self.key(infile)
+
+    def test_executable_location_ignored(self) -> None:
+        infile = InFile('base.in')
+
+        assert self.key(infile) == self.key(
+            infile, ['/home/user/.venv/bin/dummy', 'compile'])
+
+    def test_tool(self) -> None:
+        infile = InFile('base.in')
+        key = self.key(infile)
+
+        assert self.key(infile, tool_version='2.0') != key
+        assert self.key(infile, ['/usr/bin/dummy', 'compile', '-U']) != key
+        assert self.key(infile, ['/usr/bin/other', 'compile']) != key
+
+    def test_environ(self) -> None:
+        infile = InFile('base.in')
+        key = self.key(infile)
+
+        assert self.key(infile, environ={'HOME': '/home/user'}) == key
+        assert self.key(
+            infile, environ={'PIP_INDEX_URL': 'http://index'}) != key
+        assert self.key(infile, environ={'UV_PRERELEASE': 'allow'}) != key
+
+    def test_referenced_locks(self) -> None:
+        parent = InFile('parent.in')
+        child = InFile('child.in')
+        child.add_reference(Reference('c', parent))
+        missing = self.key(child)
+        self.create_file('parent.txt', 'foo==1.0')
+        existing = self.key(child)
+        self.create_file('parent.txt', 'foo==2.0')
+        changed = self.key(child)
+
+        assert len({missing, existing, changed}) == 3
+
+    def test_existing_output(self) -> None:
+        infile = InFile('base.in')
+        missing = self.key(infile)
+        self.create_file('base.txt', 'foo==1.0')
+
+        assert self.key(infile) != missing
+
+    def test_provenance_headers_ignored(self) -> None:
+        parent = InFile('parent.in')
+        child = InFile('child.in')
+        child.add_reference(Reference('c', parent))
+        self.create_file('parent.txt', 'foo==1.0\n')
+        self.create_file('child.txt', 'foo==1.0\nbar==1.0\n')
+        key = self.key(child)
+        header = f'# ptl provenance v1 input={"0" * 64} references={"1" * 64}'
+        for name in ['parent.txt', 'child.txt']:
+            path = self.input_dir / name
+            path.write_text(f'{header}\n{path.read_text()}')
+
+        assert self.key(child) == key
@@ -0,0 +1,66 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from ptl.cache import CacheError, FileSystemBackend
+
+
+KEY_1 = 'a' * 64
+KEY_2 = 'b' * 64
+KEY_3 = 'c' * 64
+
+
+@pytest.fixture
+def backend(tmp_path: Path) -> FileSystemBackend:
+    return FileSystemBackend(tmp_path / 'cache')
+
+
+def set_mtime(backend: FileSystemBackend, key: str, mtime: int) -> None:
+    path = backend.directory / key[:2] / f'{key}.gz'
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_miss(backend: FileSystemBackend) -> None:
+    assert backend.get(KEY_1) is None
+
+
+def test_put_and_get(backend: FileSystemBackend) -> None:
+    backend.put(KEY_1, b'data')
+
+    assert backend.get(KEY_1) == b'data'
+    assert backend.get(KEY_2) is None
+    assert (backend.directory / 'aa' / f'{KEY_1}.gz').is_file()
+
+
+def test_lru_eviction(backend: FileSystemBackend) -> None:
+    data = os.urandom(1000)
+    backend.put(KEY_1, data)
+    backend.put(KEY_2, data)
+    set_mtime(backend, KEY_1, 1_000_000_000)
+    set_mtime(backend, KEY_2, 2_000_000_000)
+    # the access updates mtime, KEY_2 is the least recently used now
+    assert backend.get(KEY_1) == data
+    backend.max_size = 2500
+
+    backend.put(KEY_3, data)
+
+    assert backend.get(KEY_1) == data
+    assert backend.get(KEY_2) is None
+    assert backend.get(KEY_3) == data
+
+
+def test_no_eviction_under_max_size(backend: FileSystemBackend) -> None:
+    backend.put(KEY_1, b'foo')
+    backend.put(KEY_2, b'bar')
+
+    assert backend.get(KEY_1) == b'foo'
+    assert backend.get(KEY_2) == b'bar'
+
+
+def test_error(tmp_path: Path) -> None:
+    (tmp_path / 'file').touch()
+    backend = FileSystemBackend(tmp_path / 'file')
+
+    with pytest.raises(CacheError):
+        backend.put(KEY_1, b'data')
@@ -0,0 +1,111 @@
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+import pytest
+
+from ptl.cache import CacheError, HTTPBackend
+
+
+KEY = 'a' * 64
+
+
+class Server(ThreadingHTTPServer):
+    entries: Dict[str, bytes]
+    requests: List[str]
+    error: Optional[HTTPStatus] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host!s}:{port}/cache/'
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: Server
+
+    def do_GET(self) -> None:
+        self.server.requests.append(f'GET {self.path}')
+        if self.server.error:
+            self.send_error(self.server.error)
+            return
+        data = self.server.entries.get(self.path)
+        if data is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self) -> None:
+        self.server.requests.append(f'PUT {self.path}')
+        if self.server.error:
+            self.send_error(self.server.error)
+            return
+        length = int(self.headers['Content-Length'])
+        self.server.entries[self.path] = self.rfile.read(length)
+        self.send_response(HTTPStatus.CREATED)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server() -> Iterator[Server]:
+    server = Server(('127.0.0.1', 0), Handler)
+    server.entries = {}
+    server.requests = []
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={'poll_interval': 0.01},
+        daemon=True,
+    )
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_miss(server: Server) -> None:
+    backend = HTTPBackend(server.url)
+
+    assert backend.get(KEY) is None
+    assert server.requests == [f'GET /cache/{KEY}.gz']
+
+
+def test_put_and_get(server: Server) -> None:
+    backend = HTTPBackend(server.url)
+
+    backend.put(KEY, b'data')
+
+    assert server.entries == {f'/cache/{KEY}.gz': b'data'}
+    assert backend.get(KEY) == b'data'
+    assert server.requests == [
+        f'PUT /cache/{KEY}.gz',
+        f'GET /cache/{KEY}.gz',
+    ]
+
+
+def test_error_server(server: Server) -> None:
+    backend = HTTPBackend(server.url)
+    server.error = HTTPStatus.INTERNAL_SERVER_ERROR
+
+    with pytest.raises(CacheError, match='500'):
+        backend.get(KEY)
+    with pytest.raises(CacheError, match='500'):
+        backend.put(KEY, b'data')
+
+
+def test_error_connection(server: Server) -> None:
+    backend = HTTPBackend(server.url, timeout=1)
+    server.shutdown()
+    server.server_close()
+
+    with pytest.raises(CacheError, match='GET'):
+        backend.get(KEY)
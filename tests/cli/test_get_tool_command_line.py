@@ -1,4 +1,5 @@
-from unittest.mock import Mock
+from pathlib import Path
+from unittest.mock import ANY, Mock
 
 import pytest
 
@@ -10,9 +11,10 @@ from ptl.providers import (
 
 
 @pytest.fixture
-def config_mock() -> Mock:
+def config_mock(tmp_path: Path) -> Mock:
     mock = Mock(spec_set=Config)
     mock.get_tool.return_value = None
+    mock.cache_directory = tmp_path / 'cache'
     return mock
 
 
@@ -20,15 +22,18 @@ def parse_args(*args: str) -> Args:
     return build_parser().parse_args(args, namespace=Args())
 
 
-@pytest.mark.parametrize(['command', 'flag', 'expected_command_line'], [
-    ('compile', '--pip-tools', 'pip-compile'),
-    ('compile', '--uv', 'uv pip compile'),
-    ('sync', '--pip-tools', 'pip-sync'),
-    ('sync', '--uv', 'uv pip sync'),
-])
+@pytest.mark.parametrize(
+    ['command', 'flag', 'expected_command_line', 'expected_provider'], [
+        ('compile', '--pip-tools', 'pip-compile', Provider.PIP_TOOLS),
+        ('compile', '--uv', 'uv pip compile', Provider.UV),
+        ('sync', '--pip-tools', 'pip-sync', Provider.PIP_TOOLS),
+        ('sync', '--uv', 'uv pip sync', Provider.UV),
+    ],
+)
 def test_tool_provider_from_args(
     monkeypatch: pytest.MonkeyPatch, config_mock: Mock,
     command: str, flag: str, expected_command_line: str,
+    expected_provider: Provider,
 ) -> None:
     check_tool_version_mock = Mock(
         spec_set=check_tool_version,
@@ -37,11 +42,15 @@ def test_tool_provider_from_args(
     monkeypatch.setattr('ptl.cli.check_tool_version', check_tool_version_mock)
     args = parse_args(command, flag)
 
-    command_line = get_tool_command_line(config_mock, args)
+    command_line, version, provider = get_tool_command_line(
+        config_mock, args)
 
     assert command_line == ['/path/to/tool', command]
+    assert version == f'{command} 0.0.1'
+    assert provider is expected_provider
     config_mock.get_tool.assert_not_called()
-    check_tool_version_mock.assert_called_once_with(expected_command_line)
+    check_tool_version_mock.assert_called_once_with(
+        expected_command_line, cache=ANY)
 
 
 def test_custom_tool_from_args(
@@ -55,9 +64,12 @@ def test_custom_tool_from_args(
         'ptl.cli.process_command_line', process_command_line_mock)
     args = parse_args('compile', '--tool="dummy compile"')
 
-    command_line = get_tool_command_line(config_mock, args)
+    command_line, version, provider = get_tool_command_line(
+        config_mock, args)
 
     assert command_line == ['/path/to/dummy', 'compile']
+    assert version is None
+    assert provider is None
     config_mock.get_tool.assert_not_called()
     process_command_line_mock.assert_called_once_with('"dummy compile"')
 
@@ -80,11 +92,15 @@ def test_tool_provider_from_config(
     monkeypatch.setattr('ptl.cli.check_tool_version', check_tool_version_mock)
     args = parse_args(command)
 
-    command_line = get_tool_command_line(config_mock, args)
+    command_line, version, _provider = get_tool_command_line(
+        config_mock, args)
 
     assert command_line == ['/path/to/tool', command]
+    assert version == f'{command} 0.0.1'
+    assert _provider is provider
     config_mock.get_tool.assert_called_once_with(Tool(command))
-    check_tool_version_mock.assert_called_once_with(expected_command_line)
+    check_tool_version_mock.assert_called_once_with(
+        expected_command_line, cache=ANY)
 
 
 def test_custom_tool_from_config(
@@ -99,9 +115,12 @@ def test_custom_tool_from_config(
         'ptl.cli.process_command_line', process_command_line_mock)
     args = parse_args('sync')
 
-    command_line = get_tool_command_line(config_mock, args)
+    command_line, version, provider = get_tool_command_line(
+        config_mock, args)
 
     assert command_line == ['/path/to/dummy', 'sync']
+    assert version is None
+    assert provider is None
     config_mock.get_tool.assert_called_once_with(Tool.SYNC)
     process_command_line_mock.assert_called_once_with('dummy sync')
 
@@ -116,13 +135,21 @@ def test_autodiscovery(
 ) -> None:
     find_tool_mock = Mock(
         spec_set=find_tool,
-        return_value=(['/path/to/uv', 'pip', command], f'pip {command} 0.0.1'),
+        return_value=(
+            ['/path/to/uv', 'pip', command], f'pip {command} 0.0.1',
+            Provider.UV,
+        ),
     )
     monkeypatch.setattr('ptl.cli.find_tool', find_tool_mock)
     args = parse_args(command)
 
-    command_line = get_tool_command_line(config_mock, args)
+    command_line, version, provider = get_tool_command_line(
+        config_mock, args)
 
     assert command_line == ['/path/to/uv', 'pip', command]
+    assert version == f'pip {command} 0.0.1'
+    assert provider is Provider.UV
     config_mock.get_tool.assert_called_once_with(expected_tool)
-    find_tool_mock.assert_called_once_with(expected_tool)
+    find_tool_mock.assert_called_once_with(expected_tool, cache=ANY)
+    cache = find_tool_mock.call_args.kwargs['cache']
+    assert cache.path == config_mock.cache_directory / 'tools.json'
@@ -0,0 +1,113 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+
+# wall-clock import times are too noisy to be asserted on, the set of
+# imported modules is what actually determines the startup time, hence
+# the test fails as soon as any of these is imported on the startup path
+HEAVY_MODULES = [
+    'asyncio',
+    'gzip',
+    'sqlite3',
+    'subprocess',
+    'tomli',
+    'tomllib',
+    'urllib.request',
+]
+
+STARTUP_MODULES = [
+    'ptl',
+    'ptl._error',
+    'ptl.cli',
+    'ptl.commands',
+    'ptl.compat',
+    'ptl.config',
+    'ptl.fs',
+    'ptl.providers',
+    'ptl.utils',
+]
+
+
+def get_import_times(
+    code: str, cwd: Path, env: Optional[Mapping[str, str]] = None,
+) -> Dict[str, int]:
+    # module names mapped to their cumulative import times in microseconds;
+    # modules imported with importlib.import_module() are not reported
+    # (e.g., command modules), but modules imported by them are
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=cwd, capture_output=True, text=True, check=True,
+        env={**os.environ, **(env or {})},
+    )
+    import_times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        if cumulative.strip().isdigit():
+            import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+def get_ptl_modules(import_times: Dict[str, int]) -> List[str]:
+    return sorted(
+        name for name in import_times
+        if name == 'ptl' or name.startswith('ptl.')
+    )
+
+
+def test_import_cli(tmp_path: Path) -> None:
+    import_times = get_import_times('import ptl.cli', tmp_path)
+
+    assert get_ptl_modules(import_times) == STARTUP_MODULES
+    assert not import_times.keys() & set(HEAVY_MODULES)
+
+
+def test_version(tmp_path: Path) -> None:
+    import_times = get_import_times(
+        'from ptl.cli import main; main(["--version"])', tmp_path)
+
+    assert get_ptl_modules(import_times) == STARTUP_MODULES
+    assert not import_times.keys() & set(HEAVY_MODULES)
+
+
+def test_show(tmp_path: Path) -> None:
+    input_dir = tmp_path / 'requirements'
+    input_dir.mkdir()
+    (input_dir / 'main.in').write_text('foo\n')
+    (input_dir / 'dev.in').write_text('-c main.txt\nbar\n')
+
+    import_times = get_import_times(
+        'from ptl.cli import main; main(["show"])', tmp_path)
+
+    assert get_ptl_modules(import_times) == sorted([
+        *STARTUP_MODULES,
+        'ptl.graph',
+        'ptl.infile',
+        'ptl.layer',
+    ])
+    assert not import_times.keys() & set(HEAVY_MODULES)
+
+
+def test_compile_without_cache(tmp_path: Path) -> None:
+    input_dir = tmp_path / 'requirements'
+    input_dir.mkdir()
+    (input_dir / 'main.in').write_text('foo\n')
+    cache_dir = tmp_path / 'cache'
+
+    import_times = get_import_times(
+        'from ptl.cli import main; main(["compile", "--no-cache"])',
+        tmp_path, env={
+            'PTL_TOOL': ':simulated:',
+            'XDG_CACHE_HOME': str(cache_dir),
+        },
+    )
+
+    assert (input_dir / 'main.txt').exists()
+    assert 'ptl.cache' not in import_times
+    assert 'urllib.request' not in import_times
+    # the tool version cache is disabled too
+    assert not cache_dir.exists()
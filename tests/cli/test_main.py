@@ -6,9 +6,13 @@ from unittest.mock import Mock
 import pytest
 
 from ptl import commands
+from ptl.cache import (
+    CacheBackendType, CompileCache, FileSystemBackend, HTTPBackend,
+)
 from ptl.cli import configure_logging, do_main, get_tool_command_line, main
 from ptl.config import Config
 from ptl.exceptions import InputDirectoryError
+from ptl.providers import Provider, Tool
 
 
 @pytest.fixture
@@ -18,6 +22,12 @@ def config_mock(monkeypatch: pytest.MonkeyPatch) -> Mock:
     monkeypatch.setattr('ptl.cli.Config', mock)
     mock.directory = None
     mock.verbosity = 0
+    mock.jobs = 1
+    mock.cache_enabled = False
+    mock.cache_backend = CacheBackendType.FILESYSTEM
+    mock.cache_url = None
+    mock.cache_directory = None
+    mock.cache_max_size = None
     mock.get_tool.return_value = None
     mock.get_tool_options.return_value = None
     return mock
@@ -27,7 +37,7 @@ def config_mock(monkeypatch: pytest.MonkeyPatch) -> Mock:
 def get_tool_command_line_mock(monkeypatch: pytest.MonkeyPatch) -> Mock:
     mock = Mock(
         spec_set=get_tool_command_line,
-        return_value=['/path/to/dummy', 'command'],
+        return_value=(['/path/to/dummy', 'command'], 'dummy 1.0', None),
     )
     monkeypatch.setattr('ptl.cli.get_tool_command_line', mock)
     return mock
@@ -47,6 +57,13 @@ def compile_mock(monkeypatch: pytest.MonkeyPatch) -> Mock:
     return mock
 
 
+@pytest.fixture
+def stats_mock(monkeypatch: pytest.MonkeyPatch) -> Mock:
+    mock = Mock(spec_set=commands.stats)
+    monkeypatch.setattr(commands, 'stats', mock)
+    return mock
+
+
 @pytest.fixture
 def show_mock(monkeypatch: pytest.MonkeyPatch) -> Mock:
     mock = Mock(spec_set=commands.show)
@@ -54,6 +71,13 @@ def show_mock(monkeypatch: pytest.MonkeyPatch) -> Mock:
     return mock
 
 
+@pytest.fixture
+def check_mock(monkeypatch: pytest.MonkeyPatch) -> Mock:
+    mock = Mock(spec_set=commands.check)
+    monkeypatch.setattr(commands, 'check', mock)
+    return mock
+
+
 def test_error_reporing(
     caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch,
 ) -> None:
@@ -137,46 +161,48 @@ def test_config_call(
 @pytest.mark.parametrize(
     [
         'command_line', 'config_directory', 'config_tool_options',
-        'expected_command_line', 'expected_input_dir',
-        'expected_layers', 'expected_include_parent_layers',
+        'expected_command_line', 'expected_verbosity_options',
+        'expected_input_dir', 'expected_layers',
+        'expected_include_parent_layers',
     ], [
         (
             ['compile'], None, None,
-            [], None, None, True,
+            [], [], None, None, True,
         ),
+
         (
             # --only without layers ignored
             ['compile', '-q', '-q', '--only', '--foo'], None, [],
-            ['-qq', '--foo'], None, None, True,
+            ['--foo'], ['-qq'], None, None, True,
         ),
         (
             ['compile', '--only', 'dev', 'main'], Path('reqs'), None,
-            [], Path('reqs'), ['dev', 'main'], False,
+            [], [], Path('reqs'), ['dev', 'main'], False,
         ),
         (
             ['compile', '--verbose', '-d', 'reqs', 'dev'], Path('ignored'),
             None,
-            ['-v'], 'reqs', ['dev'], True,
+            [], ['-v'], 'reqs', ['dev'], True,
         ),
         (
             # tool options from config
             ['compile'], None, ['-x', '--dry-run'],
-            ['-x', '--dry-run'], None, None, True,
+            ['-x', '--dry-run'], [], None, None, True,
         ),
         (
             # tool options from extra args, config ignored
             ['compile', '-Y'], None, ['-x', '--dry-run'],
-            ['-Y'], None, None, True,
+            ['-Y'], [], None, None, True,
         ),
         (
             # extra args with layers
             ['compile', '--quiet', 'dev', 'main', '-P', 'pytest'], None, None,
-            ['-q', '-P', 'pytest'], None, ['dev', 'main'], True,
+            ['-P', 'pytest'], ['-q'], None, ['dev', 'main'], True,
         ),
         (
             # extra args without layers
             ['compile', '-v', '-v', '-P', 'pytest'], None, None,
-            ['-vv', '-P', 'pytest'], None, None, True,
+            ['-P', 'pytest'], ['-vv'], None, None, True,
         ),
     ]
 )
@@ -184,24 +210,180 @@ def test_compile_call(
     config_mock: Mock, get_tool_command_line_mock: Mock, compile_mock: Mock,
     command_line: List[str], config_directory: Optional[Path],
     config_tool_options: Optional[List[str]], expected_command_line: List[str],
+    expected_verbosity_options: List[str],
     expected_input_dir: Union[Path, str, None],
     expected_layers: Optional[List[str]], expected_include_parent_layers: bool,
 ) -> None:
     config_mock.directory = config_directory
     config_mock.get_tool_options.return_value = config_tool_options
     _expected_command_line = (
-        get_tool_command_line_mock.return_value + expected_command_line)
+        get_tool_command_line_mock.return_value[0] + expected_command_line)
 
     main(command_line)
 
     compile_mock.assert_called_once_with(
         command_line=_expected_command_line,
+        verbosity_options=expected_verbosity_options,
         input_dir=expected_input_dir,
         layers=expected_layers,
         include_parent_layers=expected_include_parent_layers,
+        include_dependent_layers=False,
+        jobs=1,
+        tool_version='dummy 1.0',
+        force=False,
+        watch=False,
+        cache=None,
+        keep_going=False,
+        use_stdin=False,
+        merge_constraints=False,
     )
 
 
+@pytest.mark.parametrize(['command_line', 'config_jobs', 'expected_jobs'], [
+    (['compile'], 1, 1),
+    (['compile'], 4, 4),
+    (['compile', '--jobs', '2'], 4, 2),
+    (['compile', '-j8'], 1, 8),
+])
+@pytest.mark.usefixtures('get_tool_command_line_mock')
+def test_compile_jobs(
+    config_mock: Mock, compile_mock: Mock,
+    command_line: List[str], config_jobs: int, expected_jobs: int,
+) -> None:
+    config_mock.jobs = config_jobs
+
+    main(command_line)
+
+    compile_mock.assert_called_once()
+    assert compile_mock.call_args.kwargs['jobs'] == expected_jobs
+
+
+@pytest.mark.parametrize(
+    [
+        'command_line', 'expected_include_parent_layers',
+        'expected_include_dependent_layers',
+    ], [
+        (['compile', 'base'], True, False),
+        (['compile', '--with-dependents', 'base'], False, True),
+        # --with-dependents without layers ignored
+        (['compile', '--with-dependents'], True, False),
+    ],
+)
+@pytest.mark.usefixtures('config_mock', 'get_tool_command_line_mock')
+def test_compile_with_dependents(
+    compile_mock: Mock, command_line: List[str],
+    expected_include_parent_layers: bool,
+    expected_include_dependent_layers: bool,
+) -> None:
+    main(command_line)
+
+    compile_mock.assert_called_once()
+    kwargs = compile_mock.call_args.kwargs
+    assert kwargs['include_parent_layers'] is expected_include_parent_layers
+    assert kwargs['include_dependent_layers'] is (
+        expected_include_dependent_layers)
+
+
+@pytest.mark.parametrize(['command_line', 'option', 'expected_value'], [
+    (['compile'], 'force', False),
+    (['compile', '--force'], 'force', True),
+    (['compile', '-f', 'dev'], 'force', True),
+    (['compile'], 'watch', False),
+    (['compile', '--watch'], 'watch', True),
+    (['compile', '-w', 'dev'], 'watch', True),
+    (['compile'], 'keep_going', False),
+    (['compile', '--keep-going'], 'keep_going', True),
+    (['compile', '-k', 'dev'], 'keep_going', True),
+    (['compile'], 'merge_constraints', False),
+    (['compile', '--merge-constraints'], 'merge_constraints', True),
+])
+@pytest.mark.usefixtures('config_mock', 'get_tool_command_line_mock')
+def test_compile_flags(
+    compile_mock: Mock, command_line: List[str], option: str,
+    expected_value: bool,
+) -> None:
+    main(command_line)
+
+    compile_mock.assert_called_once()
+    assert compile_mock.call_args.kwargs[option] is expected_value
+
+
+@pytest.mark.parametrize(['provider', 'expected_use_stdin'], [
+    (None, False),
+    (Provider.PIP_TOOLS, False),
+    (Provider.UV, True),
+    (Provider({Tool.COMPILE: 'dummy', Tool.SYNC: 'dummy'}), False),
+])
+@pytest.mark.usefixtures('config_mock')
+def test_compile_use_stdin(
+    get_tool_command_line_mock: Mock, compile_mock: Mock,
+    provider: Optional[Provider], expected_use_stdin: bool,
+) -> None:
+    get_tool_command_line_mock.return_value = (
+        ['/path/to/dummy', 'compile'], 'dummy 1.0', provider)
+
+    main(['compile'])
+
+    compile_mock.assert_called_once()
+    assert compile_mock.call_args.kwargs['use_stdin'] is expected_use_stdin
+
+
+@pytest.mark.parametrize(['command_line', 'config_enabled', 'expected'], [
+    (['compile'], False, False),
+    (['compile'], True, True),
+    (['compile', '--cache'], False, True),
+    (['compile', '--no-cache'], True, False),
+])
+@pytest.mark.usefixtures('get_tool_command_line_mock')
+def test_compile_cache(
+    config_mock: Mock, compile_mock: Mock, tmp_path: Path,
+    command_line: List[str], config_enabled: bool, expected: bool,
+) -> None:
+    config_mock.cache_enabled = config_enabled
+    config_mock.cache_directory = tmp_path
+    config_mock.cache_max_size = 16
+
+    main(command_line)
+
+    compile_mock.assert_called_once()
+    cache = compile_mock.call_args.kwargs['cache']
+    if expected:
+        assert isinstance(cache, CompileCache)
+        backend = cache.backend
+        assert isinstance(backend, FileSystemBackend)
+        assert backend.directory == tmp_path
+        assert backend.max_size == 16 * 1024 * 1024
+    else:
+        assert cache is None
+
+
+@pytest.mark.usefixtures('get_tool_command_line_mock')
+def test_compile_cache_http(
+    config_mock: Mock, compile_mock: Mock,
+) -> None:
+    config_mock.cache_backend = CacheBackendType.HTTP
+    config_mock.cache_url = 'http://cache.local/ptl/'
+
+    main(['compile', '--cache'])
+
+    cache = compile_mock.call_args.kwargs['cache']
+    assert isinstance(cache, CompileCache)
+    assert isinstance(cache.backend, HTTPBackend)
+    assert cache.backend.url == 'http://cache.local/ptl'
+
+
+@pytest.mark.usefixtures('get_tool_command_line_mock', 'compile_mock')
+def test_compile_cache_http_no_url(
+    config_mock: Mock, caplog: pytest.LogCaptureFixture,
+) -> None:
+    config_mock.cache_backend = CacheBackendType.HTTP
+
+    with pytest.raises(SystemExit):
+        main(['compile', '--cache'])
+
+    assert 'cache url is required' in caplog.text
+
+
 @pytest.mark.parametrize(
     [
         'command_line', 'config_directory', 'config_tool_options',
@@ -266,7 +448,7 @@ def test_sync_call(
     config_mock.directory = config_directory
     config_mock.get_tool_options.return_value = config_tool_options
     _expected_command_line = (
-        get_tool_command_line_mock.return_value + expected_command_line)
+        get_tool_command_line_mock.return_value[0] + expected_command_line)
 
     main(command_line)
 
@@ -320,3 +502,60 @@ def test_show_call(
         layers=expected_layers,
         include_parent_layers=expected_include_parent_layers,
     )
+
+
+@pytest.mark.parametrize(
+    [
+        'command_line', 'config_directory', 'expected_input_dir',
+        'expected_layers', 'expected_include_parent_layers',
+    ], [
+        (
+            ['check'], Path('path/to/reqs'),
+            Path('path/to/reqs'), None, True,
+        ),
+        (
+            ['check', '-d', './req', '--only', 'dev'], Path('ignored'),
+            './req', ['dev'], False,
+        ),
+    ]
+)
+def test_check_call(
+    config_mock: Mock, check_mock: Mock, command_line: List[str],
+    config_directory: Optional[Path],
+    expected_input_dir: Union[Path, str, None],
+    expected_layers: Optional[List[str]], expected_include_parent_layers: bool,
+) -> None:
+    config_mock.directory = config_directory
+
+    main(command_line)
+
+    check_mock.assert_called_once_with(
+        input_dir=expected_input_dir,
+        layers=expected_layers,
+        include_parent_layers=expected_include_parent_layers,
+    )
+
+
+@pytest.mark.parametrize(
+    [
+        'command_line', 'config_directory', 'expected_input_dir',
+        'expected_limit',
+    ],
+    [
+        (['stats'], None, None, None),
+        (['stats', '-n', '5'], Path('path/to/reqs'), Path('path/to/reqs'), 5),
+        (['stats', '-d', './req', '--limit=1'], Path('ignored'), './req', 1),
+    ]
+)
+def test_stats_call(
+    config_mock: Mock, stats_mock: Mock, command_line: List[str],
+    config_directory: Optional[Path],
+    expected_input_dir: Union[Path, str, None],
+    expected_limit: Optional[int],
+) -> None:
+    config_mock.directory = config_directory
+
+    main(command_line)
+
+    stats_mock.assert_called_once_with(
+        input_dir=expected_input_dir, limit=expected_limit)
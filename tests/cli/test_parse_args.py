@@ -20,9 +20,34 @@ DEFAULTS: Dict[str, Any] = dict(   # type: ignore[misc]
     extra_args=list,
 )
 
+COMPILE_DEFAULTS: Dict[str, Any] = dict(   # type: ignore[misc]
+    include_dependent_layers=False,
+    jobs=None,
+    force=False,
+    watch=False,
+    keep_going=False,
+    merge_constraints=False,
+    use_cache=None,
+)
+
+
+STATS_DEFAULTS: Dict[str, Any] = dict(   # type: ignore[misc]
+    limit=None,
+)
+
 
 def set_defaults(args: Args) -> None:
-    for key, value in DEFAULTS.items():
+    defaults = DEFAULTS
+    if args.command == 'compile':
+        defaults = {**defaults, **COMPILE_DEFAULTS}
+    elif args.command == 'stats':
+        # no tool selection for stats
+        defaults = {
+            key: value for key, value in defaults.items()
+            if key not in ['use_uv', 'use_pip_tools', 'custom_tool']
+        }
+        defaults.update(STATS_DEFAULTS)
+    for key, value in defaults.items():
         try:
             getattr(args, key)
             continue
@@ -83,6 +108,50 @@ def set_defaults(args: Args) -> None:
         ),
         id='anything-after-extra-args-is-extra-arg',
     ),
+    pytest.param(
+        ['compile', '-j', '4', '--jobs=2', 'dev', '-P', 'tox'], ['-P', 'tox'],
+        Args(
+            command='compile',
+            layers=['dev'],
+            jobs=2,
+        ),
+        id='jobs',
+    ),
+    pytest.param(
+        ['compile', '--with-dependents', 'base'], [],
+        Args(
+            command='compile',
+            layers=['base'],
+            include_dependent_layers=True,
+        ),
+        id='with-dependents',
+    ),
+    pytest.param(
+        ['compile', '-w', '-f', '--with-dependents', 'base'], [],
+        Args(
+            command='compile',
+            layers=['base'],
+            include_dependent_layers=True,
+            force=True,
+            watch=True,
+        ),
+        id='watch-and-force',
+    ),
+    pytest.param(
+        ['compile', '--cache'], [],
+        Args(command='compile', use_cache=True),
+        id='cache',
+    ),
+    pytest.param(
+        ['compile', '--no-cache', 'dev'], [],
+        Args(command='compile', layers=['dev'], use_cache=False),
+        id='no-cache',
+    ),
+    pytest.param(
+        ['compile', '-k', '-j4'], [],
+        Args(command='compile', keep_going=True, jobs=4),
+        id='keep-going',
+    ),
     pytest.param(
         ['sync', '-c', 'path/to/config.toml', '-d', 'path/to/reqs'],
         [],
@@ -103,6 +172,11 @@ def set_defaults(args: Args) -> None:
         ),
         id='no-config-and-custom-tool',
     ),
+    pytest.param(
+        ['stats', '-n', '5'], [],
+        Args(command='stats', limit=5),
+        id='stats-limit',
+    ),
 ])
 def test(
     args: List[str], expected_extra_args: List[str], expected_args: Args,
@@ -141,3 +215,26 @@ def test_py311_and_newer(
 
     assert vars(parsed_args) == vars(expected_args)
     assert extra_args == expected_extra_args
+
+
+def test_only_and_with_dependents_mutually_exclusive(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    parser = build_parser()
+
+    with pytest.raises(SystemExit):
+        parse_args(parser, ['compile', '--only', '--with-dependents', 'base'])
+
+    assert 'not allowed with argument' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('value', ['0', '-1', 'x'])
+def test_jobs_invalid(
+    capsys: pytest.CaptureFixture[str], value: str,
+) -> None:
+    parser = build_parser()
+
+    with pytest.raises(SystemExit):
+        parse_args(parser, ['compile', '--jobs', value])
+
+    assert 'argument -j/--jobs' in capsys.readouterr().err
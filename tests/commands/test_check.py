@@ -0,0 +1,133 @@
+import logging
+from pathlib import Path
+from typing import List, Optional, Union
+from unittest.mock import Mock
+
+import pytest
+
+from ptl import engine
+from ptl.commands import check, compile
+from ptl.exceptions import CheckError, InputDirectoryError, LayerFileError
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+    command_line = ['dummy', 'compile']
+
+    @pytest.fixture(autouse=True)
+    def setup(
+        self, base_setup: None, monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        monkeypatch.chdir(self.input_dir)
+        self.check_call_mock = Mock(
+            spec_set=engine.check_call, side_effect=self.write_output)
+        monkeypatch.setattr(engine, 'check_call', self.check_call_mock)
+        self.capsys = capsys
+
+    def write_output(
+        self, cmd: List[Union[str, Path]], prefix: Optional[str] = None,
+    ) -> None:
+        input_file, output_file = cmd[-3], cmd[-1]
+        content = (self.input_dir / input_file).read_text()
+        (self.input_dir / output_file).write_text(f'# {content}')
+
+    def prepare_files(self) -> None:
+        self.create_file('base.in', 'foo')
+        self.create_file('mid.in', '-c base\nbar')
+        self.create_file('top.in', '-r mid\nbaz')
+        self.create_file('other.in', 'qux')
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+        self.capsys.readouterr()
+        self.check_call_mock.reset_mock()
+
+    def get_output(self) -> List[str]:
+        return self.capsys.readouterr().out.splitlines()
+
+    def test_up_to_date(self, caplog: pytest.LogCaptureFixture) -> None:
+        caplog.set_level(logging.INFO)
+        self.prepare_files()
+
+        check(input_dir=self.input_dir)
+
+        assert self.get_output() == []
+        assert caplog.messages[-1] == 'all locks are up to date'
+        self.check_call_mock.assert_not_called()
+
+    def test_input_changed(self) -> None:
+        self.prepare_files()
+        self.create_file('mid.in', '-c base\nbar>1')
+
+        with pytest.raises(
+            CheckError, match=r'^stale locks: mid\.txt, top\.txt$',
+        ):
+            check(input_dir=self.input_dir)
+
+        assert self.get_output() == [
+            'mid.txt: input changed',
+            'top.txt: referenced locks are stale: mid.txt',
+        ]
+        self.check_call_mock.assert_not_called()
+
+    def test_referenced_lock_changed(self) -> None:
+        self.prepare_files()
+        self.create_file('base.txt', 'foo==2.0\n')
+
+        with pytest.raises(CheckError):
+            check(input_dir=self.input_dir)
+
+        # base.txt itself has no header now
+        assert self.get_output() == [
+            'base.txt: no provenance header',
+            'mid.txt: referenced locks changed; '
+            'referenced locks are stale: base.txt',
+            'top.txt: referenced locks changed; '
+            'referenced locks are stale: base.txt, mid.txt',
+        ]
+
+    def test_lock_not_found(self) -> None:
+        self.prepare_files()
+        (self.input_dir / 'other.txt').unlink()
+
+        with pytest.raises(CheckError, match=r'^stale locks: other\.txt$'):
+            check(input_dir=self.input_dir)
+
+        assert self.get_output() == ['other.txt: lock not found']
+
+    def test_up_to_date_after_compile(self) -> None:
+        self.prepare_files()
+        self.create_file('base.in', 'foo>1')
+        with pytest.raises(CheckError):
+            check(input_dir=self.input_dir)
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+        check(input_dir=self.input_dir)
+
+    def test_specified_layers(self) -> None:
+        self.prepare_files()
+        self.create_file('base.in', 'foo>1')
+        self.create_file('other.in', 'qux>1')
+
+        with pytest.raises(CheckError):
+            check(input_dir=self.input_dir, layers=['mid'])
+
+        assert self.get_output() == [
+            'base.txt: input changed',
+            'mid.txt: referenced locks are stale: base.txt',
+        ]
+
+        check(
+            input_dir=self.input_dir, layers=['mid'],
+            include_parent_layers=False,
+        )
+
+    def test_error_no_infiles(self) -> None:
+        with pytest.raises(InputDirectoryError, match=r'no \*\.in files'):
+            check(input_dir=self.input_dir)
+
+    def test_error_layer_not_found(self) -> None:
+        self.prepare_files()
+
+        with pytest.raises(LayerFileError):
+            check(input_dir=self.input_dir, layers=['missing'])
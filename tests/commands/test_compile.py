@@ -1,6 +1,9 @@
+import asyncio
+import importlib
 import subprocess
+import threading
 from pathlib import Path
-from typing import Union
+from typing import Callable, Iterable, List, Optional, Set, Union
 from unittest.mock import Mock
 from unittest.mock import (
     _Call as MockCall,  # pyright: ignore[reportPrivateUsage]
@@ -9,8 +12,15 @@ from unittest.mock import call
 
 import pytest
 
+from ptl import engine
+from ptl.cache import CacheBackend, CompileCache, FileSystemBackend
 from ptl.commands import compile
-from ptl.exceptions import CompileError
+from ptl.exceptions import CompileError, ConstraintsError
+from ptl.history import History
+from ptl.infile import InFile, read_infiles
+from ptl.provenance import check_provenance, read_lock
+from ptl.providers import Provider, Tool, process_command_line
+from ptl.state import State, compute_input_digest
 
 from tests.testlib import InFileTestSuiteBase
 
@@ -28,12 +38,12 @@ class TestSuite(InFileTestSuiteBase):
     ) -> None:
         self.monkeypatch = monkeypatch
         self.tmp_cwd = tmp_cwd
-        check_call_mock = Mock(spec_set=subprocess.check_call)
-        monkeypatch.setattr(subprocess, 'check_call', check_call_mock)
+        check_call_mock = Mock(spec_set=engine.check_call)
+        monkeypatch.setattr(engine, 'check_call', check_call_mock)
         self.check_call_mock = check_call_mock
 
     def call(self, *args: Union[str, Path]) -> MockCall:
-        return call([*self.command_line, *args])
+        return call([*self.command_line, *args], prefix=None)
 
     def test_ok_rel_path(self) -> None:
         self.monkeypatch.chdir(self.input_dir)
@@ -65,6 +75,141 @@ class TestSuite(InFileTestSuiteBase):
             self.call(dir_ / 'child.ptl.in', '-o', dir_ / 'child.txt'),
         ])
 
+    def test_use_stdin(self) -> None:
+        self.monkeypatch.chdir(self.input_dir.parent)
+        rel_dir = Path(self.input_dir.name)
+        self.create_file('parent.in', 'foo')
+        self.create_file('child.in', '-r parent\nbar')
+        inputs: List[str] = []
+
+        def check_call(
+            cmd: List[Union[str, Path]], prefix: Optional[str] = None,
+            input: Optional[Iterable[bytes]] = None,
+        ) -> None:
+            assert input is not None
+            # no intermediate input files are written
+            assert not list(self.input_dir.glob('*.ptl.in'))
+            inputs.append(b''.join(input).decode())
+
+        self.check_call_mock.side_effect = check_call
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            use_stdin=True,
+        )
+
+        assert [c.args for c in self.check_call_mock.call_args_list] == [
+            ([*self.command_line, '-', '-o', rel_dir / 'parent.txt'],),
+            ([*self.command_line, '-', '-o', rel_dir / 'child.txt'],),
+        ]
+        # referenced locks are relative to cwd
+        assert inputs == ['foo\n', f'-c {rel_dir / "parent.txt"}\nbar\n']
+
+    def test_redundant_references_left_out(self) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('base.in', 'attrs')
+        self.create_file('base.txt', 'attrs==23.2.0\n')
+        self.create_file('dev.in', '-c base\npytest')
+        self.create_file('dev.txt', 'attrs==23.2.0\npytest==8.2.2\n')
+        self.create_file('top.in', '-c dev\ntox')
+        inputs: List[str] = []
+
+        def check_call(
+            cmd: List[Union[str, Path]], prefix: Optional[str] = None,
+        ) -> None:
+            inputs.append((self.input_dir / cmd[-3]).read_text())
+
+        self.check_call_mock.side_effect = check_call
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            layers=['top'], include_parent_layers=False,
+        )
+
+        # all pins of base.txt are in dev.txt
+        assert inputs == ['-c dev.txt\ntox\n']
+
+    def test_merge_constraints(self) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('base.in', 'attrs')
+        self.create_file('base.txt', 'attrs==23.2.0\n')
+        self.create_file('dev.in', '-c base\npytest')
+        self.create_file('dev.txt', 'pytest==8.2.2\n')
+        self.create_file('top.in', '-c dev\ntox')
+        inputs: List[str] = []
+
+        def check_call(
+            cmd: List[Union[str, Path]], prefix: Optional[str] = None,
+        ) -> None:
+            inputs.append((self.input_dir / cmd[-3]).read_text())
+
+        self.check_call_mock.side_effect = check_call
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            layers=['top'], include_parent_layers=False,
+            merge_constraints=True,
+        )
+
+        assert inputs == ['-c .ptl/constraints/top.txt\ntox\n']
+        merged = self.input_dir / '.ptl/constraints/top.txt'
+        assert merged.read_text().splitlines()[1:] == [
+            'attrs==23.2.0', 'pytest==8.2.2']
+
+    def test_merge_constraints_conflict(self) -> None:
+        self.create_file('base.in', 'attrs')
+        self.create_file('base.txt', 'attrs==23.2.0\n')
+        self.create_file('dev.in', '-c base\nattrs')
+        self.create_file('dev.txt', 'attrs==23.1.0\n')
+        self.create_file('top.in', '-c dev\ntox')
+
+        with pytest.raises(ConstraintsError, match='conflicting pins'):
+            compile(
+                command_line=self.command_line, input_dir=self.input_dir,
+                layers=['top'], include_parent_layers=False,
+                merge_constraints=True,
+            )
+
+        self.check_call_mock.assert_not_called()
+
+    def test_use_stdin_whitespace_fallback(self) -> None:
+        input_dir = self.input_dir / 'my reqs'
+        input_dir.mkdir()
+        self.monkeypatch.chdir(self.input_dir)
+        (input_dir / 'base.in').write_text('foo')
+
+        compile(
+            command_line=self.command_line, input_dir=input_dir,
+            use_stdin=True,
+        )
+
+        self.check_call_mock.assert_called_once_with([
+            *self.command_line,
+            Path('my reqs/base.ptl.in'), '-o', Path('my reqs/base.txt'),
+        ], prefix=None)
+
+    @pytest.mark.parametrize('line', [
+        '-r ../shared/extra.txt',
+        '-c ../pins.txt',
+        '-e ./pkg',
+        './dist/pkg-1.0-py3-none-any.whl',
+    ])
+    def test_use_stdin_relative_path_fallback(self, line: str) -> None:
+        self.monkeypatch.chdir(self.input_dir.parent)
+        rel_dir = Path(self.input_dir.name)
+        self.create_file('base.in', f'foo\n{line}')
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            use_stdin=True,
+        )
+
+        # relative paths are resolved against the input directory
+        self.check_call_mock.assert_called_once_with([
+            *self.command_line,
+            rel_dir / 'base.ptl.in', '-o', rel_dir / 'base.txt',
+        ], prefix=None)
+
     def test_ok_specified_layers_with_parents(self) -> None:
         self.monkeypatch.chdir(self.input_dir)
         self.create_file('not-referenced.in')
@@ -96,12 +241,451 @@ class TestSuite(InFileTestSuiteBase):
             layers=['grand', 'child'], include_parent_layers=False,
         )
 
+        # child.ptl.in references grand.txt transitively via parent.txt,
+        # thus grand is compiled first
         assert self.check_call_mock.call_count == 2
         self.check_call_mock.assert_has_calls([
-            self.call(Path('child.ptl.in'), '-o', Path('child.txt')),
             self.call(Path('grand.ptl.in'), '-o', Path('grand.txt')),
+            self.call(Path('child.ptl.in'), '-o', Path('child.txt')),
         ])
 
+    def test_ok_jobs(self) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('base.in')
+        self.create_file('left.in', '-c base')
+        self.create_file('right.in', '-c base')
+        self.create_file('top.in', '-c left\n-c right')
+        started: List[str] = []
+
+        async def check_call(
+            cmd: List[Union[str, Path]], prefix: Optional[str],
+        ) -> None:
+            input_file = str(cmd[-3])
+            started.append(input_file)
+            assert prefix == input_file.split('.')[0]
+            if input_file in ['left.ptl.in', 'right.ptl.in']:
+                # left and right must be compiled concurrently
+                for _ in range(5000):
+                    if {'left.ptl.in', 'right.ptl.in'} <= set(started):
+                        break
+                    await asyncio.sleep(0.001)
+                else:
+                    raise AssertionError('not compiled concurrently')
+
+        self.check_call_mock.side_effect = check_call
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir, jobs=4)
+
+        assert self.check_call_mock.call_count == 4
+        assert started[0] == 'base.ptl.in'
+        assert set(started[1:3]) == {'left.ptl.in', 'right.ptl.in'}
+        assert started[3] == 'top.ptl.in'
+
+    def write_output(
+        self, cmd: List[Union[str, Path]], prefix: Optional[str] = None,
+    ) -> None:
+        # imitates the compile tool: the lock content depends on the input
+        input_file, output_file = cmd[-3], cmd[-1]
+        content = (self.input_dir / input_file).read_text()
+        (self.input_dir / output_file).write_text(f'# {content}')
+
+    def test_incremental(self) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('base.in', 'foo')
+        self.create_file('child.in', '-c base\nbar')
+        self.check_call_mock.side_effect = self.write_output
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        assert self.check_call_mock.call_count == 2
+        assert (self.input_dir / '.ptl' / 'state.json').is_file()
+        self.check_call_mock.reset_mock()
+
+        # nothing changed
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        self.check_call_mock.assert_not_called()
+
+        # child input changed
+        self.create_file('child.in', '-c base\nbaz')
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        assert self.check_call_mock.call_args_list == [
+            self.call(Path('child.ptl.in'), '-o', Path('child.txt'))]
+        self.check_call_mock.reset_mock()
+
+        # base input changed, base lock changed, child must be recompiled too
+        self.create_file('base.in', 'qux')
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        assert self.check_call_mock.call_count == 2
+        self.check_call_mock.reset_mock()
+
+        # lock modified by hand
+        (self.input_dir / 'child.txt').write_text('modified')
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        assert self.check_call_mock.call_args_list == [
+            self.call(Path('child.ptl.in'), '-o', Path('child.txt'))]
+        self.check_call_mock.reset_mock()
+
+        # lock removed
+        (self.input_dir / 'base.txt').unlink()
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        assert self.check_call_mock.call_args_list == [
+            self.call(Path('base.ptl.in'), '-o', Path('base.txt'))]
+
+    def test_durations_recorded(self) -> None:
+        self.create_file('base.in', 'foo')
+        self.create_file('child.in', '-c base\nbar')
+        self.check_call_mock.side_effect = self.write_output
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        state = State(self.input_dir)
+        for name in ['base.in', 'child.in']:
+            duration = state.get_duration(InFile(name))
+            assert duration is not None and duration >= 0
+
+    def test_history_recorded(self) -> None:
+        self.create_file('base.in', 'foo')
+        self.create_file('child.in', '-c base\nbar')
+        self.check_call_mock.side_effect = self.write_output
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+        self.check_call_mock.side_effect = subprocess.CalledProcessError(
+            2, ['dummy'])
+        with pytest.raises(CompileError):
+            compile(
+                command_line=self.command_line, input_dir=self.input_dir,
+                force=True,
+            )
+
+        runs = list(History(self.input_dir).iterate_runs())
+        assert [
+            (run.command, run.layer, run.exit_code, run.lock_changed)
+            for run in runs
+        ] == [
+            ('compile', 'base', 0, True),
+            ('compile', 'child', 0, True),
+            ('compile', 'base', 2, None),
+        ]
+        assert all(run.tool == 'dummy' for run in runs)
+        assert all(run.wall_time >= 0 for run in runs)
+
+    def test_incremental_tool_changed(self) -> None:
+        self.create_file('base.in', 'foo')
+        self.check_call_mock.side_effect = self.write_output
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            tool_version='1.0',
+        )
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            tool_version='1.0',
+        )
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            tool_version='2.0',
+        )
+        compile(
+            command_line=[*self.command_line, '--upgrade'],
+            input_dir=self.input_dir, tool_version='2.0',
+        )
+
+        assert self.check_call_mock.call_count == 3
+
+    def test_incremental_verbosity_ignored(self, tmp_path: Path) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('base.in', 'foo')
+        self.check_call_mock.side_effect = self.write_output
+        cache = CompileCache(FileSystemBackend(tmp_path / 'cache'))
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            verbosity_options=['-v'], cache=cache,
+        )
+
+        assert self.check_call_mock.call_args_list == [
+            self.call('-v', Path('base.ptl.in'), '-o', Path('base.txt'))]
+        self.check_call_mock.reset_mock()
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            verbosity_options=['-qq'], cache=cache,
+        )
+
+        self.check_call_mock.assert_not_called()
+
+        # restored from the cache populated by the verbose run
+        (self.input_dir / '.ptl' / 'state.json').unlink()
+        (self.input_dir / 'base.txt').unlink()
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            cache=cache,
+        )
+
+        self.check_call_mock.assert_not_called()
+        assert (self.input_dir / 'base.txt').is_file()
+
+    def test_incremental_force(self) -> None:
+        self.create_file('base.in', 'foo')
+        self.check_call_mock.side_effect = self.write_output
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            force=True,
+        )
+
+        assert self.check_call_mock.call_count == 2
+
+    def test_provenance_header(self) -> None:
+        self.create_file('base.in', 'foo')
+        self.create_file('child.in', '-c base\nbar')
+        self.check_call_mock.side_effect = self.write_output
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        for name, expected_lines in [
+            ('base.txt', ['# foo']),
+            ('child.txt', ['# -c base.txt', 'bar']),
+        ]:
+            header, *lines = (self.input_dir / name).read_text().splitlines()
+            assert header.startswith('# ptl provenance v1 input=')
+            assert lines == expected_lines
+        for infile in read_infiles(self.input_dir):
+            assert check_provenance(infile, self.input_dir) == []
+
+    def test_provenance_header_added_if_up_to_date(self) -> None:
+        self.create_file('base.in', 'foo')
+        self.check_call_mock.side_effect = self.write_output
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+        self.check_call_mock.reset_mock()
+        # a lock compiled before provenance headers were introduced
+        lock_path = self.input_dir / 'base.txt'
+        lock_path.write_bytes(read_lock(lock_path))
+        infile, = read_infiles(self.input_dir)
+        state = State(self.input_dir)
+        state.update(infile, compute_input_digest(
+            infile, self.input_dir, command_line=self.command_line))
+        state.save()
+
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        self.check_call_mock.assert_not_called()
+        assert check_provenance(infile, self.input_dir) == []
+        self.check_call_mock.reset_mock()
+
+        # the state is updated, the lock is not rewritten again
+        mtime_ns = lock_path.stat().st_mtime_ns
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+
+        self.check_call_mock.assert_not_called()
+        assert lock_path.stat().st_mtime_ns == mtime_ns
+
+    def test_with_dependents_pruned_if_only_header_changed(self) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('base.in', 'foo')
+        self.create_file('mid.in', '-c base')
+
+        def write_output(
+            cmd: List[Union[str, Path]], prefix: Optional[str] = None,
+        ) -> None:
+            (self.input_dir / cmd[-1]).write_text('foo==1.0\n')
+
+        self.check_call_mock.side_effect = write_output
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+        self.check_call_mock.reset_mock()
+        # the input is changed, the resolved lock is not
+        self.create_file('base.in', 'foo>=1.0')
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            layers=['base'], include_parent_layers=False,
+            include_dependent_layers=True,
+        )
+
+        assert self.check_call_mock.call_args_list == [
+            self.call(Path('base.ptl.in'), '-o', Path('base.txt')),
+        ]
+        for infile in read_infiles(self.input_dir):
+            assert check_provenance(infile, self.input_dir) == []
+
+    def test_cache(self, tmp_path: Path) -> None:
+        cache = CompileCache(FileSystemBackend(tmp_path / 'cache'))
+        other_dir = tmp_path / 'other'
+        other_dir.mkdir()
+        for input_dir in [self.input_dir, other_dir]:
+            (input_dir / 'base.in').write_text('foo')
+            (input_dir / 'child.in').write_text('-c base\nbar')
+        self.check_call_mock.side_effect = self.write_output
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            cache=cache,
+        )
+
+        assert self.check_call_mock.call_count == 2
+        self.check_call_mock.reset_mock()
+
+        # the same layers in another checkout are restored from the cache
+        compile(
+            command_line=self.command_line, input_dir=other_dir, cache=cache)
+
+        self.check_call_mock.assert_not_called()
+        for name in ['base.txt', 'child.txt']:
+            assert (other_dir / name).read_text() == (
+                self.input_dir / name).read_text()
+
+        # cache miss, the result is stored
+        (other_dir / 'child.in').write_text('-c base\nbaz')
+        compile(
+            command_line=self.command_line, input_dir=other_dir, cache=cache)
+
+        assert self.check_call_mock.call_count == 1
+        self.check_call_mock.reset_mock()
+
+        # without the cache, the state is still used
+        compile(command_line=self.command_line, input_dir=other_dir)
+
+        self.check_call_mock.assert_not_called()
+
+    def test_cache_does_not_block_other_layers(self) -> None:
+        self.create_file('first.in', 'foo')
+        self.create_file('second.in', 'bar')
+        tool_called = threading.Event()
+
+        class SlowBackend(CacheBackend):
+            calls = 0
+
+            def get(self, key: str) -> Optional[bytes]:
+                self.calls += 1
+                if self.calls == 1:
+                    # the tool of the other layer can only be called if
+                    # the event loop is not blocked by this call
+                    assert tool_called.wait(5)
+                return None
+
+            def put(self, key: str, data: bytes) -> None:
+                pass
+
+        def check_call(
+            cmd: List[Union[str, Path]], prefix: Optional[str] = None,
+        ) -> None:
+            tool_called.set()
+            self.write_output(cmd)
+
+        self.check_call_mock.side_effect = check_call
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            jobs=2, cache=CompileCache(SlowBackend()),
+        )
+
+        assert self.check_call_mock.call_count == 2
+
+    def test_with_dependents(self) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('grand.in', 'foo')
+        self.create_file('base.in', '-c grand\nbar')
+        self.create_file('mid.in', '-c base')
+        self.create_file('top.in', '-r mid')
+        self.create_file('other.in', '-c grand')
+        self.check_call_mock.side_effect = self.write_output
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+        self.check_call_mock.reset_mock()
+        self.create_file('base.in', '-c grand\nbaz')
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            layers=['base'], include_parent_layers=False,
+            include_dependent_layers=True,
+        )
+
+        assert self.check_call_mock.call_args_list == [
+            self.call(Path('base.ptl.in'), '-o', Path('base.txt')),
+            self.call(Path('mid.ptl.in'), '-o', Path('mid.txt')),
+            self.call(Path('top.ptl.in'), '-o', Path('top.txt')),
+        ]
+
+    def test_with_dependents_pruned_if_lock_not_changed(self) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('base.in', 'foo')
+        self.create_file('mid.in', '-c base')
+        self.create_file('top.in', '-r mid')
+        self.check_call_mock.side_effect = self.write_output
+        compile(command_line=self.command_line, input_dir=self.input_dir)
+        self.check_call_mock.reset_mock()
+
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            layers=['base'], include_parent_layers=False,
+            include_dependent_layers=True, force=True,
+        )
+
+        assert self.check_call_mock.call_args_list == [
+            self.call(Path('base.ptl.in'), '-o', Path('base.txt')),
+        ]
+
+    def test_with_dependents_error_not_compiled(self) -> None:
+        self.create_file('base.in')
+        self.create_file('other.in')
+        self.create_file('top.in', '-c base\n-c other')
+
+        with pytest.raises(CompileError, match=r'missing: other\.txt$'):
+            compile(
+                command_line=self.command_line, input_dir=self.input_dir,
+                layers=['base'], include_parent_layers=False,
+                include_dependent_layers=True,
+            )
+
+    def test_keep_going(self) -> None:
+        self.monkeypatch.chdir(self.input_dir)
+        self.create_file('bad.in')
+        self.create_file('child.in', '-c bad')
+        self.create_file('other.in')
+
+        def check_call(
+            cmd: List[Union[str, Path]], prefix: Optional[str],
+        ) -> None:
+            if str(cmd[-3]) == 'bad.ptl.in':
+                raise subprocess.CalledProcessError(1, cmd)
+
+        self.check_call_mock.side_effect = check_call
+
+        with pytest.raises(
+            CompileError,
+            match=r'^failed to compile: bad\.in; skipped: child\.in$',
+        ):
+            compile(
+                command_line=self.command_line, input_dir=self.input_dir,
+                keep_going=True,
+            )
+
+        assert self.check_call_mock.call_args_list == [
+            self.call(Path('bad.ptl.in'), '-o', Path('bad.txt')),
+            self.call(Path('other.ptl.in'), '-o', Path('other.txt')),
+        ]
+
+    def test_error_jobs(self) -> None:
+        self.create_file('deps.in')
+
+        with pytest.raises(CompileError, match='positive integer, got 0'):
+            compile(
+                command_line=self.command_line, input_dir=self.input_dir,
+                jobs=0,
+            )
+
+        self.check_call_mock.assert_not_called()
+
     def test_error_not_compiled(self) -> None:
         self.monkeypatch.chdir(self.input_dir)
         self.create_file('grand.in')
@@ -126,3 +710,170 @@ class TestSuite(InFileTestSuiteBase):
             match='dummy compile returned non-zero exit status 5:\nboom!',
         ):
             compile(command_line=self.command_line, input_dir=self.input_dir)
+
+
+class FakeWatcher:
+
+    def __init__(
+        self, changes: List[Callable[[], Set[str]]],
+    ) -> None:
+        self.changes = changes
+
+    def __enter__(self) -> 'FakeWatcher':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        pass
+
+    def wait(self) -> Set[str]:
+        if not self.changes:
+            raise KeyboardInterrupt
+        return self.changes.pop(0)()
+
+    def refresh(self) -> None:
+        pass
+
+
+class WatchTestSuite(InFileTestSuiteBase):
+    check_call_mock: Mock
+
+    command_line = ['dummy', 'compile']
+
+    @pytest.fixture(autouse=True)
+    def setup(
+        self, base_setup: None, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.chdir(self.input_dir)
+        check_call_mock = Mock(spec_set=engine.check_call)
+        monkeypatch.setattr(engine, 'check_call', check_call_mock)
+        self.check_call_mock = check_call_mock
+        check_call_mock.side_effect = self.write_output
+        self.monkeypatch = monkeypatch
+
+    def write_output(
+        self, cmd: List[Union[str, Path]], prefix: Optional[str] = None,
+    ) -> None:
+        input_file, output_file = cmd[-3], cmd[-1]
+        content = (self.input_dir / input_file).read_text()
+        (self.input_dir / output_file).write_text(f'# {content}')
+
+    def compiled(self) -> List[str]:
+        compiled = [
+            str(call.args[0][-1])
+            for call in self.check_call_mock.call_args_list
+        ]
+        self.check_call_mock.reset_mock()
+        return compiled
+
+    def watch(self, *changes: Callable[[], Set[str]]) -> None:
+        watcher = FakeWatcher(list(changes))
+        module = importlib.import_module('ptl.commands._compile')
+        self.monkeypatch.setattr(
+            module, 'create_watcher', lambda directory: watcher)
+        compile(
+            command_line=self.command_line, input_dir=self.input_dir,
+            watch=True,
+        )
+
+    def test(self, caplog: pytest.LogCaptureFixture) -> None:
+        self.create_file('base.in', 'foo')
+        self.create_file('mid.in', '-c base')
+        self.create_file('top.in', '-r mid')
+        self.create_file('other.in', 'bar')
+        compiled: List[List[str]] = []
+
+        def change_base() -> Set[str]:
+            compiled.append(self.compiled())
+            self.create_file('base.in', 'foo\nbaz')
+            return {'base.in'}
+
+        def change_mid_lock() -> Set[str]:
+            compiled.append(self.compiled())
+            (self.input_dir / 'mid.txt').write_text('changed')
+            return {'mid.txt'}
+
+        def add_infile() -> Set[str]:
+            compiled.append(self.compiled())
+            self.create_file('new.in', '-c other')
+            return {'new.in'}
+
+        def break_reference() -> Set[str]:
+            compiled.append(self.compiled())
+            self.create_file('other.in', '-c unknown')
+            return {'other.in'}
+
+        def fix_reference() -> Set[str]:
+            compiled.append(self.compiled())
+            self.create_file('other.in', 'qux')
+            return {'other.in'}
+
+        self.watch(
+            change_base, change_mid_lock, add_infile, break_reference,
+            fix_reference,
+        )
+        compiled.append(self.compiled())
+
+        assert compiled == [
+            # initial
+            ['base.txt', 'other.txt', 'mid.txt', 'top.txt'],
+            # base.in changed, dependents are compiled since base lock changed
+            ['base.txt', 'mid.txt', 'top.txt'],
+            # mid.txt changed externally
+            ['top.txt'],
+            # new.in added: the graph is reloaded, all layers are checked,
+            # mid lock was changed externally, thus it's out of date as well
+            ['mid.txt', 'new.txt', 'top.txt'],
+            # broken reference
+            [],
+            # other.in fixed
+            ['other.txt', 'new.txt'],
+        ]
+        assert 'UnknownReference: other.in: unknown' in caplog.messages
+
+
+class StdinTestSuite(InFileTestSuiteBase):
+    # the simulated tool is actually called; references read from stdin are
+    # relative to the working directory (not to the input directory) and are
+    # resolved against it, as uv does
+
+    @pytest.fixture(autouse=True)
+    def setup(
+        self, base_setup: None, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.chdir(self.input_dir.parent)
+
+    @pytest.mark.parametrize('merge_constraints', [False, True])
+    def test_references_resolved(self, merge_constraints: bool) -> None:
+        self.create_file('base.in', 'foo')
+        self.create_file('base.txt', 'foo==1.2.3\n')
+        self.create_file('child.in', '-c base\nfoo\nbar==0.1')
+
+        compile(
+            command_line=process_command_line(
+                Provider.SIMULATED.tools[Tool.COMPILE]),
+            input_dir=self.input_dir, layers=['child'],
+            include_parent_layers=False, use_stdin=True,
+            merge_constraints=merge_constraints,
+        )
+
+        lines = read_lock(self.input_dir / 'child.txt').decode().splitlines()
+        assert lines[1:] == ['bar==0.1', 'foo==1.2.3']
+
+    def test_relative_paths_resolved(self) -> None:
+        shared_dir = self.input_dir.parent / 'shared'
+        shared_dir.mkdir()
+        (shared_dir / 'extra.txt').write_text('baz\n')
+        (self.input_dir.parent / 'pins.txt').write_text(
+            'baz==4.5.6\nfoo==1.2.3\n')
+        self.create_file(
+            'child.in', 'foo\n-r ../shared/extra.txt\n-c ../pins.txt')
+
+        compile(
+            command_line=process_command_line(
+                Provider.SIMULATED.tools[Tool.COMPILE]),
+            input_dir=self.input_dir, layers=['child'],
+            include_parent_layers=False, use_stdin=True,
+        )
+
+        lines = read_lock(self.input_dir / 'child.txt').decode().splitlines()
+        assert lines[1:] == ['baz==4.5.6', 'foo==1.2.3']
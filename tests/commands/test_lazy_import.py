@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    'command', ['check', 'compile', 'show', 'stats', 'sync'])
+def test_command_module_imported_first(command: str, tmp_path: Path) -> None:
+    # a fresh interpreter, since the import order matters
+    code = '\n'.join([
+        f'import ptl.commands._{command}',
+        'from ptl import commands',
+        f'assert callable(commands.{command}), commands.{command}',
+    ])
+    subprocess.run(
+        [sys.executable, '-c', code], cwd=tmp_path, check=True,
+        capture_output=True,
+    )
+
+
+def test_show_after_module_imported(tmp_path: Path) -> None:
+    (tmp_path / 'main.in').write_text('foo\n')
+    code = '\n'.join([
+        'import ptl.commands._show',
+        'from ptl.cli import main',
+        "main(['show'])",
+    ])
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=tmp_path, check=True,
+        capture_output=True, text=True,
+    )
+
+    assert result.stdout == '# main.ptl.in\nfoo\n\n'
@@ -0,0 +1,77 @@
+from dataclasses import replace
+
+import pytest
+
+from ptl.commands import stats
+from ptl.history import CacheStatus, History, HistoryError, Run
+
+from tests.testlib import InFileTestSuiteBase
+
+
+RUN = Run(
+    command='compile', layer='base', tool='dummy',
+    options_hash='0123456789ab', wall_time=1.0,
+)
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    @pytest.fixture(autouse=True)
+    def setup(
+        self, base_setup: None, capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        self.capsys = capsys
+
+    def get_output(self) -> str:
+        return self.capsys.readouterr().out
+
+    def test_no_history(self) -> None:
+        stats(input_dir=self.input_dir)
+
+        assert self.get_output() == 'no history yet\n'
+
+    def test_corrupted_history(self) -> None:
+        state_dir = self.input_dir / '.ptl'
+        state_dir.mkdir()
+        (state_dir / 'history.db').write_text('not an sqlite database' * 100)
+
+        with pytest.raises(HistoryError, match='file is not a database'):
+            stats(input_dir=self.input_dir)
+
+    def test(self) -> None:
+        with History(self.input_dir) as history:
+            for wall_time in [10.0, 20.0]:
+                history.record(replace(
+                    RUN, layer='dev', wall_time=wall_time, user_time=4.0,
+                    system_time=1.0, max_rss=51200, cache=CacheStatus.MISS,
+                ))
+            history.record(replace(RUN, wall_time=2.0))
+            history.record(replace(RUN, cache=CacheStatus.HIT))
+            history.record(replace(
+                RUN, command='sync', layer='base,dev', wall_time=3.0))
+
+        stats(input_dir=self.input_dir)
+
+        assert self.get_output() == self.dedent("""
+            slowest layers (compile):
+            LAYER  RUNS  FAILED    AVG   LAST  TREND   CPU  PEAK RSS
+            dev       2       0  15.0s  20.0s      -  5.0s     50.0M
+            base      2       0   2.0s   2.0s      -     -         -
+
+            sync:
+            LAYER     RUNS  FAILED   AVG  LAST  TREND  CPU  PEAK RSS
+            base,dev     1       0  3.0s  3.0s      -    -         -
+
+            cache hit rate: 33%
+        """)
+
+    def test_limit(self) -> None:
+        with History(self.input_dir) as history:
+            history.record(replace(RUN, layer='slow', wall_time=2.0))
+            history.record(replace(RUN, layer='fast', wall_time=1.0))
+
+        stats(input_dir=self.input_dir, limit=1)
+
+        output = self.get_output()
+        assert 'slow' in output
+        assert 'fast' not in output
@@ -5,6 +5,7 @@ from unittest.mock import Mock
 
 import pytest
 
+from ptl import engine
 from ptl.commands import sync
 from ptl.exceptions import LayerFileError, SyncError
 
@@ -24,8 +25,8 @@ class TestSuite(InFileTestSuiteBase):
     ) -> None:
         self.monkeypatch = monkeypatch
         self.tmp_cwd = tmp_cwd
-        check_call_mock = Mock(spec_set=subprocess.check_call)
-        monkeypatch.setattr(subprocess, 'check_call', check_call_mock)
+        check_call_mock = Mock(spec_set=engine.check_call)
+        monkeypatch.setattr(engine, 'check_call', check_call_mock)
         self.check_call_mock = check_call_mock
 
     def test_ok_rel_path(self) -> None:
@@ -10,10 +10,13 @@ import pytest
 @pytest.fixture
 def compat_module() -> Iterator[ModuleType]:
     from ptl import compat
-    importlib.reload(compat)
+
+    # the parser is imported on first access and cached as a module global
+    vars(compat).pop('toml_load', None)
     try:
         yield compat
     finally:
+        vars(compat).pop('toml_load', None)
         importlib.reload(compat)
 
 
@@ -34,8 +37,9 @@ def test_python_lt_311_no_tomli(
     with monkeypatch.context() as mp:
         mp.setattr(importlib, 'import_module', import_module_mock)
         importlib.reload(compat_module)
+        toml_load = compat_module.toml_load
 
-    assert compat_module.toml_load is None
+    assert toml_load is None
 
 
 @pytest.mark.skipif(sys.version_info < (3, 11), reason='Python < 3.11')
@@ -45,3 +49,12 @@ def test_python_ge_311(compat_module: ModuleType) -> None:
     assert compat_module.toml_load is tomllib.load
     with pytest.raises(ImportError):
         import tomli as tomli  # pyright: ignore[reportMissingModuleSource]
+
+
+def test_imported_on_demand(compat_module: ModuleType) -> None:
+    assert 'toml_load' not in vars(compat_module)
+
+    toml_load = compat_module.toml_load
+
+    assert toml_load is not None
+    assert vars(compat_module)['toml_load'] is toml_load
@@ -3,6 +3,7 @@ from typing import Dict, List, Optional, Union
 
 import pytest
 
+from ptl.cache import CacheBackendType
 from ptl.config import Config
 from ptl.exceptions import ConfigError
 from ptl.providers import Provider, Tool
@@ -240,6 +241,121 @@ class VerbosityTestSuite(TestSuiteBase):
         assert config.verbosity == 0
 
 
+class JobsTestSuite(TestSuiteBase):
+
+    @pytest.mark.parametrize(
+        [
+            'global_env', 'compile_env', 'global_file', 'compile_file',
+            'expected',
+        ], [
+            # default
+            (None, None, None, None, 1),
+            # global file
+            (None, None, 2, None, 2),
+            # compile file
+            (None, None, 2, 3, 3),
+            # global env, global file ignored
+            ('4', None, 2, None, 4),
+            # global env, compile file respected
+            ('4', None, 2, 3, 3),
+            # compile env, compile file ignored
+            ('4', '5', 2, 3, 5),
+        ],
+    )
+    def test(
+        self, global_env: Optional[str], compile_env: Optional[str],
+        global_file: Optional[int], compile_file: Optional[int],
+        expected: int,
+    ) -> None:
+        if global_env is not None:
+            self.set_env('PTL_JOBS', global_env)
+        if compile_env is not None:
+            self.set_env('PTL_COMPILE_JOBS', compile_env)
+        config_lines: List[str] = []
+        if global_file is not None:
+            config_lines.append('[tool.ptl]')
+            config_lines.append(f'jobs = {global_file}')
+        if compile_file is not None:
+            config_lines.append('[tool.ptl.compile]')
+            config_lines.append(f'jobs = {compile_file}')
+        if config_lines:
+            self.create_config('\n'.join(config_lines))
+
+        config = Config()
+
+        assert config.jobs == expected
+
+    def test_error_not_positive(self) -> None:
+        self.set_env('PTL_JOBS', '0')
+
+        with pytest.raises(ConfigError, match='positive integer, got 0'):
+            Config().jobs
+
+
+class CacheTestSuite(TestSuiteBase):
+
+    def test_defaults(self) -> None:
+        config = Config()
+
+        assert config.cache_enabled is False
+        assert config.cache_backend == CacheBackendType.FILESYSTEM
+        assert config.cache_url is None
+        assert config.cache_directory is None
+        assert config.cache_max_size is None
+
+    def test_file(self) -> None:
+        self.create_config(
+            '[tool.ptl.cache]\n'
+            'enabled = true\n'
+            'directory = "/tmp/ptl-cache"\n'
+            'max-size = 64\n'
+        )
+
+        config = Config()
+
+        assert config.cache_enabled is True
+        assert config.cache_directory == Path('/tmp/ptl-cache').resolve()
+        assert config.cache_max_size == 64
+
+    def test_env_overrides_file(self) -> None:
+        self.create_config(
+            '[tool.ptl.cache]\n'
+            'enabled = true\n'
+            'max-size = 64\n'
+        )
+        self.set_env('PTL_CACHE', 'no')
+        self.set_env('PTL_CACHE_MAX_SIZE', '128')
+
+        config = Config()
+
+        assert config.cache_enabled is False
+        assert config.cache_max_size == 128
+
+    def test_http_backend(self) -> None:
+        self.create_config(
+            '[tool.ptl.cache]\n'
+            'backend = "http"\n'
+            'url = "http://cache.local/ptl"\n'
+        )
+
+        config = Config()
+
+        assert config.cache_backend == CacheBackendType.HTTP
+        assert config.cache_url == 'http://cache.local/ptl'
+
+    def test_error_unknown_backend(self) -> None:
+        self.set_env('PTL_CACHE_BACKEND', 's3')
+
+        with pytest.raises(ConfigError, match="unknown cache backend 's3'"):
+            Config().cache_backend
+
+    def test_error_max_size_not_positive(self) -> None:
+        self.set_env('PTL_CACHE_MAX_SIZE', '0')
+
+        with pytest.raises(ConfigError, match='positive integer, got 0'):
+            Config().cache_max_size
+
+
 class GetToolTestSuite(TestSuiteBase):
 
     @pytest.mark.parametrize(
@@ -255,6 +371,8 @@ class GetToolTestSuite(TestSuiteBase):
             (None, None, 'f -foo', None, 'f -foo'),
             # compile file, pip-tools
             (None, None, 'f -foo', ':pip-tools:', Provider.PIP_TOOLS),
+            # compile file, simulated
+            (None, None, ':uv:', ':simulated:', Provider.SIMULATED),
             # compile file, custom
             (None, None, 'f -foo', 'f -bar', 'f -bar'),
             # global env, uv, global file ignored
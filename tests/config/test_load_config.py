@@ -62,7 +62,7 @@ def test_error_tool_ptl_is_not_a_table(tmp_path: Path) -> None:
 def test_error_no_toml_parser(
     monkeypatch: pytest.MonkeyPatch, tmp_path: Path,
 ) -> None:
-    monkeypatch.setattr('ptl.config.toml_load', None)
+    monkeypatch.setattr('ptl.compat.toml_load', None)
     config_path = _write_config(tmp_path / 'config.toml', """
         [tool.ptl]
         directory = "path/to/reqs"
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+
+from ptl.constraints import merge_constraints
+from ptl.exceptions import ConstraintsError
+
+from tests.testlib import dedent
+
+
+@pytest.fixture
+def base_lock(tmp_path: Path) -> Path:
+    path = tmp_path / 'base.txt'
+    path.write_text(dedent("""
+        --index-url https://example.com/simple
+        attrs==23.2.0 \\
+            --hash=sha256:aaa
+            # via -r base.in
+        Typing_Extensions==4.12.2 ; python_version < "3.11"
+            # via -r base.in
+    """))
+    return path
+
+
+def test_ok(tmp_path: Path, base_lock: Path) -> None:
+    dev_lock = tmp_path / 'dev.txt'
+    dev_lock.write_text(dedent("""
+        attrs==23.2.0
+            # via pytest
+        pytest[testing]==8.2.2
+        -e file:///path/to/project
+    """))
+
+    merged = merge_constraints([base_lock, dev_lock])
+
+    assert merged == dedent("""
+        attrs==23.2.0
+        pytest==8.2.2
+        typing-extensions==4.12.2 ; python_version < "3.11"
+    """)
+
+
+def test_same_package_different_markers(tmp_path: Path) -> None:
+    lock = tmp_path / 'base.txt'
+    lock.write_text(dedent("""
+        numpy==1.24.4 ; python_version < "3.9"
+        numpy==2.0.0 ; python_version >= "3.9"
+    """))
+
+    merged = merge_constraints([lock])
+
+    assert merged == dedent("""
+        numpy==1.24.4 ; python_version < "3.9"
+        numpy==2.0.0 ; python_version >= "3.9"
+    """)
+
+
+def test_conflict(tmp_path: Path, base_lock: Path) -> None:
+    dev_lock = tmp_path / 'dev.txt'
+    dev_lock.write_text('attrs==23.1.0\n')
+
+    with pytest.raises(ConstraintsError) as excinfo:
+        merge_constraints([base_lock, dev_lock])
+
+    assert str(excinfo.value) == (
+        'conflicting pins: attrs==23.2.0 (base.txt), attrs==23.1.0 (dev.txt)')
+
+
+def test_missing_lock(tmp_path: Path) -> None:
+    with pytest.raises(ConstraintsError, match='base.txt not found'):
+        merge_constraints([tmp_path / 'base.txt'])
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from ptl.constraints import write_merged_constraints
+from ptl.exceptions import ConstraintsError
+from ptl.infile import InFile, Reference
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    @pytest.fixture(autouse=True)
+    def setup(self, base_setup: None) -> None:
+        self.base = InFile('base.in')
+        self.dev = InFile('dev.in')
+        self.top = InFile('top.in')
+        self.dev.add_reference(Reference('c', self.base))
+        self.top.add_reference(Reference('r', self.dev))
+
+    def test_ok(self) -> None:
+        self.create_file('base.txt', 'attrs==23.2.0\n')
+        self.create_file('dev.txt', 'pytest==8.2.2\n')
+
+        path = write_merged_constraints(self.top, self.input_dir)
+
+        assert path == Path('.ptl/constraints/top.txt')
+        lines = (self.input_dir / path).read_text().splitlines()
+        assert lines[0].startswith('# merged constraints ')
+        assert lines[1:] == ['attrs==23.2.0', 'pytest==8.2.2']
+
+    def test_rewritten_only_if_locks_changed(self) -> None:
+        self.create_file('base.txt', 'attrs==23.2.0\n')
+        self.create_file('dev.txt', 'pytest==8.2.2\n')
+        path = self.input_dir / write_merged_constraints(
+            self.top, self.input_dir)
+        # marks the file to check if it's rewritten
+        path.write_text(f'{path.read_text()}# not rewritten\n')
+
+        write_merged_constraints(self.top, self.input_dir)
+
+        assert path.read_text().endswith('# not rewritten\n')
+
+        self.create_file('dev.txt', 'pytest==8.3.0\n')
+        write_merged_constraints(self.top, self.input_dir)
+
+        assert path.read_text().splitlines()[1:] == [
+            'attrs==23.2.0', 'pytest==8.3.0']
+
+    def test_missing_lock(self) -> None:
+        self.create_file('dev.txt', 'pytest==8.2.2\n')
+
+        with pytest.raises(ConstraintsError, match='base.txt not found'):
+            write_merged_constraints(self.top, self.input_dir)
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from ptl import engine
+from ptl.engine import check_call
+
+from tests.testlib import dedent
+
+
+# -S: see tests/exceptions/test_error.py
+python_cmdline = [sys.executable, '-S']
+
+
+def run_script(
+    tmp_path: Path, script: str, prefix: str = 'layer',
+) -> None:
+    path = tmp_path / 'script.py'
+    path.write_text(dedent(script))
+    asyncio.run(check_call([*python_cmdline, path], prefix=prefix))
+
+
+def test_prefixed_output(
+    tmp_path: Path, capfd: pytest.CaptureFixture[str],
+) -> None:
+    run_script(tmp_path, """
+        import sys
+        print('first')
+        print('second', file=sys.stderr)
+        sys.stdout.write('no newline')
+    """)
+
+    out, err = capfd.readouterr()
+    assert out == '[layer] first\n[layer] no newline\n'
+    assert err == '[layer] second\n'
+
+
+def test_long_line(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+    capfd: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setattr(engine, 'STREAM_LIMIT', 16)
+
+    run_script(tmp_path, """
+        print('x' * 40)
+        print('short')
+    """)
+
+    out, _ = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[-1] == '[layer] short'
+    assert ''.join(line[len('[layer] '):] for line in lines[:-1]) == 'x' * 40
+
+
+def test_no_prefix_inherits_output(
+    tmp_path: Path, capfd: pytest.CaptureFixture[str],
+) -> None:
+    path = tmp_path / 'script.py'
+    path.write_text("print('hello')")
+
+    asyncio.run(check_call([*python_cmdline, path]))
+
+    out, _ = capfd.readouterr()
+    assert out == 'hello\n'
+
+
+def test_input(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+    capfd: pytest.CaptureFixture[str],
+) -> None:
+    # larger than the pipe buffer, the child must be read while being fed
+    monkeypatch.setattr(engine, 'STREAM_LIMIT', 16)
+    path = tmp_path / 'script.py'
+    path.write_text(dedent("""
+        import sys
+        for line in sys.stdin:
+            print(line.upper(), end='')
+    """))
+    lines = [f'line {i}\n'.encode() for i in range(20000)]
+
+    asyncio.run(check_call(
+        [*python_cmdline, path], prefix='layer', input=iter(lines)))
+
+    out, _ = capfd.readouterr()
+    assert out.splitlines() == [f'[layer] LINE {i}' for i in range(20000)]
+
+
+def test_input_not_read(tmp_path: Path) -> None:
+    path = tmp_path / 'script.py'
+    path.write_text('import sys; sys.exit(3)')
+    lines = [b'x' * 1024 for _ in range(1024)]
+
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        asyncio.run(check_call([*python_cmdline, path], input=iter(lines)))
+
+    assert excinfo.value.returncode == 3
+
+
+def test_error(tmp_path: Path) -> None:
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        run_script(tmp_path, """
+            import sys
+            sys.exit(7)
+        """)
+
+    assert excinfo.value.returncode == 7
+
+
+def test_cancelled_process_terminated(tmp_path: Path) -> None:
+    pid_file = tmp_path / 'pid'
+    path = tmp_path / 'script.py'
+    path.write_text(dedent(f"""
+        import os, time
+        with open({str(pid_file)!r}, 'w') as f:
+            f.write(str(os.getpid()))
+        time.sleep(60)
+    """))
+
+    async def main() -> None:
+        task = asyncio.ensure_future(
+            check_call([*python_cmdline, path], prefix='layer'))
+        for _ in range(500):
+            if pid_file.exists() and pid_file.read_text():
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.monotonic()
+    asyncio.run(main())
+
+    assert time.monotonic() - start < 10
+    pid = int(pid_file.read_text())
+    # the process has been reaped, thus the pid no longer exists
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
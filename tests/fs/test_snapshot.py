@@ -0,0 +1,141 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterator, Protocol
+
+import pytest
+
+from ptl import fs
+from ptl.commands import show
+from ptl.infile import get_infiles, get_input_dir
+from ptl.layer import LayerType, validate_layers
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class Function(Protocol):
+    def __call__(self, *args: object, **kwargs: object) -> object:
+        ...
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    @pytest.fixture
+    def syscalls(self, monkeypatch: pytest.MonkeyPatch) -> Dict[str, int]:
+        counts = {'scandir': 0, 'stat': 0, 'lstat': 0}
+
+        def counting(name: str, func: Function) -> Function:
+            def wrapper(*args: object, **kwargs: object) -> object:
+                counts[name] += 1
+                return func(*args, **kwargs)
+            return wrapper
+
+        for name in counts:
+            monkeypatch.setattr(os, name, counting(name, getattr(os, name)))
+        return counts
+
+    @pytest.fixture
+    def scope(self) -> Iterator[None]:
+        with fs.snapshot_scope():
+            yield
+
+    def test_snapshot(self) -> None:
+        self.create_file('base.in')
+        self.create_file('base.txt')
+        (self.input_dir / 'subdir').mkdir()
+        (self.input_dir / 'broken.in').symlink_to('missing.in')
+
+        snapshot = fs.DirectorySnapshot(self.input_dir)
+
+        assert snapshot.exists
+        assert snapshot.get_file_names() == ['base.in', 'base.txt']
+        assert snapshot.get_file_names('.in') == ['base.in']
+        assert snapshot.is_file('base.in')
+        assert not snapshot.is_file('subdir')
+        assert snapshot.is_dir('subdir')
+        assert snapshot.has('subdir')
+        assert not snapshot.has('broken.in')
+
+    def test_snapshot_missing_directory(self) -> None:
+        snapshot = fs.DirectorySnapshot(self.input_dir / 'missing')
+
+        assert not snapshot.exists
+        assert not snapshot.has('base.in')
+
+    def test_no_scope_not_cached(self) -> None:
+        assert not fs.is_file(self.input_dir / 'base.in')
+        self.create_file('base.in')
+
+        assert fs.is_file(self.input_dir / 'base.in')
+
+    def test_no_scope_not_scanned(self, syscalls: Dict[str, int]) -> None:
+        self.create_file('base.in')
+
+        assert fs.is_file(self.input_dir / 'base.in')
+        assert fs.exists(self.input_dir / 'base.in')
+        assert not fs.is_dir(self.input_dir / 'base.in')
+        assert syscalls['scandir'] == 0
+
+    def test_command_opens_scope(
+        self, syscalls: Dict[str, int], capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        for i in range(20):
+            self.create_file(f'layer-{i}.in', 'foo\n')
+
+        # an API call, not wrapped in a scope
+        show(input_dir=self.input_dir, layers=[
+            f'layer-{i}' for i in range(20)])
+
+        assert syscalls['scandir'] == 2
+
+    @pytest.mark.usefixtures('scope')
+    def test_scope_cached_until_invalidated(self) -> None:
+        assert not fs.exists(self.input_dir / 'base.in')
+        self.create_file('base.in')
+
+        assert not fs.exists(self.input_dir / 'base.in')
+        fs.invalidate_snapshot(self.input_dir)
+        assert fs.exists(self.input_dir / 'base.in')
+
+    @pytest.mark.usefixtures('scope')
+    def test_special_names(self, tmp_cwd: Path) -> None:
+        assert fs.is_dir('.')
+        assert fs.exists('..')
+        assert fs.is_dir(tmp_cwd / '..')
+
+    @pytest.mark.usefixtures('scope')
+    def test_resolve_cached(self, syscalls: Dict[str, int]) -> None:
+        assert fs.resolve(self.input_dir) == self.input_dir.resolve()
+        lstat_count = syscalls['lstat']
+
+        fs.resolve(self.input_dir)
+
+        assert syscalls['lstat'] == lstat_count
+
+    def resolve_layers(self, count: int) -> None:
+        with fs.snapshot_scope():
+            input_dir = get_input_dir(self.input_dir)
+            layers = validate_layers(
+                [f'layer-{i}' for i in range(count)], LayerType.INFILE,
+                input_dir=input_dir, check_exists=True, check_type=False,
+            )
+            get_infiles(input_dir, layers=layers)
+
+    def test_syscalls_do_not_grow_with_layers(
+        self, syscalls: Dict[str, int],
+    ) -> None:
+        for i in range(20):
+            self.create_file(f'layer-{i}.in', 'foo\n')
+        for i in range(20):
+            self.create_file(f'layer-{i}.requirements.txt')
+        self.resolve_layers(1)
+        single = dict(syscalls)
+        for name in syscalls:
+            syscalls[name] = 0
+
+        self.resolve_layers(20)
+
+        # a single scan of the input directory and its parent (to check the
+        # input directory itself), the graph index stats loaded files only
+        assert syscalls['scandir'] == single['scandir'] == 2
+        assert syscalls['lstat'] == single['lstat']
+        assert syscalls['stat'] - single['stat'] <= 19
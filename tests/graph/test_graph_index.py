@@ -0,0 +1,100 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from ptl import __version__
+from ptl.graph import GRAPH_VERSION, GraphIndex
+
+from tests.testlib import InFileTestSuiteBase
+
+
+# mtime far enough in the past not to be considered racy
+OLD_MTIME = 1_600_000_000
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    @property
+    def index_path(self) -> Path:
+        return self.input_dir / '.ptl' / 'graph.json'
+
+    def create_old_file(self, name: str, content: str) -> os.stat_result:
+        path = self.create_file(name, content)
+        os.utime(path, (OLD_MTIME, OLD_MTIME))
+        return path.stat()
+
+    def test_set_and_save(self) -> None:
+        stat = self.create_old_file('main.in', 'foo\n-r base\n')
+        index = GraphIndex(self.input_dir)
+
+        index.set('main.in', stat, [('r', 'base'), ('d', 'foo')])
+        index.save()
+
+        loaded = GraphIndex(self.input_dir)
+        assert loaded.get('main.in', stat) == [('r', 'base'), ('d', 'foo')]
+        assert (self.input_dir / '.ptl' / '.gitignore').read_text() == '*\n'
+
+    def test_stat_changed(self) -> None:
+        stat = self.create_old_file('main.in', 'foo\n')
+        index = GraphIndex(self.input_dir)
+        index.set('main.in', stat, [('d', 'foo')])
+        index.save()
+
+        stat = self.create_old_file('main.in', 'foo\nbar\n')
+
+        assert GraphIndex(self.input_dir).get('main.in', stat) is None
+
+    def test_racy_file_not_indexed(self) -> None:
+        stat = self.create_file('main.in', 'foo\n').stat()
+        index = GraphIndex(self.input_dir)
+
+        index.set('main.in', stat, [('d', 'foo')])
+        index.save()
+
+        assert GraphIndex(self.input_dir).get('main.in', stat) is None
+
+    def test_unseen_entries_dropped(self) -> None:
+        main_stat = self.create_old_file('main.in', 'foo\n')
+        base_stat = self.create_old_file('base.in', 'bar\n')
+        index = GraphIndex(self.input_dir)
+        index.set('main.in', main_stat, [('d', 'foo')])
+        index.set('base.in', base_stat, [('d', 'bar')])
+        index.save()
+
+        index = GraphIndex(self.input_dir)
+        assert index.get('main.in', main_stat) is not None
+        index.save()
+
+        index = GraphIndex(self.input_dir)
+        assert index.get('main.in', main_stat) is not None
+        assert index.get('base.in', base_stat) is None
+
+    @pytest.mark.parametrize('content', [
+        'not a json',
+        '[]',
+        '{"version": 1}',
+        json.dumps({
+            'version': GRAPH_VERSION - 1, 'ptl_version': __version__,
+            'infiles': {},
+        }),
+        json.dumps({
+            'version': GRAPH_VERSION, 'ptl_version': '0.0.0', 'infiles': {},
+        }),
+    ])
+    def test_invalid_index_ignored(self, content: str) -> None:
+        stat = self.create_old_file('main.in', 'foo\n')
+        self.index_path.parent.mkdir()
+        self.index_path.write_text(content)
+
+        assert GraphIndex(self.input_dir).get('main.in', stat) is None
+
+    def test_write_failure_ignored(self) -> None:
+        stat = self.create_old_file('main.in', 'foo\n')
+        # the state directory can't be created
+        (self.input_dir / '.ptl').write_text('')
+        index = GraphIndex(self.input_dir)
+
+        index.set('main.in', stat, [('d', 'foo')])
+        index.save()
@@ -0,0 +1,164 @@
+import subprocess
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from ptl import history as history_module
+from ptl.history import (
+    HAS_RESOURCE, CacheStatus, History, HistoryError, Run, UsageTracker,
+    get_tool_info,
+)
+
+
+RUN = Run(
+    command='compile', layer='base', tool='dummy',
+    options_hash='0123456789ab', wall_time=1.0,
+)
+
+
+@pytest.fixture
+def history(input_dir: Path) -> History:
+    return History(input_dir)
+
+
+def test_no_history(history: History) -> None:
+    assert list(history.iterate_runs()) == []
+    assert history.get_layer_stats() == []
+    assert history.get_cache_hit_rate() is None
+    assert not history.path.exists()
+
+
+def test_record(history: History, input_dir: Path) -> None:
+    run_1 = replace(RUN, lock_changed=True, user_time=0.5, max_rss=1024)
+    run_2 = replace(
+        RUN, command='sync', layer='base,dev', exit_code=1)
+
+    history.record(run_1)
+    history.record(run_2)
+    history.close()
+
+    assert (input_dir / '.ptl' / 'history.db').is_file()
+    assert (input_dir / '.ptl' / '.gitignore').is_file()
+    with History(input_dir) as reopened:
+        assert list(reopened.iterate_runs()) == [run_1, run_2]
+        assert list(reopened.iterate_runs('sync')) == [run_2]
+
+
+def test_oldest_rows_deleted(
+    history: History, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(history_module, 'HISTORY_MAX_ROWS', 3)
+
+    for index in range(5):
+        history.record(replace(RUN, wall_time=index))
+
+    assert [run.wall_time for run in history.iterate_runs()] == [2, 3, 4]
+
+
+def test_record_error_ignored(
+    input_dir: Path, caplog: pytest.LogCaptureFixture,
+) -> None:
+    (input_dir / '.ptl').write_text('not a directory')
+
+    History(input_dir).record(RUN)
+
+    assert 'failed to record history' in caplog.text
+
+
+def test_record_corrupted_database_ignored(
+    history: History, caplog: pytest.LogCaptureFixture,
+) -> None:
+    history.path.parent.mkdir()
+    history.path.write_bytes(b'not an sqlite database' * 100)
+
+    history.record(RUN)
+
+    assert 'failed to record history' in caplog.text
+    assert 'file is not a database' in caplog.text
+
+
+def test_iterate_runs_corrupted_database(history: History) -> None:
+    history.path.parent.mkdir()
+    history.path.write_bytes(b'not an sqlite database' * 100)
+
+    with pytest.raises(HistoryError, match='failed to read history'):
+        list(history.iterate_runs())
+
+
+def test_layer_stats(history: History) -> None:
+    for wall_time in [1.0, 1.0, 3.0, 3.0]:
+        history.record(replace(RUN, layer='slow', wall_time=wall_time))
+    history.record(
+        replace(RUN, layer='slow', wall_time=100.0, exit_code=1))
+    history.record(replace(
+        RUN, layer='fast', wall_time=0.5, user_time=0.2, system_time=0.1,
+        max_rss=2048,
+    ))
+    history.record(replace(
+        RUN, layer='fast', wall_time=0.01, cache=CacheStatus.HIT))
+    history.record(replace(RUN, layer='cached', cache=CacheStatus.HIT))
+
+    stats = history.get_layer_stats(trend_window=2)
+
+    assert stats == [
+        {
+            'layer': 'slow',
+            'runs': 5,
+            'failures': 1,
+            'avg_wall_time': 3.0,
+            'last_wall_time': 3.0,
+            'prev_avg_wall_time': 1.0,
+            'avg_cpu_time': None,
+            'max_rss': None,
+        },
+        {
+            'layer': 'fast',
+            'runs': 2,
+            'failures': 0,
+            'avg_wall_time': 0.5,
+            'last_wall_time': 0.5,
+            'prev_avg_wall_time': None,
+            'avg_cpu_time': pytest.approx(0.3),
+            'max_rss': 2048,
+        },
+    ]
+
+
+def test_cache_hit_rate(history: History) -> None:
+    history.record(replace(RUN, cache=CacheStatus.HIT))
+    history.record(replace(RUN, cache=CacheStatus.HIT))
+    history.record(replace(RUN, cache=CacheStatus.HIT))
+    history.record(replace(RUN, cache=CacheStatus.MISS))
+    history.record(replace(RUN, cache=None))
+
+    assert history.get_cache_hit_rate() == 0.75
+
+
+def test_get_tool_info() -> None:
+    tool, options_hash = get_tool_info(
+        [Path('/usr/bin/pip-compile'), '--upgrade'])
+
+    assert tool == 'pip-compile'
+    assert len(options_hash) == 12
+    assert get_tool_info(['pip-compile', '--upgrade'])[1] == options_hash
+    assert get_tool_info(['pip-compile'])[1] != options_hash
+
+
+@pytest.mark.skipif(not HAS_RESOURCE, reason='resource is not available')
+def test_usage_tracker() -> None:
+    tracker = UsageTracker()
+    subprocess.check_call([
+        sys.executable, '-S', '-c',
+        'data = bytearray(64 * 1024 * 1024)\n'
+        'sum(range(3_000_000))',
+    ])
+
+    user_time, system_time, max_rss = tracker.get_delta()
+
+    assert user_time is not None and user_time > 0
+    assert system_time is not None and system_time >= 0
+    assert max_rss is None or max_rss > 64 * 1024
+    # nothing happened since the previous call
+    assert tracker.get_delta() == (0, 0, None)
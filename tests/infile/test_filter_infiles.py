@@ -97,6 +97,33 @@ class TestSuite(InFileTestSuiteBase):
             self.infiles['grand-1-1'], self.infiles['grand-2-2'],
         ]
 
+    def test_include_dependents(self) -> None:
+        layers = [self.layers['grand-1-2'], self.layers['parent-2']]
+
+        infiles = filter_infiles(
+            self.infiles.values(), layers,
+            include_parent_layers=False, include_dependent_layers=True,
+        )
+
+        assert infiles == [
+            self.infiles['main'],
+            self.infiles['parent-1'], self.infiles['parent-2'],
+            self.infiles['grand-1-2'],
+        ]
+
+    def test_include_parents_and_dependents(self) -> None:
+        layers = [self.layers['parent-1']]
+
+        infiles = filter_infiles(
+            self.infiles.values(), layers,
+            include_parent_layers=True, include_dependent_layers=True,
+        )
+
+        assert infiles == [
+            self.infiles['main'], self.infiles['parent-1'],
+            self.infiles['grand-1-1'], self.infiles['grand-1-2'],
+        ]
+
     def test_only_layer_stem_matters(self, tmp_path: Path) -> None:
         # currently we don't check layer path, type, etc.,
         # we only use its stem to filter infiles
@@ -0,0 +1,54 @@
+from ptl.exceptions import CircularReference
+from ptl.infile import InFile, Reference, find_cycles
+
+
+def test_no_cycles() -> None:
+    base = InFile('base.in')
+    child = InFile('child.in')
+    child.add_reference(Reference('c', base))
+
+    assert find_cycles([base, child]) == []
+
+
+def test_cycles() -> None:
+    a, b, c, d = (InFile(f'{stem}.in') for stem in 'abcd')
+    x, y = InFile('x.in'), InFile('y.in')
+    self_ref = InFile('self.in')
+    downstream = InFile('downstream.in')
+    # a -> b -> c -> a, with a shortcut c -> b and a longer way b -> d -> c
+    a.add_reference(Reference('c', b))
+    b.add_reference(Reference('c', d))
+    b.add_reference(Reference('c', c))
+    d.add_reference(Reference('c', c))
+    c.add_reference(Reference('r', b))
+    c.add_reference(Reference('r', a))
+    y.add_reference(Reference('c', x))
+    x.add_reference(Reference('c', y))
+    self_ref.add_reference(Reference('c', self_ref))
+    downstream.add_reference(Reference('c', a))
+    downstream.add_reference(Reference('c', x))
+
+    cycles = find_cycles([downstream, self_ref, y, x, d, c, b, a])
+
+    assert cycles == [[a, b, c], [self_ref], [x, y]]
+    assert str(CircularReference(*cycles)) == (
+        'a.in -> b.in -> c.in -> a.in; '
+        'self.in -> self.in; '
+        'x.in -> y.in -> x.in'
+    )
+
+
+def test_references_outside_of_infiles_ignored() -> None:
+    a, b = InFile('a.in'), InFile('b.in')
+    a.add_reference(Reference('c', b))
+    b.add_reference(Reference('c', a))
+
+    assert find_cycles([a]) == []
+
+
+def test_long_cycle() -> None:
+    infiles = [InFile(f'layer-{i:05}.in') for i in range(5000)]
+    for infile, next_infile in zip(infiles, [*infiles[1:], infiles[0]]):
+        infile.add_reference(Reference('c', next_infile))
+
+    assert find_cycles(infiles) == [infiles]
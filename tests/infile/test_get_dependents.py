@@ -0,0 +1,27 @@
+from ptl.infile import InFile, Reference, get_dependents, iterate_dependents
+
+
+def test() -> None:
+    base = InFile('base.in')
+    left = InFile('left.in')
+    right = InFile('right.in')
+    top = InFile('top.in')
+    other = InFile('other.in')
+    left.add_reference(Reference('c', base))
+    right.add_reference(Reference('r', base))
+    top.add_reference(Reference('c', left))
+    top.add_reference(Reference('r', right))
+
+    dependents = get_dependents([base, left, right, top, other])
+
+    assert dependents == {
+        base: [left, right],
+        left: [top],
+        right: [top],
+        top: [],
+        other: [],
+    }
+    assert list(iterate_dependents(base, dependents)) == [left, right, top]
+    assert list(iterate_dependents(left, dependents)) == [top]
+    assert list(iterate_dependents(top, dependents)) == []
+    assert list(iterate_dependents(other, dependents)) == []
@@ -2,7 +2,9 @@ import logging
 
 import pytest
 
-from ptl.infile import InFile, InputDirectoryError, ReferenceType, get_infiles
+from ptl.infile import (
+    InFile, InputDirectoryError, ReferenceType, UnknownReference, get_infiles,
+)
 from ptl.layer import Layer
 
 from tests.testlib import InFileTestSuiteBase
@@ -98,6 +100,24 @@ class TestSuite(InFileTestSuiteBase):
             InFile('main.in'),
         ]
 
+    def test_filtering_unrelated_infiles_not_read(self) -> None:
+        self.prepare_files()
+        self.create_file('broken.in', '-r unknown')
+        layer = Layer(self.input_dir / 'parent-2.in')
+
+        infiles = get_infiles(self.input_dir, layers=[layer])
+
+        assert infiles == [InFile('grandparent-2.in'), InFile('parent-2.in')]
+
+    def test_filtering_dependents_all_infiles_read(self) -> None:
+        self.prepare_files()
+        self.create_file('broken.in', '-r unknown')
+        layer = Layer(self.input_dir / 'parent-2.in')
+
+        with pytest.raises(UnknownReference, match='broken.in: unknown'):
+            get_infiles(
+                self.input_dir, layers=[layer], include_dependent_layers=True)
+
     def test_no_infiles(self) -> None:
         with pytest.raises(InputDirectoryError, match=r'no \*\.in files'):
             get_infiles(self.input_dir)
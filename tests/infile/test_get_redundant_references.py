@@ -0,0 +1,94 @@
+import pytest
+
+from ptl.infile import InFile, Reference, get_redundant_references
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    @pytest.fixture(autouse=True)
+    def setup(self, base_setup: None) -> None:
+        self.base = InFile('base.in')
+        self.dev = InFile('dev.in')
+        self.test = InFile('test.in')
+        self.top = InFile('top.in')
+        self.dev.add_reference(Reference('c', self.base))
+        self.test.add_reference(Reference('c', self.base))
+        self.top.add_reference(Reference('c', self.dev))
+        self.top.add_reference(Reference('r', self.test))
+
+    def test_subset(self) -> None:
+        self.create_file('base.txt', """
+            # this file is autogenerated
+            attrs==23.2.0
+                # via -r base.in
+        """)
+        self.create_file('dev.txt', """
+            attrs==23.2.0
+                # via -r dev.in
+            pytest==8.2.2    # via -r dev.in
+        """)
+        self.create_file('test.txt', 'tox==4.15.0\n')
+
+        redundant = get_redundant_references(self.top, self.input_dir)
+
+        assert redundant == {self.base}
+
+    def test_hashes(self) -> None:
+        self.create_file('base.txt', """
+            attrs==23.2.0 \\
+                --hash=sha256:aaa \\
+                --hash=sha256:bbb
+        """)
+        self.create_file('dev.txt', """
+            attrs==23.2.0 \\
+                --hash=sha256:aaa \\
+                --hash=sha256:bbb
+                # via -r dev.in
+            pytest==8.2.2 \\
+                --hash=sha256:ccc
+        """)
+        self.create_file('test.txt', 'tox==4.15.0\n')
+
+        redundant = get_redundant_references(self.top, self.input_dir)
+
+        assert redundant == {self.base}
+
+    def test_equal_first_kept(self) -> None:
+        self.create_file('base.txt', 'attrs==23.2.0\n')
+        self.create_file('dev.txt', 'pytest==8.2.2\n')
+        self.create_file('test.txt', 'pytest==8.2.2\n')
+
+        redundant = get_redundant_references(self.top, self.input_dir)
+
+        assert redundant == {self.test}
+
+    def test_not_subset(self) -> None:
+        self.create_file('base.txt', 'attrs==23.2.0\nsix==1.16.0\n')
+        self.create_file('dev.txt', 'attrs==23.2.0\npytest==8.2.2\n')
+        self.create_file('test.txt', 'attrs==23.1.0\n')
+
+        redundant = get_redundant_references(self.top, self.input_dir)
+
+        assert redundant == set()
+
+    def test_options_not_compared(self) -> None:
+        self.create_file('base.txt', """
+            --index-url https://example.com/simple
+            attrs==23.2.0
+        """)
+        self.create_file('dev.txt', 'attrs==23.2.0\npytest==8.2.2\n')
+        self.create_file('test.txt', 'tox==4.15.0\n')
+
+        redundant = get_redundant_references(self.top, self.input_dir)
+
+        assert redundant == set()
+
+    def test_missing_lock(self) -> None:
+        self.create_file('dev.txt', 'pytest==8.2.2\n')
+        self.create_file('test.txt', 'pytest==8.2.2\ntox==4.15.0\n')
+
+        redundant = get_redundant_references(self.top, self.input_dir)
+
+        assert redundant == {self.dev}
@@ -0,0 +1,45 @@
+import pytest
+
+from ptl.infile import has_relative_path
+
+
+@pytest.mark.parametrize('line', [
+    '-r ../shared/extra.txt',
+    '-rextra.txt',
+    '--requirement=extra.txt',
+    '-c ../pins.txt',
+    '--constraint ./pins.txt',
+    '-e ./pkg',
+    '-e .',
+    '--editable=../pkg',
+    '-f ./wheels',
+    '--find-links wheels',
+    './pkg',
+    '.[extra]',
+    'dist/pkg-1.0.tar.gz',
+    'pkg-1.0-py3-none-any.whl',
+    'pkg @ file:../pkg',
+    'pkg@./pkg ; python_version >= "3.8"',
+])
+def test_relative(line: str) -> None:
+    assert has_relative_path(line)
+
+
+@pytest.mark.parametrize('line', [
+    'foo',
+    'foo[extra]>=1.0,<2',
+    'foo==1.0 ; sys_platform == "linux/x"',
+    'foo==1.0 --hash=sha256:0123abcd',
+    'pkg @ https://example.com/pkg-1.0.tar.gz',
+    'pkg @ file:///abs/pkg',
+    '/abs/pkg-1.0-py3-none-any.whl',
+    '-r /abs/extra.txt',
+    '-e git+https://example.com/pkg.git#egg=pkg',
+    '--find-links https://example.com/wheels',
+    '--index-url https://example.com/simple',
+    '--extra-index-url=https://example.com/simple',
+    '--pre',
+    '--no-binary :all:',
+])
+def test_not_relative(line: str) -> None:
+    assert not has_relative_path(line)
@@ -3,7 +3,7 @@ from typing import Dict, Union
 
 import pytest
 
-from ptl.exceptions import InFileNameError
+from ptl.exceptions import CircularReference, InFileNameError
 from ptl.infile import InFile, Reference, ReferenceType, ReferenceTypeOrLiteral
 
 
@@ -216,6 +216,73 @@ def test_iterate_references_recursive_as(as_: ReferenceTypeOrLiteral) -> None:
     ]
 
 
+def test_iterate_references_recursive_diamond() -> None:
+    top = InFile('top.in')
+    left = InFile('left.in')
+    right = InFile('right.in')
+    base = InFile('base.in')
+    core = InFile('core.in')
+    top.add_reference(Reference('c', left))
+    top.add_reference(Reference('r', right))
+    left.add_reference(Reference('r', base))
+    right.add_reference(Reference('r', base))
+    base.add_reference(Reference('c', core))
+
+    references = list(top.iterate_references(recursive=True))
+
+    # base is reachable via requirements references only through right
+    assert references == [
+        Reference('c', left),
+        Reference('r', base),
+        Reference('c', core),
+        Reference('r', right),
+    ]
+
+
+def test_iterate_references_recursive_invalidated() -> None:
+    child = InFile('child.in')
+    parent = InFile('parent.in')
+    grand = InFile('grand.in')
+    child.add_reference(Reference('r', parent))
+    assert list(child.iterate_references(recursive=True)) == [
+        Reference('r', parent)]
+
+    parent.add_reference(Reference('r', grand))
+
+    assert list(child.iterate_references(recursive=True)) == [
+        Reference('r', parent), Reference('r', grand)]
+
+    parent.clear()
+
+    assert list(child.iterate_references(recursive=True)) == [
+        Reference('r', parent)]
+
+
+def test_iterate_references_recursive_deep() -> None:
+    # deeper than the recursion limit
+    infiles = [InFile(f'layer-{i:05}.in') for i in range(1500)]
+    for parent, child in zip(infiles, infiles[1:]):
+        child.add_reference(Reference('c', parent))
+
+    references = list(infiles[-1].iterate_references(recursive=True))
+
+    assert [ref.infile for ref in references] == infiles[-2::-1]
+
+
+def test_iterate_references_recursive_circular() -> None:
+    child = InFile('child.in')
+    parent = InFile('parent.in')
+    grand = InFile('grand.in')
+    child.add_reference(Reference('c', parent))
+    parent.add_reference(Reference('c', grand))
+    grand.add_reference(Reference('r', parent))
+
+    with pytest.raises(CircularReference) as excinfo:
+        list(child.iterate_references(recursive=True))
+
+    assert excinfo.value.infiles == (parent, grand)
+
+
 def test_render() -> None:
     infile = build_infile_with_refs()
 
@@ -267,6 +334,40 @@ def test_render_as_constraints() -> None:
     )
 
 
+def test_iterate_lines_references_dir() -> None:
+    infile = build_infile_with_refs()
+
+    lines = infile.iterate_lines(references_dir=Path('reqs'))
+
+    assert list(lines) == [
+        '-c reqs/parent-1.txt\n',
+        '-c reqs/grand-1-1.txt\n',
+        '-c reqs/grand-1-2.txt\n',
+        '-r reqs/parent-2.txt\n',
+        '-r reqs/grand-2-1.txt\n',
+        '-c reqs/grand-2-2.txt\n',
+        'pytest <7\n',
+        'tox==4.15.0\n',
+    ]
+
+
+def test_iterate_lines_constraints() -> None:
+    infile = build_infile_with_refs()
+    excluded = {
+        ref.infile for ref in infile.iterate_references(recursive=True)}
+
+    lines = infile.iterate_lines(
+        references_dir=Path('reqs'), exclude=excluded,
+        constraints='.ptl/constraints/main.txt',
+    )
+
+    assert list(lines) == [
+        '-c reqs/.ptl/constraints/main.txt\n',
+        'pytest <7\n',
+        'tox==4.15.0\n',
+    ]
+
+
 def test_write_to(input_dir: Path) -> None:
     infile = build_infile_with_refs()
     infile_path = input_dir / 'main.ptl.in'
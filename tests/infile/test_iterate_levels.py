@@ -0,0 +1,83 @@
+import pytest
+
+from ptl.infile import CircularReference, InFile, Reference, iterate_levels
+
+
+def test_ok() -> None:
+    child_1 = InFile('child-1.in')
+    child_2 = InFile('child-2.in')
+    parent_1 = InFile('parent-1.in')
+    parent_2 = InFile('parent-2.in')
+    grandparent = InFile('grandparent.in')
+    child_1.add_reference(Reference('c', parent_1))
+    child_1.add_reference(Reference('r', parent_2))
+    child_2.add_reference(Reference('c', parent_2))
+    # referenced both directly and transitively
+    child_2.add_reference(Reference('c', grandparent))
+    parent_1.add_reference(Reference('c', grandparent))
+    parent_2.add_reference(Reference('r', grandparent))
+    infiles = [child_2, child_1, parent_2, parent_1, grandparent]
+
+    levels = list(iterate_levels(infiles))
+
+    assert levels == [
+        [grandparent],
+        [parent_1, parent_2],
+        [child_1, child_2],
+    ]
+
+
+def test_references_outside_of_infiles_ignored() -> None:
+    child = InFile('child.in')
+    parent = InFile('parent.in')
+    other = InFile('other.in')
+    child.add_reference(Reference('c', parent))
+
+    levels = list(iterate_levels([child, other]))
+
+    assert levels == [[child, other]]
+
+
+def test_duplicates() -> None:
+    child = InFile('child.in')
+    parent = InFile('parent.in')
+    child.add_reference(Reference('c', parent))
+    child.add_reference(Reference('r', parent))
+
+    levels = list(iterate_levels([child, parent, child]))
+
+    assert levels == [[parent], [child]]
+
+
+def test_empty() -> None:
+    assert list(iterate_levels([])) == []
+
+
+def test_deep_chain() -> None:
+    infiles = [InFile(f'layer-{i:05}.in') for i in range(5000)]
+    for parent, child in zip(infiles, infiles[1:]):
+        child.add_reference(Reference('c', parent))
+
+    levels = list(iterate_levels(reversed(infiles)))
+
+    assert levels == [[infile] for infile in infiles]
+
+
+def test_circular_reference() -> None:
+    base = InFile('base.in')
+    child = InFile('child.in')
+    parent = InFile('parent.in')
+    dependent = InFile('dependent.in')
+    child.add_reference(Reference('c', parent))
+    parent.add_reference(Reference('c', base))
+    parent.add_reference(Reference('c', child))
+    dependent.add_reference(Reference('c', child))
+    levels = iterate_levels([base, child, parent, dependent])
+
+    # levels preceding the cycle are yielded
+    assert next(levels) == [base]
+    with pytest.raises(CircularReference) as excinfo:
+        next(levels)
+
+    # dependent is not on the cycle
+    assert excinfo.value.cycles == ((child, parent),)
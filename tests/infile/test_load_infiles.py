@@ -0,0 +1,99 @@
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from ptl import infile as infile_module
+from ptl.graph import GraphIndex
+from ptl.infile import (
+    InFile, InputDirectoryError, Reference, UnknownReference, load_infiles,
+)
+from ptl.layer import Layer, LayerType
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    def prepare_files(self) -> None:
+        self.create_file('dev.in', '-c main\n')
+        self.create_file('main.in', """
+            -c parent.txt
+            foo
+        """)
+        self.create_file('parent.requirements.in', """
+            -r grandparent
+            bar
+        """)
+        self.create_file('grandparent.in')
+        # unrelated files are not read, even if they are broken
+        self.create_file('unrelated.in', '-r unknown\n')
+        self.create_file('conflict.in')
+        self.create_file('conflict.requirements.in')
+
+    def layer(self, name: str) -> Layer:
+        return Layer(name, LayerType.INFILE, input_dir=self.input_dir)
+
+    def test_closure_loaded(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        self.prepare_files()
+        parse_mock = Mock(wraps=infile_module._parse_file)
+        monkeypatch.setattr(infile_module, '_parse_file', parse_mock)
+
+        infiles = load_infiles(self.input_dir, [self.layer('main.in')])
+
+        assert infiles == (
+            InFile('main.in'),
+            InFile('parent.requirements.in'),
+            InFile('grandparent.in'),
+        )
+        assert sorted(
+            call.args[0].name for call in parse_mock.call_args_list
+        ) == ['grandparent.in', 'main.in', 'parent.requirements.in']
+        main, parent, grandparent = infiles
+        assert main.references == [Reference('c', parent)]
+        assert main.dependencies == ['foo']
+        assert parent.references == [Reference('r', grandparent)]
+        assert main.references[0].infile is parent
+
+    def test_shared_references_loaded_once(self) -> None:
+        self.prepare_files()
+
+        infiles = load_infiles(
+            self.input_dir, [self.layer('dev'), self.layer('main')])
+
+        assert infiles == (
+            InFile('dev.in'),
+            InFile('main.in'),
+            InFile('parent.requirements.in'),
+            InFile('grandparent.in'),
+        )
+
+    def test_unknown_reference(self) -> None:
+        self.prepare_files()
+
+        with pytest.raises(UnknownReference, match='unrelated.in: unknown'):
+            load_infiles(self.input_dir, [self.layer('unrelated')])
+
+    def test_conflicting_names(self) -> None:
+        self.prepare_files()
+        self.create_file('main.requirements.in')
+
+        with pytest.raises(
+            InputDirectoryError,
+            match='conflicting names: main.in, main.requirements.in',
+        ):
+            load_infiles(self.input_dir, [self.layer('main.in')])
+
+    def test_index_not_pruned(self) -> None:
+        self.prepare_files()
+        for path in self.input_dir.glob('*.in'):
+            # old enough not to be considered racy by the index
+            os.utime(path, (1_600_000_000, 1_600_000_000))
+        load_infiles(self.input_dir, [self.layer('dev')])
+
+        load_infiles(self.input_dir, [self.layer('grandparent')])
+
+        index = GraphIndex(self.input_dir)
+        for name in ['dev.in', 'main.in', 'grandparent.in']:
+            stat = (self.input_dir / name).stat()
+            assert index.get(name, stat) is not None
@@ -1,7 +1,10 @@
+import os
 from typing import Iterable
+from unittest.mock import Mock
 
 import pytest
 
+from ptl import infile as infile_module
 from ptl.exceptions import InputDirectoryError, UnknownReference
 from ptl.infile import InFile, Reference, read_infiles
 
@@ -96,6 +99,26 @@ class TestSuite(InFileTestSuiteBase):
             Reference('r', InFile('parent-6.requirements.in')),
         ]
 
+    def test_parsing_options_and_continuations(self) -> None:
+        self.create_file('parent.in')
+        self.create_file('main.in', """
+            --index-url https://example.com/simple
+            -r ./parent.in
+            foo \\
+                >=1.0
+            -r ../other/base.in
+        """)
+
+        infiles = read_infiles(self.input_dir)
+
+        main = self.get_main_infile(infiles)
+        assert main.references == [Reference('r', InFile('parent.in'))]
+        assert main.dependencies == [
+            '--index-url https://example.com/simple',
+            'foo >=1.0',
+            '-r ../other/base.in',
+        ]
+
     def test_unknown_reference(self) -> None:
         self.create_file('main.in', '-r unknown.txt')
 
@@ -113,3 +136,48 @@ class TestSuite(InFileTestSuiteBase):
             'conflicting names: main.in, main.requirements.in',
             'conflicting names: main.requirements.in, main.in',
         ]
+
+    def create_old_files(self, **contents: str) -> None:
+        for stem, content in contents.items():
+            path = self.create_file(f'{stem}.in', content)
+            # old enough not to be considered racy by the index
+            os.utime(path, (1_600_000_000, 1_600_000_000))
+
+    def test_index(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        self.create_old_files(base='foo\n', main='-c base\nbar\n')
+        parse_mock = Mock(wraps=infile_module._parse_file)
+        monkeypatch.setattr(infile_module, '_parse_file', parse_mock)
+
+        first = read_infiles(self.input_dir)
+        assert parse_mock.call_count == 2
+        parse_mock.reset_mock()
+        second = read_infiles(self.input_dir)
+        assert parse_mock.call_count == 0
+        self.create_old_files(main='-r base\nbar\nbaz\n')
+        third = read_infiles(self.input_dir)
+
+        assert parse_mock.call_count == 1
+        assert parse_mock.call_args.args[0].name == 'main.in'
+        for infiles in [first, second]:
+            main = self.get_main_infile(infiles)
+            assert main.references == [Reference('c', InFile('base.in'))]
+            assert main.dependencies == ['bar']
+        main = self.get_main_infile(third)
+        assert main.references == [Reference('r', InFile('base.in'))]
+        assert main.dependencies == ['bar', 'baz']
+
+    def test_index_unknown_reference(self) -> None:
+        self.create_old_files(base='', main='-c base\n')
+        read_infiles(self.input_dir)
+        (self.input_dir / 'base.in').unlink()
+
+        with pytest.raises(UnknownReference, match='main.in: base'):
+            read_infiles(self.input_dir)
+
+    def test_no_index(self) -> None:
+        self.create_old_files(main='foo\n')
+
+        infiles = read_infiles(self.input_dir, use_index=False)
+
+        assert self.get_main_infile(infiles).dependencies == ['foo']
+        assert not (self.input_dir / '.ptl').exists()
@@ -58,3 +58,14 @@ def test_copy_as(ref_type: ReferenceTypeOrLiteral) -> None:
     ref_copy = ref.copy_as(ref_type)
 
     assert ref_copy == Reference(ReferenceType.REQUIREMENTS, infile)
+
+
+def test_interned() -> None:
+    infile = InFile('main.in')
+    ref = Reference('r', infile)
+
+    assert Reference(ReferenceType.REQUIREMENTS, infile) is ref
+    assert ref.copy_as('r') is ref
+    assert ref.copy_as('c') is Reference('c', infile)
+    assert Reference('r', InFile('main.in')) is not ref
+    assert not hasattr(ref, '__dict__')
@@ -45,4 +45,5 @@ def test_circular_reference() -> None:
         sort_infiles([child, parent, grandparent_1])
 
     assert set(excinfo.value.infiles) == {child, parent, grandparent_1}
-    assert 'child.in' in str(excinfo.value)
+    assert str(excinfo.value) == (
+        'child.in -> parent.in -> grandparent-1.in -> child.in')
@@ -0,0 +1,63 @@
+import pytest
+
+from ptl.infile import TokenType, tokenize_infile
+
+from tests.testlib import dedent
+
+
+def test_tokens() -> None:
+    text = dedent("""
+        # comment
+        foo  ==3.3.1  #inline comment
+        \t bar[extra]   \t\r
+        baz#notacomment
+        -r parent-1
+        -cparent-2.txt
+        --requirement parent-3.requirements.in
+        --constraint=./parent-4
+        --index-url https://example.com/simple
+        -e ./local/package
+    """)
+
+    assert tokenize_infile(text) == [
+        (TokenType.DEPENDENCY, 'foo  ==3.3.1'),
+        (TokenType.DEPENDENCY, 'bar[extra]'),
+        (TokenType.DEPENDENCY, 'baz#notacomment'),
+        (TokenType.REQUIREMENTS, 'parent-1'),
+        (TokenType.CONSTRAINTS, 'parent-2'),
+        (TokenType.REQUIREMENTS, 'parent-3'),
+        (TokenType.CONSTRAINTS, 'parent-4'),
+        (TokenType.OPTION, '--index-url https://example.com/simple'),
+        (TokenType.OPTION, '-e ./local/package'),
+    ]
+
+
+def test_continuations() -> None:
+    text = dedent("""
+        foo \\
+            >=1.0 \\
+            ; python_version < "3.12"  # comment
+        # comment \\
+        bar
+        -r \\
+        base
+        baz \\
+    """)
+
+    assert tokenize_infile(text) == [
+        (TokenType.DEPENDENCY, 'foo >=1.0 ; python_version < "3.12"'),
+        (TokenType.DEPENDENCY, 'bar'),
+        (TokenType.REQUIREMENTS, 'base'),
+        (TokenType.DEPENDENCY, 'baz'),
+    ]
+
+
+@pytest.mark.parametrize('line', [
+    '-r ../other/base.in',
+    '-c /abs/base.txt',
+    '-r https://example.com/requirements.txt',
+    '--requirement',
+    '-r base.in extra',
+])
+def test_reference_options_kept_as_is(line: str) -> None:
+    assert tokenize_infile(line) == [(TokenType.OPTION, line)]
@@ -0,0 +1,80 @@
+from typing import List
+
+from ptl.infile import InFile, Reference
+from ptl.provenance import (
+    check_provenance, compute_provenance, format_header, write_provenance,
+)
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    def prepare_infiles(self) -> InFile:
+        parent = InFile('parent.in')
+        parent.add_dependency('foo')
+        child = InFile('child.in')
+        child.add_reference(Reference('c', parent))
+        child.add_dependency('bar')
+        self.create_file('parent.txt', 'foo==1.0\n')
+        self.create_file('child.txt', 'bar==1.0\nfoo==1.0\n')
+        write_provenance(
+            self.input_dir / 'child.txt',
+            compute_provenance(child, self.input_dir),
+        )
+        return child
+
+    def check(self, infile: InFile) -> List[str]:
+        return check_provenance(infile, self.input_dir)
+
+    def test_up_to_date(self) -> None:
+        child = self.prepare_infiles()
+
+        assert self.check(child) == []
+
+    def test_input_changed(self) -> None:
+        child = self.prepare_infiles()
+        child.add_dependency('baz')
+
+        assert self.check(child) == ['input changed']
+
+    def test_referenced_locks_changed(self) -> None:
+        child = self.prepare_infiles()
+        self.create_file('parent.txt', 'foo==2.0\n')
+
+        assert self.check(child) == ['referenced locks changed']
+
+    def test_input_and_referenced_locks_changed(self) -> None:
+        child = self.prepare_infiles()
+        child.add_dependency('baz')
+        (self.input_dir / 'parent.txt').unlink()
+
+        assert self.check(child) == [
+            'input changed', 'referenced locks changed']
+
+    def test_lock_not_found(self) -> None:
+        child = self.prepare_infiles()
+        (self.input_dir / 'child.txt').unlink()
+
+        assert self.check(child) == ['lock not found']
+
+    def test_no_header(self) -> None:
+        child = self.prepare_infiles()
+        self.create_file('child.txt', 'bar==1.0\nfoo==1.0\n')
+
+        assert self.check(child) == ['no provenance header']
+
+    def test_unsupported_header(self) -> None:
+        child = self.prepare_infiles()
+        self.create_file('child.txt', (
+            '# ptl provenance v0 input=foo references=bar\nbar==1.0\n'))
+
+        assert self.check(child) == ['unsupported provenance header']
+
+    def test_lock_content_not_checked(self) -> None:
+        # the lock is only checked against its inputs
+        child = self.prepare_infiles()
+        header = format_header(compute_provenance(child, self.input_dir))
+        (self.input_dir / 'child.txt').write_bytes(header + b'edited\n')
+
+        assert self.check(child) == []
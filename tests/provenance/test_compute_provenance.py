@@ -0,0 +1,71 @@
+from typing import Dict, Optional
+
+from ptl.infile import InFile, Reference
+from ptl.provenance import compute_provenance
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    def prepare_infiles(self) -> InFile:
+        parent = InFile('parent.in')
+        parent.add_dependency('foo')
+        child = InFile('child.in')
+        child.add_reference(Reference('c', parent))
+        child.add_dependency('bar')
+        return child
+
+    def test_stable(self) -> None:
+        child = self.prepare_infiles()
+        self.create_file('parent.txt', 'foo==1.0\n')
+
+        assert compute_provenance(child, self.input_dir) == (
+            compute_provenance(child, self.input_dir))
+
+    def test_input(self) -> None:
+        child = self.prepare_infiles()
+        provenance = compute_provenance(child, self.input_dir)
+        child.add_dependency('baz')
+
+        changed = compute_provenance(child, self.input_dir)
+
+        assert changed.input != provenance.input
+        assert changed.references == provenance.references
+
+    def test_referenced_locks(self) -> None:
+        child = self.prepare_infiles()
+        missing = compute_provenance(child, self.input_dir)
+        self.create_file('parent.txt', 'foo==1.0\n')
+        existing = compute_provenance(child, self.input_dir)
+        self.create_file('parent.txt', 'foo==2.0\n')
+        changed = compute_provenance(child, self.input_dir)
+
+        assert missing.input == existing.input == changed.input
+        assert len({
+            missing.references, existing.references, changed.references,
+        }) == 3
+
+    def test_provenance_headers_ignored(self) -> None:
+        child = self.prepare_infiles()
+        self.create_file('parent.txt', 'foo==1.0\n')
+        provenance = compute_provenance(child, self.input_dir)
+        self.create_file('parent.txt', (
+            f'# ptl provenance v1 input={"0" * 64} references={"1" * 64}\n'
+            'foo==1.0\n'
+        ))
+
+        assert compute_provenance(child, self.input_dir) == provenance
+
+    def test_lock_digests(self) -> None:
+        child = self.prepare_infiles()
+        self.create_file('parent.txt', 'foo==1.0\n')
+        lock_digests: Dict[str, Optional[str]] = {}
+        provenance = compute_provenance(
+            child, self.input_dir, lock_digests=lock_digests)
+        # cached digests are used, the lock is not read again
+        self.create_file('parent.txt', 'foo==2.0\n')
+
+        assert list(lock_digests) == ['parent.txt']
+        assert compute_provenance(
+            child, self.input_dir, lock_digests=lock_digests) == provenance
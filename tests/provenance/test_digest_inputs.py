@@ -0,0 +1,63 @@
+from ptl.infile import InFile, Reference
+from ptl.provenance import Digest, digest_inputs
+
+from tests.testlib import InFileTestSuiteBase
+
+
+def test_digest_length_prefixed() -> None:
+    digest_1 = Digest()
+    digest_1.update('ab', 'c')
+    digest_2 = Digest()
+    digest_2.update('a', 'bc')
+
+    assert digest_1.hexdigest() != digest_2.hexdigest()
+
+
+def test_digest_str_and_bytes() -> None:
+    digest_1 = Digest()
+    digest_1.update('foo')
+    digest_2 = Digest()
+    digest_2.update(b'foo')
+
+    assert digest_1.hexdigest() == digest_2.hexdigest()
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    def prepare_infiles(self) -> InFile:
+        parent = InFile('parent.in')
+        child = InFile('child.in')
+        child.add_reference(Reference('c', parent))
+        child.add_dependency('bar')
+        return child
+
+    def digest(self, infile: InFile) -> str:
+        digest = Digest()
+        digest_inputs(digest, infile, self.input_dir)
+        return digest.hexdigest()
+
+    def test_infile(self) -> None:
+        child = self.prepare_infiles()
+        digest = self.digest(child)
+        child.add_dependency('baz')
+
+        assert self.digest(child) != digest
+
+    def test_referenced_locks(self) -> None:
+        child = self.prepare_infiles()
+        missing = self.digest(child)
+        self.create_file('parent.txt', '')
+        empty = self.digest(child)
+        self.create_file('parent.txt', 'foo==1.0\n')
+        existing = self.digest(child)
+
+        assert len({missing, empty, existing}) == 3
+
+    def test_provenance_headers_ignored(self) -> None:
+        child = self.prepare_infiles()
+        self.create_file('parent.txt', 'foo==1.0\n')
+        digest = self.digest(child)
+        header = f'# ptl provenance v1 input={"0" * 64} references={"1" * 64}'
+        self.create_file('parent.txt', f'{header}\nfoo==1.0\n')
+
+        assert self.digest(child) == digest
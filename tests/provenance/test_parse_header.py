@@ -0,0 +1,24 @@
+import pytest
+
+from ptl.provenance import Provenance, format_header, parse_header
+
+
+PROVENANCE = Provenance(input='0' * 64, references='f' * 64)
+
+
+def test_round_trip() -> None:
+    header = format_header(PROVENANCE)
+
+    assert header.endswith(b'\n')
+    assert parse_header(header[:-1]) == PROVENANCE
+
+
+@pytest.mark.parametrize('header', [
+    b'# ptl provenance',
+    b'# ptl provenance v2 input=' + b'0' * 64 + b' references=' + b'f' * 64,
+    b'# ptl provenance v1 input=' + b'0' * 63 + b' references=' + b'f' * 64,
+    b'# ptl provenance v1 references=' + b'f' * 64 + b' input=' + b'0' * 64,
+    b'# ptl provenance v1 input=' + b'0' * 64,
+])
+def test_unsupported(header: bytes) -> None:
+    assert parse_header(header) is None
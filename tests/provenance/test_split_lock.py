@@ -0,0 +1,23 @@
+from typing import Optional
+
+import pytest
+
+from ptl.provenance import split_lock
+
+
+HEADER = b'# ptl provenance v1 input=aa references=bb'
+
+
+@pytest.mark.parametrize(['data', 'expected_header', 'expected_content'], [
+    (b'', None, b''),
+    (b'foo==1.0\n', None, b'foo==1.0\n'),
+    (b'# comment\nfoo==1.0\n', None, b'# comment\nfoo==1.0\n'),
+    (HEADER, HEADER, b''),
+    (HEADER + b'\n', HEADER, b''),
+    (HEADER + b'\r\nfoo==1.0\r\n', HEADER, b'foo==1.0\r\n'),
+    (b'foo==1.0\n' + HEADER + b'\n', None, b'foo==1.0\n' + HEADER + b'\n'),
+])
+def test(
+    data: bytes, expected_header: Optional[bytes], expected_content: bytes,
+) -> None:
+    assert split_lock(data) == (expected_header, expected_content)
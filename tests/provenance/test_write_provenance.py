@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from ptl.provenance import Provenance, format_header, write_provenance
+
+
+PROVENANCE = Provenance(input='0' * 64, references='f' * 64)
+
+
+def test_added(tmp_path: Path) -> None:
+    path = tmp_path / 'base.txt'
+    path.write_bytes(b'# generated\nfoo==1.0\n')
+
+    assert write_provenance(path, PROVENANCE) is True
+    assert path.read_bytes() == (
+        format_header(PROVENANCE) + b'# generated\nfoo==1.0\n')
+
+
+def test_replaced(tmp_path: Path) -> None:
+    path = tmp_path / 'base.txt'
+    path.write_bytes(
+        b'# ptl provenance v0 input=foo references=bar\nfoo==1.0\n')
+
+    assert write_provenance(path, PROVENANCE) is True
+    assert path.read_bytes() == format_header(PROVENANCE) + b'foo==1.0\n'
+
+
+def test_not_changed(tmp_path: Path) -> None:
+    path = tmp_path / 'base.txt'
+    path.write_bytes(format_header(PROVENANCE) + b'foo==1.0\n')
+    mtime_ns = path.stat().st_mtime_ns
+
+    assert write_provenance(path, PROVENANCE) is False
+    assert path.stat().st_mtime_ns == mtime_ns
+
+
+def test_missing_lock_skipped(tmp_path: Path) -> None:
+    path = tmp_path / 'base.txt'
+
+    assert write_provenance(path, PROVENANCE) is False
+    assert not path.exists()
+
+
+def test_mode_preserved(tmp_path: Path) -> None:
+    path = tmp_path / 'base.txt'
+    path.write_bytes(b'foo==1.0\n')
+    path.chmod(0o644)
+
+    write_provenance(path, PROVENANCE)
+
+    assert path.stat().st_mode & 0o777 == 0o644
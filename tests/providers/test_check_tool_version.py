@@ -1,7 +1,7 @@
 import pytest
 
 from ptl.exceptions import ToolVersionCheckFailed
-from ptl.providers import check_tool_version
+from ptl.providers import ToolVersionCache, check_tool_version
 
 from .base import TestSuiteBase
 
@@ -36,6 +36,20 @@ class TestSuite(TestSuiteBase):
         assert command_line == [str(exec_path), 'sync']
         assert version == 'dummy sync version 0.0.1'
 
+    def test_cache(self) -> None:
+        exec_path = self.tmp_path / 'exec.sh'
+        self.create_executable(exec_path)
+        cache = ToolVersionCache(self.tmp_path / 'tools.json')
+
+        _, version = check_tool_version(f'{exec_path} sync', cache=cache)
+        cached_version = cache.get([str(exec_path), 'sync'])
+        # the cache is invalidated when the executable changes
+        exec_path.write_text('#!/bin/sh\nexit 1\n')
+        with pytest.raises(ToolVersionCheckFailed):
+            check_tool_version(f'{exec_path} sync', cache=cache)
+
+        assert version == cached_version == 'dummy sync version 0.0.1'
+
     def test_not_found_does_not_exist(self) -> None:
         with pytest.raises(ToolVersionCheckFailed, match='does not exist'):
             check_tool_version(str(self.tmp_path / 'doesnotexist.sh'))
@@ -1,37 +1,117 @@
-from unittest.mock import Mock
+from pathlib import Path
+from typing import Dict
 
 import pytest
 
 from ptl.exceptions import ToolNotFound
-from ptl.providers import Provider, Tool, find_tool
+from ptl.providers import Provider, Tool, ToolVersionCache, find_tool
+
+from tests.testlib import dedent
 
 from .base import TestSuiteBase
 
 
 class TestSuite(TestSuiteBase):
 
-    def set_candidates(self, *candidates: str) -> None:
-        mock = Mock(spec_set=Provider.get_tool_candidates)
-        mock.return_value = candidates
-        self.monkeypatch.setattr(Provider, 'get_tool_candidates', mock)
+    def set_providers(self, *providers: Provider) -> Dict[str, Provider]:
+        registry = {str(pos): prov for pos, prov in enumerate(providers)}
+        self.monkeypatch.setattr(Provider, '_registry', registry)
+        return registry
 
     def test_ok(self) -> None:
         bin_dir = self.override_path_variable()
         exec_path = bin_dir / 'dummy'
         self.create_executable(exec_path)
-        self.set_candidates('fake-sync', 'dummy sync')
+        dummy_provider = Provider({
+            Tool.COMPILE: 'dummy compile', Tool.SYNC: 'dummy sync'})
+        self.set_providers(
+            Provider({Tool.COMPILE: 'fake-compile', Tool.SYNC: 'fake-sync'}),
+            dummy_provider,
+        )
 
-        command_line, version = find_tool('sync')
+        command_line, version, provider = find_tool('sync')
 
         assert command_line == [str(exec_path), 'sync']
         assert version == 'dummy sync version 0.0.1'
+        assert provider is dummy_provider
 
     def test_not_found(self) -> None:
         self.override_path_variable()
-        self.set_candidates('fake-compile', 'dummy compile')
+        self.set_providers(
+            Provider({Tool.COMPILE: 'fake-compile', Tool.SYNC: 'fake-sync'}),
+            Provider({Tool.COMPILE: 'dummy compile', Tool.SYNC: 'dummy sync'}),
+        )
 
         with pytest.raises(
             ToolNotFound,
             match='candidates tried: `fake-compile`, `dummy compile`',
         ):
             find_tool(Tool.COMPILE)
+
+    def create_script(self, path: Path, script: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(dedent(script))
+        path.chmod(0o777)
+
+    def test_probed_concurrently(self) -> None:
+        bin_dir = self.override_path_variable()
+        marker = self.tmp_path / 'marker'
+        # fails unless the second candidate is started while it's running
+        self.create_script(bin_dir / 'first', f"""
+            #!/bin/sh
+            PATH=/usr/bin:/bin
+            for _ in $(seq 50); do
+                [ -e {marker} ] && echo "first 1.0" && exit 0
+                sleep 0.1
+            done
+            exit 1
+        """)
+        self.create_script(bin_dir / 'second', f"""
+            #!/bin/sh
+            PATH=/usr/bin:/bin
+            touch {marker}
+            echo "second 1.0"
+        """)
+        first, second = self.set_providers(
+            Provider({Tool.COMPILE: 'first', Tool.SYNC: 'first'}),
+            Provider({Tool.COMPILE: 'second', Tool.SYNC: 'second'}),
+        ).values()
+
+        command_line, version, provider = find_tool('compile')
+
+        assert command_line == [str(bin_dir / 'first')]
+        assert version == 'first 1.0'
+        assert provider is first
+
+    def test_cache(self) -> None:
+        bin_dir = self.override_path_variable()
+        exec_path = bin_dir / 'dummy'
+        self.create_executable(exec_path)
+        self.set_providers(
+            Provider({Tool.COMPILE: 'dummy compile', Tool.SYNC: 'dummy sync'}))
+        cache = ToolVersionCache(self.tmp_path / 'tools.json')
+        cache.set([str(exec_path), 'compile'], 'cached 1.0')
+
+        assert find_tool('compile', cache=cache)[1] == 'cached 1.0'
+        assert find_tool('sync', cache=cache)[1] == 'dummy sync version 0.0.1'
+        assert cache.get([str(exec_path), 'sync']) == (
+            'dummy sync version 0.0.1')
+
+    def test_cached_candidate_after_failed_one(self) -> None:
+        bin_dir = self.override_path_variable()
+        self.create_script(bin_dir / 'broken', """
+            #!/bin/sh
+            exit 1
+        """)
+        self.create_executable(bin_dir / 'dummy')
+        broken, dummy = self.set_providers(
+            Provider({Tool.COMPILE: 'broken', Tool.SYNC: 'broken'}),
+            Provider({Tool.COMPILE: 'dummy compile', Tool.SYNC: 'dummy sync'}),
+        ).values()
+        cache = ToolVersionCache(self.tmp_path / 'tools.json')
+        cache.set([str(bin_dir / 'dummy'), 'compile'], 'cached 1.0')
+
+        _, version, provider = find_tool('compile', cache=cache)
+
+        assert version == 'cached 1.0'
+        assert provider is dummy
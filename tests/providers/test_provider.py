@@ -42,6 +42,36 @@ def test_register(registry: Registry) -> None:
     assert getattr(Provider, 'FAKE') == FAKE_PROVIDER
 
 
+def test_register_not_discoverable(
+    monkeypatch: pytest.MonkeyPatch, registry: Registry,
+) -> None:
+    monkeypatch.delattr(Provider, 'SIMULATED')
+
+    Provider.register('SIMULATED', FAKE_PROVIDER, discoverable=False)
+
+    assert registry == {}
+    assert Provider.SIMULATED == FAKE_PROVIDER
+
+
+def test_simulated_not_discoverable() -> None:
+    assert Provider.SIMULATED not in Provider.get_providers()
+
+
+def test_pip_tools_stdin_not_supported() -> None:
+    # pip-compile resolves references read from stdin against the temporary
+    # directory, not against its working directory
+    assert not Provider.PIP_TOOLS.supports_stdin
+    assert Provider.UV.supports_stdin
+
+
+@pytest.mark.usefixtures('registry')
+def test_get_providers() -> None:
+    Provider.register('FAKE', FAKE_PROVIDER)
+    Provider.register('DUMMY', DUMMY_PROVIDER)
+
+    assert Provider.get_providers() == (FAKE_PROVIDER, DUMMY_PROVIDER)
+
+
 @pytest.mark.usefixtures('registry')
 def test_get_tool_candidates_tool_enum() -> None:
     Provider.register('DUMMY', DUMMY_PROVIDER)
@@ -0,0 +1,77 @@
+import os
+
+from ptl.providers import ToolVersionCache
+
+from .base import TestSuiteBase
+
+
+class TestSuite(TestSuiteBase):
+
+    def test_set_and_get(self) -> None:
+        exec_path = self.tmp_path / 'bin' / 'tool'
+        self.create_executable(exec_path)
+        cache_path = self.tmp_path / 'cache' / 'tools.json'
+        cache = ToolVersionCache(cache_path)
+
+        cache.set([str(exec_path), 'compile'], 'tool 1.0')
+
+        cache = ToolVersionCache(cache_path)
+        assert cache.get([str(exec_path), 'compile']) == 'tool 1.0'
+        assert cache.get([str(exec_path), 'sync']) is None
+
+    def test_symlink_resolved(self) -> None:
+        exec_path = self.tmp_path / 'bin' / 'tool'
+        self.create_executable(exec_path)
+        link_path = self.tmp_path / 'link'
+        link_path.symlink_to(exec_path)
+        cache = ToolVersionCache(self.tmp_path / 'tools.json')
+
+        cache.set([str(link_path)], 'tool 1.0')
+
+        assert cache.get([str(exec_path)]) == 'tool 1.0'
+
+    def test_executable_changed(self) -> None:
+        exec_path = self.tmp_path / 'bin' / 'tool'
+        self.create_executable(exec_path)
+        cache = ToolVersionCache(self.tmp_path / 'tools.json')
+        cache.set([str(exec_path)], 'tool 1.0')
+
+        with open(exec_path, 'a') as fobj:
+            fobj.write('# upgraded\n')
+
+        assert cache.get([str(exec_path)]) is None
+
+    def test_executable_missing(self) -> None:
+        cache = ToolVersionCache(self.tmp_path / 'tools.json')
+
+        cache.set([str(self.tmp_path / 'missing')], 'tool 1.0')
+
+        assert cache.get([str(self.tmp_path / 'missing')]) is None
+        assert not (self.tmp_path / 'tools.json').exists()
+
+    def test_malformed_cache_ignored(self) -> None:
+        exec_path = self.tmp_path / 'bin' / 'tool'
+        self.create_executable(exec_path)
+        cache_path = self.tmp_path / 'tools.json'
+        stat = os.stat(exec_path)
+        key = f'{exec_path}\0compile'
+        for content in [
+            'not a json', '[]', f'{{"{key}": 1}}'.replace('\0', '\\u0000'),
+            f'{{"{key}": {{"mtime": {stat.st_mtime_ns}}}}}'.replace(
+                '\0', '\\u0000'),
+        ]:
+            cache_path.write_text(content)
+
+            cache = ToolVersionCache(cache_path)
+
+            assert cache.get([str(exec_path), 'compile']) is None
+
+    def test_write_failure_ignored(self) -> None:
+        exec_path = self.tmp_path / 'bin' / 'tool'
+        self.create_executable(exec_path)
+        (self.tmp_path / 'cache').write_text('')
+        cache = ToolVersionCache(self.tmp_path / 'cache' / 'tools.json')
+
+        cache.set([str(exec_path)], 'tool 1.0')
+
+        assert cache.get([str(exec_path)]) == 'tool 1.0'
@@ -0,0 +1,49 @@
+from typing import List
+
+import pytest
+
+from ptl.infile import InFile, Reference
+from ptl.scheduler import estimate_durations, get_priorities
+
+
+@pytest.fixture
+def infiles() -> List[InFile]:
+    # base <- short
+    # base <- long <- top
+    base = InFile('base.in')
+    short = InFile('short.in')
+    long = InFile('long.in')
+    top = InFile('top.in')
+    short.add_reference(Reference('c', base))
+    long.add_reference(Reference('c', base))
+    top.add_reference(Reference('c', long))
+    return [base, long, short, top]
+
+
+def test_estimate_durations_without_history(infiles: List[InFile]) -> None:
+    base, long, short, top = infiles
+    long.add_dependency('foo')
+    long.add_dependency('bar')
+
+    estimated = estimate_durations(infiles, {})
+
+    assert estimated == {base: 1.0, long: 3.0, short: 1.0, top: 1.0}
+
+
+def test_estimate_durations_scaled(infiles: List[InFile]) -> None:
+    base, long, short, top = infiles
+    short.add_dependency('foo')
+
+    estimated = estimate_durations(infiles, {base: 3.0, long: 5.0})
+
+    # 8 seconds for 2 units of size
+    assert estimated == {base: 3.0, long: 5.0, short: 8.0, top: 4.0}
+
+
+def test_get_priorities(infiles: List[InFile]) -> None:
+    base, long, short, top = infiles
+
+    priorities = get_priorities(
+        infiles, {base: 1.0, long: 10.0, short: 20.0, top: 15.0})
+
+    assert priorities == {base: 26.0, long: 25.0, short: 20.0, top: 15.0}
@@ -0,0 +1,160 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from ptl.exceptions import Error
+from ptl.infile import InFile, Reference
+from ptl.scheduler import schedule
+
+
+@pytest.fixture
+def infiles() -> List[InFile]:
+    base = InFile('base.in')
+    left = InFile('left.in')
+    right = InFile('right.in')
+    top = InFile('top.in')
+    left.add_reference(Reference('c', base))
+    right.add_reference(Reference('r', base))
+    top.add_reference(Reference('c', left))
+    top.add_reference(Reference('c', right))
+    return [base, left, right, top]
+
+
+def test_sequential_order_preserved(infiles: List[InFile]) -> None:
+    processed: List[InFile] = []
+
+    async def func(infile: InFile) -> None:
+        processed.append(infile)
+
+    schedule(infiles, func, jobs=1)
+
+    assert processed == infiles
+
+
+def test_parallel(infiles: List[InFile]) -> None:
+    base, left, right, top = infiles
+    done: List[InFile] = []
+    started: List[InFile] = []
+
+    async def func(infile: InFile) -> None:
+        # all dependencies must be processed before the dependent is started
+        for ref in infile.iterate_references(recursive=True):
+            assert ref.infile in done
+        started.append(infile)
+        if infile in [left, right]:
+            # left and right must run concurrently
+            for _ in range(5000):
+                if {left, right} <= set(started):
+                    break
+                await asyncio.sleep(0.001)
+            else:
+                raise AssertionError('not started concurrently')
+        done.append(infile)
+
+    schedule(infiles, func, jobs=3)
+
+    assert done[0] == base
+    assert set(done[1:3]) == {left, right}
+    assert done[3] == top
+
+
+def test_priorities(infiles: List[InFile]) -> None:
+    base, left, right, top = infiles
+    other = InFile('other.in')
+    processed: List[InFile] = []
+
+    async def func(infile: InFile) -> None:
+        processed.append(infile)
+
+    schedule(
+        [*infiles, other], func, jobs=1,
+        priorities={base: 1.0, left: 1.0, right: 2.0, other: 5.0},
+    )
+
+    assert processed == [other, base, right, left, top]
+
+
+def test_transitive_dependency_outside_of_infiles() -> None:
+    grand = InFile('grand.in')
+    parent = InFile('parent.in')
+    child = InFile('child.in')
+    parent.add_reference(Reference('c', grand))
+    child.add_reference(Reference('c', parent))
+    processed: List[InFile] = []
+
+    async def func(infile: InFile) -> None:
+        processed.append(infile)
+
+    schedule([child, grand], func, jobs=1)
+
+    assert processed == [grand, child]
+
+
+def test_error_stops_scheduling(infiles: List[InFile]) -> None:
+    processed: List[InFile] = []
+
+    async def func(infile: InFile) -> None:
+        if infile.stem == 'left':
+            raise RuntimeError('boom')
+        processed.append(infile)
+
+    with pytest.raises(RuntimeError, match='boom'):
+        schedule(infiles, func, jobs=1)
+
+    assert processed == [infiles[0]]
+
+
+def test_error_cancels_running(infiles: List[InFile]) -> None:
+    cancelled: List[InFile] = []
+
+    async def func(infile: InFile) -> None:
+        if infile.stem == 'left':
+            raise Error('boom')
+        if infile.stem == 'right':
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(infile)
+                raise
+
+    with pytest.raises(Error, match='boom'):
+        schedule(infiles, func, jobs=3)
+
+    assert cancelled == [infiles[2]]
+
+
+def test_keep_going(infiles: List[InFile]) -> None:
+    base, left, right, top = infiles
+    other = InFile('other.in')
+    processed: List[InFile] = []
+
+    async def func(infile: InFile) -> None:
+        if infile == left:
+            raise Error('boom')
+        processed.append(infile)
+
+    errors = schedule([*infiles, other], func, jobs=1, keep_going=True)
+
+    assert list(errors) == [left]
+    assert str(errors[left]) == 'boom'
+    # top depends on left, thus not started
+    assert processed == [base, right, other]
+
+
+def test_keep_going_unexpected_error_raised(infiles: List[InFile]) -> None:
+
+    async def func(infile: InFile) -> None:
+        raise RuntimeError('bug')
+
+    with pytest.raises(RuntimeError, match='bug'):
+        schedule(infiles, func, jobs=1, keep_going=True)
+
+
+def test_invalid_jobs(infiles: List[InFile]) -> None:
+
+    async def func(infile: InFile) -> None:
+        pass
+
+    with pytest.raises(ValueError, match='got 0'):
+        schedule(infiles, func, jobs=0)
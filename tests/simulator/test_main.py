@@ -0,0 +1,193 @@
+import io
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from ptl import __version__
+from ptl.simulator import get_version, main
+
+from tests.testlib import dedent
+
+
+@pytest.fixture(autouse=True)
+def setup(tmp_cwd: Path) -> None:
+    pass
+
+
+def write(path: str, content: str) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(dedent(content))
+
+
+def read_lock(path: str) -> List[str]:
+    return [
+        line for line in Path(path).read_text().splitlines()
+        if not line.startswith('#')
+    ]
+
+
+def test_compile() -> None:
+    write('main.in', """
+        Django>=4.0  # web framework
+        requests[socks]
+        pytest==8.0.0 ; python_version >= "3.8"
+    """)
+
+    main(['compile', 'main.in', '-o', 'main.txt'])
+
+    assert read_lock('main.txt') == [
+        f'django=={get_version("django")}',
+        'pytest==8.0.0',
+        f'requests[socks]=={get_version("requests")}',
+    ]
+
+
+def test_deterministic() -> None:
+    write('main.in', 'foo\nbar\n')
+
+    main(['compile', 'main.in', '-o', 'first.txt'])
+    main(['compile', 'main.in', '-o', 'second.txt'])
+    main(['compile', 'main.in', '-o', 'seeded.txt', '--seed', '1'])
+
+    assert read_lock('first.txt') == read_lock('second.txt')
+    assert read_lock('seeded.txt') == [
+        f'bar=={get_version("bar", 1)}',
+        f'foo=={get_version("foo", 1)}',
+    ]
+
+
+def test_constraints() -> None:
+    write('reqs/main.txt', """
+        # a lock file
+        Foo_Bar==9.9.9
+        baz==1.0 \\
+            --hash=sha256:0000
+    """)
+    write('reqs/dev.in', """
+        -c main.txt
+        foo-bar
+        qux
+    """)
+    write('extra.txt', 'qux==2.0\n')
+
+    main(['compile', '-c', 'extra.txt', 'reqs/dev.in', '-o', 'dev.txt'])
+
+    assert read_lock('dev.txt') == ['foo-bar==9.9.9', 'qux==2.0']
+
+
+def test_requirements_included() -> None:
+    write('reqs/base.in', 'foo\n')
+    write('reqs/dev.in', """
+        -r base.in
+        --requirement=base.in
+        bar
+    """)
+
+    main(['compile', 'reqs/dev.in', '-o', 'dev.txt'])
+
+    assert read_lock('dev.txt') == [
+        f'bar=={get_version("bar")}',
+        f'foo=={get_version("foo")}',
+    ]
+
+
+def test_stdin(monkeypatch: pytest.MonkeyPatch) -> None:
+    write('reqs/main.txt', 'foo==1.2.3\n')
+    monkeypatch.setattr(
+        'sys.stdin', io.StringIO('-c reqs/main.txt\nfoo\nbar==0.1\n'))
+
+    main(['compile', '-', '-o', 'dev.txt'])
+
+    assert read_lock('dev.txt') == ['bar==0.1', 'foo==1.2.3']
+
+
+def test_unknown_options_ignored() -> None:
+    write('main.in', '--index-url https://example.com\nfoo\n')
+
+    main([
+        'compile', '-v', '--generate-hashes', '--index-url=https://test',
+        'main.in', '-o', 'main.txt',
+    ])
+
+    assert read_lock('main.txt') == [f'foo=={get_version("foo")}']
+
+
+def test_error_conflicting_pin() -> None:
+    write('main.txt', 'foo==1.0\n')
+    write('dev.in', '-c main.txt\nfoo==2.0\n')
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(['compile', 'dev.in', '-o', 'dev.txt'])
+
+    assert exc_info.value.code == (
+        'error: cannot install foo==2.0: constrained to foo==1.0')
+    assert not Path('dev.txt').exists()
+
+
+def test_error_conflicting_constraints() -> None:
+    write('main.txt', 'foo==1.0\n')
+    write('other.txt', 'foo==2.0\n')
+    write('dev.in', '-c main.txt\n-c other.txt\nfoo\n')
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(['compile', 'dev.in', '-o', 'dev.txt'])
+
+    assert exc_info.value.code == (
+        'error: conflicting constraints: foo==1.0, foo==2.0 (other.txt)')
+
+
+def test_error_file_not_found() -> None:
+    with pytest.raises(SystemExit) as exc_info:
+        main(['compile', 'main.in', '-o', 'main.txt'])
+
+    assert exc_info.value.code == 'error: main.in: No such file or directory'
+
+
+@pytest.mark.parametrize('args', [
+    ['compile', 'main.in', '-o', 'out.txt'],
+    ['sync', 'main.txt'],
+])
+def test_failure_rate(args: List[str]) -> None:
+    write('main.in', 'foo\n')
+    write('main.txt', 'foo==1.0\n')
+
+    with pytest.raises(SystemExit) as exc_info:
+        main([*args, '--failure-rate', '1'])
+
+    assert exc_info.value.code == 'error: simulated failure'
+
+
+def test_load() -> None:
+    write('main.in', 'foo\n')
+
+    main([
+        'compile', 'main.in', '-o', 'main.txt',
+        '--latency', '0.01', '--cpu', '0.01', '--memory', '1',
+    ])
+
+    assert read_lock('main.txt') == [f'foo=={get_version("foo")}']
+
+
+def test_sync() -> None:
+    write('main.txt', 'foo==1.0\n')
+
+    main(['sync', 'main.txt', '-q'])
+
+
+def test_sync_error_file_not_found() -> None:
+    with pytest.raises(SystemExit) as exc_info:
+        main(['sync', 'main.txt'])
+
+    assert exc_info.value.code == 'error: main.txt: file not found'
+
+
+def test_version() -> None:
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'ptl.simulator', 'compile', '--version'],
+        text=True,
+    )
+
+    assert output == f'ptl-simulator {__version__}\n'
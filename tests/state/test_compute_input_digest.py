@@ -0,0 +1,65 @@
+from typing import List
+
+from ptl.infile import InFile, Reference
+from ptl.state import compute_input_digest
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+    command_line = ['dummy', 'compile']
+
+    def digest(
+        self, infile: InFile, command_line: List[str] = command_line,
+        tool_version: str = '1.0',
+    ) -> str:
+        return compute_input_digest(
+            infile, self.input_dir,
+            command_line=command_line, tool_version=tool_version,
+        )
+
+    def test_stable(self) -> None:
+        infile = InFile('base.in')
+        infile.add_dependency('foo')
+
+        assert self.digest(infile) == self.digest(infile)
+
+    def test_dependencies(self) -> None:
+        infile_1 = InFile('base.in')
+        infile_1.add_dependency('foo')
+        infile_2 = InFile('base.in')
+        infile_2.add_dependency('bar')
+
+        assert self.digest(infile_1) != self.digest(infile_2)
+
+    def test_tool(self) -> None:
+        infile = InFile('base.in')
+        digest = self.digest(infile)
+
+        assert self.digest(infile, tool_version='2.0') != digest
+        assert self.digest(infile, ['dummy', 'compile', '-U']) != digest
+
+    def test_referenced_locks(self) -> None:
+        parent = InFile('parent.in')
+        child = InFile('child.in')
+        child.add_reference(Reference('r', parent))
+        missing = self.digest(child)
+        self.create_file('parent.txt', 'foo==1.0')
+        existing = self.digest(child)
+        self.create_file('parent.txt', 'foo==2.0')
+        changed = self.digest(child)
+
+        assert len({missing, existing, changed}) == 3
+
+    def test_provenance_headers_ignored(self) -> None:
+        parent = InFile('parent.in')
+        child = InFile('child.in')
+        child.add_reference(Reference('r', parent))
+        self.create_file('parent.txt', 'foo==1.0\n')
+        digest = self.digest(child)
+        self.create_file('parent.txt', (
+            f'# ptl provenance v1 input={"0" * 64} references={"1" * 64}\n'
+            'foo==1.0\n'
+        ))
+
+        assert self.digest(child) == digest
@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from ptl.infile import InFile
+from ptl.state import State
+
+from tests.testlib import InFileTestSuiteBase
+
+
+class TestSuite(InFileTestSuiteBase):
+
+    @pytest.fixture
+    def infile(self) -> InFile:
+        return InFile('base.in')
+
+    @property
+    def state_path(self) -> Path:
+        return self.input_dir / '.ptl' / 'state.json'
+
+    def test_not_up_to_date_if_no_state(self, infile: InFile) -> None:
+        self.create_file('base.txt', 'foo==1.0')
+
+        assert not State(self.input_dir).is_up_to_date(infile, 'digest')
+
+    def test_update_and_save(self, infile: InFile) -> None:
+        self.create_file('base.txt', 'foo==1.0')
+        state = State(self.input_dir)
+
+        state.update(infile, 'digest')
+        state.save()
+
+        assert state.is_up_to_date(infile, 'digest')
+        assert not state.is_up_to_date(infile, 'another')
+        assert State(self.input_dir).is_up_to_date(infile, 'digest')
+        assert (self.input_dir / '.ptl' / '.gitignore').read_text() == '*\n'
+
+    def test_output_changed(self, infile: InFile) -> None:
+        self.create_file('base.txt', 'foo==1.0')
+        state = State(self.input_dir)
+        state.update(infile, 'digest')
+
+        self.create_file('base.txt', 'foo==2.0')
+
+        assert not state.is_up_to_date(infile, 'digest')
+
+    def test_output_missing(self, infile: InFile) -> None:
+        self.create_file('base.txt', 'foo==1.0')
+        state = State(self.input_dir)
+        state.update(infile, 'digest')
+
+        (self.input_dir / 'base.txt').unlink()
+
+        assert not state.is_up_to_date(infile, 'digest')
+
+    def test_update_without_output_forgets_layer(self, infile: InFile) -> None:
+        self.create_file('base.txt', 'foo==1.0')
+        state = State(self.input_dir)
+        state.update(infile, 'digest')
+        (self.input_dir / 'base.txt').unlink()
+
+        state.update(infile, 'digest')
+        state.save()
+
+        assert json.loads(self.state_path.read_text())['layers'] == {}
+
+    def test_durations(self, infile: InFile) -> None:
+        state = State(self.input_dir)
+        assert state.get_duration(infile) is None
+
+        state.set_duration(infile, 1.23456)
+        state.save()
+
+        assert State(self.input_dir).get_duration(infile) == 1.235
+        assert json.loads(self.state_path.read_text())['durations'] == {
+            'base.in': 1.235}
+
+    def test_durations_missing_in_state_file(self, infile: InFile) -> None:
+        self.state_path.parent.mkdir()
+        self.state_path.write_text('{"version": 1, "layers": {}}')
+
+        assert State(self.input_dir).get_duration(infile) is None
+
+    def test_save_nothing_changed(self) -> None:
+        State(self.input_dir).save()
+
+        assert not self.state_path.exists()
+
+    @pytest.mark.parametrize('content', [
+        'not json', '[]', '{"version": 1}', '{"version": 100, "layers": {}}'])
+    def test_malformed_state_ignored(
+        self, infile: InFile, content: str,
+    ) -> None:
+        self.state_path.parent.mkdir()
+        self.state_path.write_text(content)
+        self.create_file('base.txt', 'foo==1.0')
+
+        assert not State(self.input_dir).is_up_to_date(infile, 'digest')
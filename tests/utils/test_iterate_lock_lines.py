@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from ptl.utils import iterate_lock_lines
+
+from tests.testlib import dedent
+
+
+def test_ok(tmp_path: Path) -> None:
+    path = tmp_path / 'base.txt'
+    path.write_text(dedent("""
+        #
+        # This file is autogenerated by pip-compile with Python 3.12
+        #
+        --index-url https://example.com/simple
+
+        attrs==23.2.0 \\
+            --hash=sha256:aaa \\
+            --hash=sha256:bbb
+            # via -r base.in
+        pytest==8.2.2    # via -r base.in
+    """))
+
+    lines = list(iterate_lock_lines(path))
+
+    assert lines == [
+        '--index-url https://example.com/simple',
+        'attrs==23.2.0',
+        'pytest==8.2.2',
+    ]
+
+
+def test_not_found(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        list(iterate_lock_lines(tmp_path / 'base.txt'))
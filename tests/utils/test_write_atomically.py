@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+from ptl.utils import write_atomically
+
+
+def test_ok(tmp_path: Path) -> None:
+    path = tmp_path / 'file'
+    path.write_bytes(b'old')
+
+    write_atomically(path, b'new')
+
+    assert path.read_bytes() == b'new'
+    assert [p.name for p in tmp_path.iterdir()] == ['file']
+
+
+def test_mode_preserved(tmp_path: Path) -> None:
+    path = tmp_path / 'file'
+    path.write_bytes(b'old')
+    path.chmod(0o644)
+
+    write_atomically(path, b'new')
+
+    assert path.stat().st_mode & 0o777 == 0o644
+
+
+@pytest.mark.parametrize(['umask', 'expected_mode'], [
+    (0o022, 0o644),
+    (0o027, 0o640),
+])
+def test_new_file_mode(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+    umask: int, expected_mode: int,
+) -> None:
+    # the umask is read once on import
+    monkeypatch.setattr('ptl.utils._UMASK', umask)
+    path = tmp_path / 'file'
+
+    write_atomically(path, b'new')
+
+    assert path.stat().st_mode & 0o777 == expected_mode
+
+
+def test_error_temp_file_removed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    path = tmp_path / 'file'
+    path.write_bytes(b'old')
+
+    def replace(src: str, dst: str) -> None:
+        raise OSError('boom')
+
+    monkeypatch.setattr('os.replace', replace)
+
+    with pytest.raises(OSError, match='boom'):
+        write_atomically(path, b'new')
+
+    assert path.read_bytes() == b'old'
+    assert [p.name for p in tmp_path.iterdir()] == ['file']
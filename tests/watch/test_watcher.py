@@ -0,0 +1,113 @@
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+
+from ptl.watch import InotifyWatcher, PollingWatcher, Watcher
+
+from tests.testlib import InFileTestSuiteBase
+
+
+WatcherFactory = Callable[[Path], Watcher]
+
+
+def polling_watcher(directory: Path) -> Watcher:
+    return PollingWatcher(directory, debounce=0.1, interval=0.01)
+
+
+def inotify_watcher(directory: Path) -> Watcher:
+    return InotifyWatcher(directory, debounce=0.1)
+
+
+@pytest.fixture(params=[
+    pytest.param(polling_watcher, id='polling'),
+    pytest.param(
+        inotify_watcher, id='inotify',
+        marks=pytest.mark.skipif(
+            not sys.platform.startswith('linux'), reason='linux only'),
+    ),
+])
+def watcher_factory(request: pytest.FixtureRequest) -> WatcherFactory:
+    return request.param   # type: ignore[no-any-return]
+
+
+def test_incomplete_watcher(tmp_path: Path) -> None:
+
+    class NoEventsWatcher(Watcher):
+        pass
+
+    with pytest.raises(TypeError, match='abstract'):
+        NoEventsWatcher(tmp_path)   # type: ignore[abstract]
+
+
+class TestSuite(InFileTestSuiteBase):
+    watcher: Watcher
+
+    @pytest.fixture(autouse=True)
+    def setup(
+        self, base_setup: None, watcher_factory: WatcherFactory,
+    ) -> Iterator[None]:
+        self.create_file('base.in', 'foo')
+        self.create_file('base.txt', 'foo==1.0')
+        with watcher_factory(self.input_dir) as watcher:
+            self.watcher = watcher
+            yield
+
+    def later(self, func: Callable[[], object], delay: float = 0.05) -> None:
+
+        def target() -> None:
+            time.sleep(delay)
+            func()
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+
+    def test_changed(self) -> None:
+        self.later(lambda: self.create_file('base.in', 'foo\nbar'))
+
+        assert self.watcher.wait() == {'base.in'}
+
+    def test_burst_debounced(self) -> None:
+
+        def burst() -> None:
+            self.create_file('base.in', 'foo\nbar')
+            time.sleep(0.02)
+            self.create_file('child.in', '-r base')
+            time.sleep(0.02)
+            (self.input_dir / 'base.txt').unlink()
+            # not watched
+            self.create_file('base.ptl.in', 'foo')
+            self.create_file('notes.md', 'foo')
+
+        self.later(burst)
+
+        assert self.watcher.wait() == {'base.in', 'child.in', 'base.txt'}
+
+    def test_refresh_forgets_changes(self) -> None:
+        self.create_file('base.txt', 'foo==2.0')
+        self.watcher.refresh()
+        self.later(lambda: self.create_file('other.in', 'bar'))
+
+        assert self.watcher.wait() == {'other.in'}
+
+    def test_refresh_keeps_input_changes(self) -> None:
+        # e.g., an input file saved while compiling
+        self.create_file('base.in', 'foo\nbar')
+        self.create_file('child.in', '-r base')
+        self.create_file('base.txt', 'foo==2.0')
+        self.watcher.refresh()
+
+        assert self.watcher.wait() == {'base.in', 'child.in'}
+
+        self.later(lambda: self.create_file('other.in', 'bar'))
+
+        assert self.watcher.wait() == {'other.in'}
+
+    def test_refresh_keeps_input_removal(self) -> None:
+        (self.input_dir / 'base.in').unlink()
+        self.watcher.refresh()
+
+        assert self.watcher.wait() == {'base.in'}